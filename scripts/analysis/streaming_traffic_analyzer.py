@@ -0,0 +1,463 @@
+import os
+import sys
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from traffic_pattern_analyzer import TrafficPatternAnalyzer
+
+HLL_PRECISION = 12  # 4096 registers, about 1.6% standard error
+DEFAULT_MAX_WINDOWS = 24 * 14
+MOMENT_COLUMNS = ['n', 'bytes_mean', 'bytes_m2', 'packets_mean', 'packets_m2']
+COMPACT_ROWS = 1 << 20  # pending pair entries summed into a window's pairs
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch with 2**precision one-byte registers. Values are
+    hashed with pandas' vectorized hash and registers are updated with one
+    np.maximum.at per batch.
+    """
+
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values):
+        hashes = pd.util.hash_array(np.asarray(values))
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        # Rank of the first set bit among the next 32 hash bits; frexp gives
+        # the bit length exactly since 32-bit values fit in a float64
+        rest = (hashes >> np.uint64(32 - self.precision)) & np.uint64(0xFFFFFFFF)
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        np.maximum.at(self.registers, index, (33 - bit_length).astype(np.uint8))
+
+    def merge(self, other: 'HyperLogLog'):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting over empty registers
+            estimate = m * np.log(m / zeros)
+        return float(estimate)
+
+
+def _moments(protocols: np.ndarray, size: int, data: pd.DataFrame) -> np.ndarray:
+    """
+    Per-protocol rows of (count, bytes mean, bytes sum of squared
+    deviations, packets mean, packets sum of squared deviations) of a
+    batch; protocols holds each row's protocol id, size the ids in use
+    """
+    n = np.bincount(protocols, minlength=size).astype(np.float64)
+    columns = [n]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for name in ('bytes', 'packets'):
+            values = data[name].to_numpy(dtype=np.float64)
+            mean = np.bincount(protocols, values, size) / n
+            columns += [mean, np.bincount(protocols, (values - mean[protocols]) ** 2, size)]
+    return np.nan_to_num(np.column_stack(columns))
+
+
+def _pad_moments(a: np.ndarray, b: np.ndarray):
+    size = max(len(a), len(b))
+    return (np.vstack([a, np.zeros((size - len(a), a.shape[1]))]),
+            np.vstack([b, np.zeros((size - len(b), b.shape[1]))]))
+
+
+def _merge_moments(a: Optional[np.ndarray], b: np.ndarray) -> np.ndarray:
+    """Combine two moment tables (Chan et al.'s parallel variance update)"""
+    if a is None:
+        return b
+    a, b = _pad_moments(a, b)
+    n = a[:, 0] + b[:, 0]
+    merged = np.zeros_like(a)
+    merged[:, 0] = n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for mean, m2 in ((1, 2), (3, 4)):
+            delta = b[:, mean] - a[:, mean]
+            merged[:, mean] = a[:, mean] + delta * b[:, 0] / n
+            merged[:, m2] = a[:, m2] + b[:, m2] + delta ** 2 * a[:, 0] * b[:, 0] / n
+    return np.nan_to_num(merged)
+
+
+def _subtract_moments(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Inverse of _merge_moments: the moments of a without the rows b summarizes"""
+    a, b = _pad_moments(a, b)
+    n = a[:, 0] - b[:, 0]
+    remaining = np.zeros_like(a)
+    remaining[:, 0] = n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for mean, m2 in ((1, 2), (3, 4)):
+            remaining[:, mean] = (a[:, mean] * a[:, 0] - b[:, mean] * b[:, 0]) / n
+            delta = b[:, mean] - remaining[:, mean]
+            remaining[:, m2] = np.maximum(a[:, m2] - b[:, m2] - delta ** 2 * n * b[:, 0] / a[:, 0], 0)
+    # Protocols with no rows left go back to all zeros
+    return np.where(n[:, np.newaxis] > 0, np.nan_to_num(remaining), 0.0)
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """array zero-padded to at least size, doubling so appends stay amortized O(1)"""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _AddressTable:
+    """
+    Address to id map. An address keeps its id while some retained pair
+    uses it; once none does, the address is dropped and its id reused.
+    """
+
+    def __init__(self):
+        self.ids: Dict = {}
+        self.values: List = []
+        self.references = np.zeros(0, dtype=np.int64)  # retained pairs using each id
+        self.free: List[int] = []
+
+    def lookup(self, values: np.ndarray) -> np.ndarray:
+        """Ids for values, assigning ids to unseen addresses"""
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        ids = np.empty(len(uniques), dtype=np.int64)
+        for i, value in enumerate(uniques.tolist()):
+            address_id = self.ids.get(value)
+            if address_id is None:
+                if self.free:
+                    address_id = self.free.pop()
+                    self.values[address_id] = value
+                else:
+                    address_id = len(self.values)
+                    self.values.append(value)
+                self.ids[value] = address_id
+            ids[i] = address_id
+        self.references = _grow(self.references, len(self.values))
+        return ids[codes]
+
+    def release(self, ids: np.ndarray):
+        """Drop one reference per entry of ids; unreferenced addresses are forgotten"""
+        np.subtract.at(self.references, ids, 1)
+        for address_id in np.unique(ids[self.references[ids] == 0]).tolist():
+            del self.ids[self.values[address_id]]
+            self.values[address_id] = None
+            self.free.append(address_id)
+
+    def used(self) -> np.ndarray:
+        return np.flatnonzero(self.references[:len(self.values)])
+
+
+class _PairTotals:
+    """
+    Bytes and flow counts per (source, destination) address-id pair over
+    all retained windows, in slots found through a dict keyed by the
+    packed pair. A slot whose flow count drops to zero is freed.
+    """
+
+    def __init__(self, addresses: _AddressTable):
+        self.addresses = addresses
+        self.slots: Dict[int, int] = {}
+        self.sources = np.zeros(0, dtype=np.int64)
+        self.destinations = np.zeros(0, dtype=np.int64)
+        self.bytes = np.zeros(0, dtype=np.float64)
+        self.flows = np.zeros(0, dtype=np.int64)
+        self.size = 0  # slots ever handed out
+        self.free: List[int] = []
+
+    def add(self, sources: np.ndarray, destinations: np.ndarray, weights: np.ndarray):
+        """Add one row per flow; returns the (slots, bytes, flows) it added"""
+        codes, keys = pd.factorize((sources << 32) | destinations)
+        slots = np.empty(len(keys), dtype=np.int64)
+        new = []
+        for i, key in enumerate(keys.tolist()):
+            slot = self.slots.get(key)
+            if slot is None:
+                if self.free:
+                    slot = self.free.pop()
+                else:
+                    slot, self.size = self.size, self.size + 1
+                self.slots[key] = slot
+                new.append(i)
+            slots[i] = slot
+        for name in ('sources', 'destinations', 'bytes', 'flows'):
+            setattr(self, name, _grow(getattr(self, name), self.size))
+        if new:
+            new = np.asarray(new)
+            self.sources[slots[new]] = keys[new] >> 32
+            self.destinations[slots[new]] = keys[new] & 0xFFFFFFFF
+            np.add.at(self.addresses.references,
+                      np.concatenate([self.sources[slots[new]], self.destinations[slots[new]]]), 1)
+        weights = np.bincount(codes, weights, len(keys))
+        counts = np.bincount(codes, minlength=len(keys))
+        self.bytes[slots] += weights
+        self.flows[slots] += counts
+        return slots, weights, counts
+
+    def remove(self, slots: np.ndarray, weights: np.ndarray, counts: np.ndarray):
+        """Subtract what add() returned (slots distinct); emptied slots are freed"""
+        self.bytes[slots] -= weights
+        self.flows[slots] -= counts
+        empty = slots[self.flows[slots] == 0]
+        if not len(empty):
+            return
+        self.bytes[empty] = 0.0
+        for slot, source, destination in zip(empty.tolist(), self.sources[empty].tolist(),
+                                             self.destinations[empty].tolist()):
+            del self.slots[(source << 32) | destination]
+            self.free.append(slot)
+        self.addresses.release(np.concatenate([self.sources[empty], self.destinations[empty]]))
+
+    def live(self) -> np.ndarray:
+        return np.flatnonzero(self.flows[:self.size])
+
+
+class _Window:
+    """Aggregates of one time window"""
+
+    __slots__ = ('bytes', 'flows', 'sources', 'destinations', 'moments', 'pairs', 'pending')
+
+    def __init__(self, precision: int):
+        self.bytes = 0
+        self.flows = 0
+        self.sources = HyperLogLog(precision)
+        self.destinations = HyperLogLog(precision)
+        self.moments: Optional[np.ndarray] = None  # see _moments
+        self.pairs = None  # summed (slots, bytes, flow counts), one entry per slot
+        self.pending: List[tuple] = []
+
+    def add(self, batch: pd.DataFrame, moments: np.ndarray, pairs: tuple):
+        self.bytes += int(batch['bytes'].sum())
+        self.flows += len(batch)
+        self.sources.add(batch['source_ip'].to_numpy())
+        self.destinations.add(batch['dest_ip'].to_numpy())
+        self.moments = _merge_moments(self.moments, moments)
+        self.pending.append(pairs)
+        if sum(len(part[0]) for part in self.pending) >= COMPACT_ROWS:
+            self.compact()
+
+    def compact(self):
+        """Fold pending pair parts into the window's summed pairs"""
+        if not self.pending:
+            return
+        parts = self.pending + ([self.pairs] if self.pairs is not None else [])
+        slots, weights, counts = (np.concatenate(column) for column in zip(*parts))
+        codes, unique = pd.factorize(slots)
+        self.pairs = (unique, np.bincount(codes, weights, len(unique)),
+                      np.bincount(codes, counts, len(unique)).astype(np.int64))
+        self.pending = []
+
+
+def _pair_matrices(parts: List[tuple], size: int, layout: str = 'csr'):
+    """
+    Summed bytes and flow count matrices from coordinate parts. Built from
+    concatenated coordinates rather than by adding matrices: sparse addition
+    drops explicit zeros, and with them the edges of zero-byte flows that
+    TrafficPatternAnalyzer's flow matrix keeps. Both matrices share one
+    sparsity pattern.
+    """
+    from scipy import sparse
+
+    rows, cols, weights, counts = (np.concatenate(column) for column in zip(*parts))
+    adjacency = sparse.coo_matrix((weights, (rows, cols)), shape=(size, size))
+    flow_counts = sparse.coo_matrix((counts, (rows, cols)), shape=(size, size))
+    adjacency.sum_duplicates()
+    flow_counts.sum_duplicates()
+    if layout == 'csr':
+        return adjacency.tocsr(), flow_counts.tocsr()
+    return adjacency, flow_counts
+
+
+class StreamingTrafficAnalyzer:
+    """
+    Incremental counterpart of TrafficPatternAnalyzer.analyze_traffic.
+
+    Micro-batches are folded into per-window aggregates: bytes, flow
+    counts, HyperLogLog sketches of source and destination addresses,
+    per-protocol moments, and the address pairs the window added. Running
+    totals of the pairs and moments over all retained windows are updated
+    as batches are folded and have an evicted window's share subtracted,
+    so folding a batch costs O(batch) however many windows are kept. Only
+    the last max_windows windows are kept. Results have the same
+    structure as analyze_traffic(); the sections that need raw rows
+    (anomalies, risk, unusual protocol combinations) are computed on the
+    newest batch.
+    """
+
+    def __init__(self, window_size: str = '1h', max_windows: int = DEFAULT_MAX_WINDOWS,
+                 analyzer: TrafficPatternAnalyzer = None, precision: int = HLL_PRECISION):
+        self.window_size = window_size
+        self.offset = pd.tseries.frequencies.to_offset(window_size)
+        self.max_windows = max_windows
+        self.analyzer = analyzer or TrafficPatternAnalyzer()
+        self.precision = precision
+        self.windows: Dict[pd.Timestamp, _Window] = {}
+        self.addresses = _AddressTable()
+        self.pairs = _PairTotals(self.addresses)
+        self.protocols: Dict = {}  # protocol label to moments row
+        self.moments: Optional[np.ndarray] = None
+        self.rows = 0
+
+    def fold(self, batch: pd.DataFrame):
+        """Add a micro-batch of flows to the window aggregates"""
+        if batch.empty:
+            return
+        starts = batch.index.floor(self.window_size)
+        if self.windows:
+            oldest = max(self.windows) - self.offset * (self.max_windows - 1)
+            late = starts < oldest
+            if late.any():
+                # Rows for windows that were already evicted are dropped
+                batch, starts = batch[~late], starts[~late]
+        sources = self.addresses.lookup(batch['source_ip'].to_numpy())
+        destinations = self.addresses.lookup(batch['dest_ip'].to_numpy())
+        weights = batch['bytes'].to_numpy(dtype=np.float64)
+        protocols = self._protocol_ids(batch['protocol'])
+        codes, window_starts = pd.factorize(starts)
+        for code, start in enumerate(window_starts):
+            rows = codes == code
+            window = self.windows.get(start)
+            if window is None:
+                window = self.windows[start] = _Window(self.precision)
+            moments = _moments(protocols[rows], len(self.protocols), batch[rows])
+            self.moments = _merge_moments(self.moments, moments)
+            window.add(batch[rows], moments,
+                       self.pairs.add(sources[rows], destinations[rows], weights[rows]))
+        self.rows += len(batch)
+        self._evict()
+
+    def _protocol_ids(self, values: pd.Series) -> np.ndarray:
+        codes, labels = pd.factorize(values, use_na_sentinel=False)
+        ids = [self.protocols.setdefault(label, len(self.protocols)) for label in labels.tolist()]
+        return np.asarray(ids, dtype=np.int64)[codes]
+
+    def _evict(self):
+        newest = max(self.windows)
+        oldest = newest - self.offset * (self.max_windows - 1)
+        for start in [start for start in self.windows if start < oldest]:
+            window = self.windows.pop(start)
+            window.compact()
+            if window.pairs is not None:
+                self.pairs.remove(*window.pairs)
+            if window.moments is not None:
+                self.moments = _subtract_moments(self.moments, window.moments)
+
+    def update(self, batch: pd.DataFrame) -> Dict:
+        """Fold batch and return analyze_traffic()-shaped results"""
+        self.fold(batch)
+        return self.results(batch)
+
+    def window_frame(self) -> pd.DataFrame:
+        """Retained windows as analyze_traffic's resampled frame, gaps filled with 0"""
+        columns = ['bytes', 'packets', 'source_ip', 'dest_ip']
+        if not self.windows:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='timestamp'))
+        starts = sorted(self.windows)
+        frame = pd.DataFrame(
+            [(w.bytes, w.flows, round(w.sources.count()), round(w.destinations.count()))
+             for w in (self.windows[start] for start in starts)],
+            columns=columns, index=pd.DatetimeIndex(starts, name='timestamp'))
+        full = pd.date_range(starts[0], starts[-1], freq=self.offset, name='timestamp')
+        return frame.reindex(full, fill_value=0)
+
+    def distinct_addresses(self) -> Dict[str, float]:
+        """HyperLogLog estimates of distinct sources and destinations over all windows"""
+        sources, destinations = HyperLogLog(self.precision), HyperLogLog(self.precision)
+        for window in self.windows.values():
+            sources.merge(window.sources)
+            destinations.merge(window.destinations)
+        return {'source_ip': sources.count(), 'dest_ip': destinations.count()}
+
+    def flow_matrix(self):
+        """Summed (bytes, flow counts, addresses) over retained windows, unused addresses dropped"""
+        live = self.pairs.live()
+        used = self.addresses.used()
+        if not len(live):
+            from scipy import sparse
+
+            return (sparse.csr_matrix((0, 0)), sparse.csr_matrix((0, 0), dtype=np.int64),
+                    np.asarray([]))
+        position = np.full(len(self.addresses.values), -1, dtype=np.int64)
+        position[used] = np.arange(len(used))
+        part = (position[self.pairs.sources[live]], position[self.pairs.destinations[live]],
+                self.pairs.bytes[live], self.pairs.flows[live])
+        adjacency, counts = _pair_matrices([part], len(used))
+        values = self.addresses.values
+        return adjacency, counts, np.asarray([values[i] for i in used.tolist()])
+
+    def protocol_statistics(self):
+        """analyze_traffic's per-protocol statistics frame and counts from the running moments"""
+        if self.moments is None or not self.moments[:, 0].any():
+            return pd.DataFrame(), pd.Series(dtype=np.int64)
+        present = np.flatnonzero(self.moments[:, 0])
+        labels = np.array(list(self.protocols), dtype=object)[present]
+        moments = pd.DataFrame(self.moments[present], columns=MOMENT_COLUMNS,
+                               index=pd.Index(labels, name='protocol'))
+        n = moments['n']
+        stats = pd.DataFrame({
+            ('bytes', 'sum'): moments['bytes_mean'] * n,
+            ('bytes', 'mean'): moments['bytes_mean'],
+            ('bytes', 'std'): np.sqrt(moments['bytes_m2'] / (n - 1)).where(n > 1),
+            ('packets', 'count'): n.astype(np.int64),
+            ('packets', 'mean'): moments['packets_mean'],
+            ('packets', 'std'): np.sqrt(moments['packets_m2'] / (n - 1)).where(n > 1)
+        })
+        stats.index.name = 'protocol'
+        return stats, n.astype(np.int64).rename('count')
+
+    def results(self, batch: pd.DataFrame = None) -> Dict:
+        """
+        analyze_traffic()-shaped results from the retained windows; batch
+        (default: none, giving empty row-level sections) feeds the
+        row-level detectors
+        """
+        analyzer = self.analyzer
+        if batch is None:
+            batch = pd.DataFrame(columns=['source_ip', 'dest_ip', 'protocol', 'bytes', 'packets'],
+                                 index=pd.DatetimeIndex([], name='timestamp'))
+        cube = analyzer._plan(batch, self.window_size)
+        statistics, counts = self.protocol_statistics()
+        results = {
+            'temporal_patterns': analyzer._temporal_from_windows(self.window_frame()),
+            'spatial_patterns': analyzer._spatial_from_matrix(*self.flow_matrix()),
+            'protocol_analysis': analyzer._protocol_from_statistics(statistics, counts, cube),
+            'anomalies': analyzer._detect_anomalies(cube)
+        }
+        results['risk_assessment'] = analyzer._assess_traffic_risk(cube, results)
+        results['correlated_findings'] = analyzer._correlate_findings(results)
+        return results
+
+
+def main(log_files, window_size='1h', max_windows=DEFAULT_MAX_WINDOWS):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'log_analysis'))
+    from extract_traffic import iter_traffic_frames
+
+    stream = StreamingTrafficAnalyzer(window_size, max_windows)
+    for log_file in log_files:
+        for frame in iter_traffic_frames(log_file):
+            stream.fold(frame)
+    frame = stream.window_frame()
+    distinct = stream.distinct_addresses()
+    print(f"{stream.rows} flows in {len(frame)} windows of {window_size}")
+    print(f"Distinct sources ~{distinct['source_ip']:,.0f}, "
+          f"destinations ~{distinct['dest_ip']:,.0f}")
+    print(frame.to_string())
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Fold traffic logs into windowed aggregates")
+    parser.add_argument('log_files', nargs='+')
+    parser.add_argument('--window', default='1h', help="window size, e.g. 5min or 1h (default: 1h)")
+    parser.add_argument('--max-windows', type=int, default=DEFAULT_MAX_WINDOWS,
+                        help="windows kept (default: two weeks of hours)")
+    args = parser.parse_args(argv)
+
+    main(args.log_files, args.window, args.max_windows)
+
+if __name__ == '__main__':
+    cli()
@@ -1,12 +1,15 @@
+import os
+import time
 from typing import Dict, List, Tuple
 import pandas as pd
 import numpy as np
-from scipy import signal, stats
-from statsmodels.tsa.seasonal import seasonal_decompose
 from datetime import datetime, timedelta
-import networkx as nx
 from dataclasses import dataclass
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# scipy, statsmodels and networkx are imported inside the methods that use
+# them so that importing this module stays cheap for lightweight callers
 
 @dataclass
 class TrafficPattern:
@@ -22,7 +25,59 @@ class TrafficPattern:
     average_packet_size: float
     risk_score: float
 
+@dataclass
+class TrafficCube:
+    """
+    Flows grouped once by (window, source, destination, protocol). Each
+    cell array holds one value per occupied cell; source and destination
+    index addresses, protocol indexes protocols and window indexes windows.
+    The m2 arrays are sums of squared deviations from the protocol's mean,
+    so protocol variances need no second pass over the rows.
+    """
+    windows: pd.DatetimeIndex
+    addresses: np.ndarray
+    protocols: np.ndarray
+    window: np.ndarray
+    source: np.ndarray
+    destination: np.ndarray
+    protocol: np.ndarray
+    flows: np.ndarray
+    bytes: np.ndarray
+    packets: np.ndarray
+    bytes_m2: np.ndarray
+    packets_m2: np.ndarray
+    timeline: pd.DataFrame  # per-window bytes, flows and distinct addresses
+    data: pd.DataFrame  # the rows, for per-series keys outside the cube
+    row_windows: np.ndarray  # window of each row
+
 class TrafficPatternAnalyzer:
+    # Flow graphs up to this many addresses use networkx community detection
+    SMALL_GRAPH_NODES = 1000
+    TOP_FLOWS = 10
+    MAX_HOTSPOTS = 20
+    # Per-series temporal analysis runs for each of these columns present
+    SERIES_KEYS = ('source_ip', 'source_zone', 'application')
+    # Trailing windows a burst is compared against
+    BURST_WINDOW = 24
+    MAX_ANOMALIES = 50
+    # Sources spreading flows over at least this many destinations are
+    # checked for scanning
+    SCAN_MIN_DESTINATIONS = 20
+    # Protocols used by fewer than this share of sources are unusual
+    RARE_PROTOCOL_SHARE = 0.01
+    RISKY_PROTOCOLS = {
+        'telnet': "cleartext remote logins",
+        'ftp': "cleartext file transfers",
+        'rdp': "remote desktop sessions"
+    }
+    RISK_WEIGHTS = {
+        'volume_spike': 15,
+        'scanning': 30,
+        'protocol_spike': 10,
+        'risky_protocol': 20,
+        'rare_protocol': 10
+    }
+
     def __init__(self):
         self.patterns = {}
         self.baseline_metrics = defaultdict(list)
@@ -32,130 +87,464 @@ def __init__(self):
             'burst_factor': 3.0  # Sudden traffic increase factor
         }
         
-    def analyze_traffic(self, traffic_data: pd.DataFrame, window_size: str = '1H') -> Dict:
+    def analyze_traffic(self, traffic_data: pd.DataFrame, window_size: str = '1h',
+                        workers: int = None) -> Dict:
         """
-        Comprehensive traffic analysis with multiple detection methods
+        Comprehensive traffic analysis with multiple detection methods.
+
+        The rows are grouped once into a TrafficCube, which every section
+        reads. The sections are independent and run on a thread pool of
+        `workers` threads (default: one per section, up to the CPU count;
+        1 runs them in turn). The risk assessment then scores their
+        anomaly and protocol findings. Seconds spent planning, in each
+        section and in total (wall clock) are under 'timings'.
         """
-        results = {
-            'temporal_patterns': self._analyze_temporal_patterns(traffic_data, window_size),
-            'spatial_patterns': self._analyze_spatial_patterns(traffic_data),
-            'protocol_analysis': self._analyze_protocol_distribution(traffic_data),
-            'anomalies': self._detect_anomalies(traffic_data),
-            'risk_assessment': self._assess_traffic_risk(traffic_data)
+        analysis_started = time.perf_counter()
+        cube = self._plan(traffic_data, window_size)
+        timings = {'plan': time.perf_counter() - analysis_started}
+
+        sections = {
+            'temporal_patterns': self._analyze_temporal_patterns,
+            'spatial_patterns': self._analyze_spatial_patterns,
+            'protocol_analysis': self._analyze_protocol_distribution,
+            'anomalies': self._detect_anomalies
         }
+        workers = workers or min(len(sections), os.cpu_count() or 1)
+        results = {}
+        if workers == 1:
+            for name, section in sections.items():
+                results[name], timings[name] = _timed(section, cube)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {name: pool.submit(_timed, section, cube)
+                           for name, section in sections.items()}
+                for name, future in futures.items():
+                    results[name], timings[name] = future.result()
+        results['risk_assessment'], timings['risk_assessment'] = _timed(
+            self._assess_traffic_risk, cube, results)
         
         # Correlate findings across different analyses
+        started = time.perf_counter()
         results['correlated_findings'] = self._correlate_findings(results)
+        timings['correlated_findings'] = time.perf_counter() - started
+        timings['total'] = time.perf_counter() - analysis_started
+        results['timings'] = timings
         return results
 
-    def _analyze_temporal_patterns(self, data: pd.DataFrame, window_size: str) -> Dict:
+    def _plan(self, data: pd.DataFrame, window_size: str) -> TrafficCube:
+        """
+        Group the rows once by window, source, destination and protocol.
+        Each dimension is factorized to integer codes, the codes are packed
+        into one key and the key is factorized again, giving a cell id per
+        row; the cell aggregates are then plain bincounts.
+        """
+        n = len(data)
+        starts = data.index.floor(window_size)
+        if n:
+            windows = pd.date_range(starts.min(), starts.max(), freq=window_size,
+                                    name=data.index.name)
+        else:
+            windows = pd.DatetimeIndex([], name=data.index.name)
+        row_windows = windows.get_indexer(starts)
+        codes, addresses = pd.factorize(pd.concat([data['source_ip'], data['dest_ip']],
+                                                  ignore_index=True), use_na_sentinel=False)
+        sources, destinations = codes[:n], codes[n:]
+        protocol_codes, protocols = pd.factorize(data['protocol'], use_na_sentinel=False)
+        pairs = sources.astype(np.int64) * len(addresses) + destinations
+        if len(addresses) ** 2 * max(len(windows), 1) * max(len(protocols), 1) >= 2 ** 62:
+            # The packed key would overflow; renumber the pairs densely first
+            pairs, _ = pd.factorize(pairs)
+        cells, _ = pd.factorize((pairs * max(len(windows), 1) + row_windows)
+                                * max(len(protocols), 1) + protocol_codes)
+        # Factorize numbers cells in order of first appearance, so a row
+        # opens a new cell exactly when its id exceeds all earlier ones
+        first = np.flatnonzero(np.r_[True, cells[1:] > np.maximum.accumulate(cells)[:-1]]
+                               if n else np.zeros(0, dtype=bool))
+        count = len(first)
+
+        byte_values = data['bytes'].to_numpy(dtype=np.float64)
+        packet_values = data['packets'].to_numpy(dtype=np.float64)
+        per_protocol = np.maximum(np.bincount(protocol_codes, minlength=len(protocols)), 1)
+        byte_deviation = byte_values - (np.bincount(protocol_codes, byte_values, len(protocols))
+                                        / per_protocol)[protocol_codes]
+        packet_deviation = packet_values - (np.bincount(protocol_codes, packet_values,
+                                                        len(protocols)) / per_protocol)[protocol_codes]
+
+        cube = TrafficCube(
+            windows=windows, addresses=np.asarray(addresses), protocols=np.asarray(protocols),
+            window=row_windows[first], source=sources[first], destination=destinations[first],
+            protocol=protocol_codes[first],
+            flows=np.bincount(cells, minlength=count),
+            bytes=np.bincount(cells, byte_values, count),
+            packets=np.bincount(cells, packet_values, count),
+            bytes_m2=np.bincount(cells, byte_deviation ** 2, count),
+            packets_m2=np.bincount(cells, packet_deviation ** 2, count),
+            timeline=None, data=data, row_windows=row_windows)
+        cube.timeline = self._timeline(cube)
+        return cube
+
+    @staticmethod
+    def _timeline(cube: TrafficCube) -> pd.DataFrame:
+        """Per-window totals in the layout of data.resample(window).agg(...)"""
+        size = len(cube.windows)
+
+        def distinct(addresses):
+            # Distinct (window, address) pairs, counted per window
+            pairs = pd.unique(cube.window.astype(np.int64) * len(cube.addresses) + addresses)
+            return np.bincount(pairs // len(cube.addresses), minlength=size)
+
+        return pd.DataFrame({
+            'bytes': np.bincount(cube.window, cube.bytes, size).astype(np.int64),
+            'packets': np.bincount(cube.window, cube.flows, size).astype(np.int64),
+            'source_ip': distinct(cube.source),
+            'dest_ip': distinct(cube.destination)
+        }, index=cube.windows)
+
+    def _analyze_temporal_patterns(self, cube: TrafficCube) -> Dict:
         """Analyze temporal aspects of traffic patterns"""
-        # Resample data to regular intervals
-        resampled = data.resample(window_size).agg({
-            'bytes': 'sum',
-            'packets': 'count',
-            'source_ip': 'nunique',
-            'dest_ip': 'nunique'
-        })
-        
-        # Perform seasonal decomposition
-        decomposition = seasonal_decompose(
-            resampled['bytes'],
-            period=self._detect_seasonality(resampled['bytes'])
-        )
+        return self._temporal_from_windows(cube.timeline, self._analyze_series(cube))
+
+    def _temporal_from_windows(self, resampled: pd.DataFrame, series: Dict = None) -> Dict:
+        """
+        Temporal patterns from per-window bytes, flow counts and distinct
+        addresses, however those were aggregated, plus any per-series results
+        """
+        from statsmodels.tsa.seasonal import seasonal_decompose
+
+        # Perform seasonal decomposition; it needs two full periods
+        period = self._detect_seasonality(resampled['bytes'])
+        trend, seasonal = {}, {}
+        if len(resampled) >= 2 * period:
+            decomposition = seasonal_decompose(resampled['bytes'], period=period)
+            trend, seasonal = decomposition.trend.to_dict(), decomposition.seasonal.to_dict()
         
-        # Detect bursts using wavelet transform
         bursts = self._detect_traffic_bursts(resampled['bytes'])
         
         return {
-            'trend': decomposition.trend.to_dict(),
-            'seasonal': decomposition.seasonal.to_dict(),
+            'trend': trend,
+            'seasonal': seasonal,
             'bursts': bursts,
+            'series': series or {},
             'daily_patterns': self._extract_daily_patterns(resampled),
             'weekly_patterns': self._extract_weekly_patterns(resampled)
         }
 
-    def _analyze_spatial_patterns(self, data: pd.DataFrame) -> Dict:
+    def _analyze_spatial_patterns(self, cube: TrafficCube) -> Dict:
         """Analyze spatial distribution of traffic"""
-        # Create traffic flow graph
-        flow_graph = nx.DiGraph()
-        
-        # Aggregate flows between IP pairs
-        flows = data.groupby(['source_ip', 'dest_ip']).agg({
-            'bytes': 'sum',
-            'packets': 'count'
-        }).reset_index()
-        
-        # Add nodes and edges to graph
-        for _, flow in flows.iterrows():
-            flow_graph.add_edge(
-                flow['source_ip'],
-                flow['dest_ip'],
-                weight=flow['bytes'],
-                packets=flow['packets']
-            )
-        
-        # Calculate network metrics
+        return self._spatial_from_matrix(*self._build_flow_matrix(cube))
+
+    def _spatial_from_matrix(self, adjacency, flow_counts, addresses: np.ndarray) -> Dict:
         return {
-            'centrality': nx.degree_centrality(flow_graph),
-            'communities': self._detect_communities(flow_graph),
-            'flow_patterns': self._analyze_flow_patterns(flow_graph),
-            'hotspots': self._identify_traffic_hotspots(flow_graph)
+            'centrality': self._degree_centrality(adjacency, addresses),
+            'communities': self._detect_communities(adjacency, addresses),
+            'flow_patterns': self._analyze_flow_patterns(adjacency, flow_counts, addresses),
+            'hotspots': self._identify_traffic_hotspots(adjacency, addresses)
         }
 
-    def _detect_communities(self, graph: nx.DiGraph) -> Dict:
-        """Detect communities in traffic flow"""
-        communities = nx.community.greedy_modularity_communities(graph.to_undirected())
+    @staticmethod
+    def _build_flow_matrix(cube: TrafficCube):
+        """
+        Sparse flow graph over the cube's address codes: the cells'
+        (source, destination) pairs become a CSR matrix of summed bytes plus
+        one of flow counts. Cells of the same pair in other windows or
+        protocols are summed by the constructor.
+        """
+        from scipy import sparse
+
+        pairs = (cube.source, cube.destination)
+        shape = (len(cube.addresses), len(cube.addresses))
+        adjacency = sparse.csr_matrix((cube.bytes, pairs), shape=shape)
+        flow_counts = sparse.csr_matrix((cube.flows, pairs), shape=shape)
+        return adjacency, flow_counts, cube.addresses
+
+    @staticmethod
+    def _degree_centrality(adjacency, addresses: np.ndarray) -> Dict:
+        """In plus out degree over n - 1, as nx.degree_centrality on a DiGraph"""
+        n = adjacency.shape[0]
+        if n < 2:
+            return {address: 1.0 for address in addresses.tolist()}
+        degree = np.diff(adjacency.indptr) + np.bincount(adjacency.indices, minlength=n)
+        return dict(zip(addresses.tolist(), (degree / (n - 1)).tolist()))
+
+    def _detect_communities(self, adjacency, addresses: np.ndarray) -> Dict:
+        """
+        Detect communities in traffic flow. Small graphs use networkx greedy
+        modularity; larger ones use label propagation over the sparse matrix.
+        """
+        if adjacency.shape[0] <= self.SMALL_GRAPH_NODES:
+            import networkx as nx
+
+            graph = nx.from_scipy_sparse_array(adjacency + adjacency.T)
+            communities = [sorted(community) for community in
+                           nx.community.greedy_modularity_communities(graph)]
+        else:
+            labels = _label_propagation(adjacency)
+            order = np.argsort(labels, kind='stable')
+            boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+            communities = sorted(np.split(order, boundaries), key=len, reverse=True)
         return {
-            f'community_{i}': list(community)
+            f'community_{i}': addresses[np.asarray(community, dtype=np.int64)].tolist()
             for i, community in enumerate(communities)
         }
 
-    def _analyze_protocol_distribution(self, data: pd.DataFrame) -> Dict:
+    def _analyze_flow_patterns(self, adjacency, flow_counts, addresses: np.ndarray) -> Dict:
+        """Graph-level shape of the traffic and its heaviest flows"""
+        n, edges = adjacency.shape[0], adjacency.nnz
+        if not edges:
+            return {'nodes': n, 'edges': 0, 'density': 0.0, 'reciprocity': 0.0, 'top_flows': []}
+        linked = adjacency.astype(bool)
+        coo = adjacency.tocoo()
+        top = np.argsort(coo.data)[::-1][:self.TOP_FLOWS]
+        counts = np.asarray(flow_counts[coo.row[top], coo.col[top]]).ravel()
+        fan_out = np.diff(adjacency.indptr)
+        fan_in = np.bincount(adjacency.indices, minlength=n)
+        # Plain Python values whether addresses are packed ints or strings
+        names = addresses.tolist()
+        return {
+            'nodes': n,
+            'edges': edges,
+            'density': edges / (n * (n - 1)) if n > 1 else 0.0,
+            # Share of address pairs that talk in both directions
+            'reciprocity': linked.multiply(linked.T).nnz / edges,
+            'top_flows': [
+                {'source': names[s], 'destination': names[d],
+                 'bytes': float(b), 'flows': int(c)}
+                for s, d, b, c in zip(coo.row[top], coo.col[top], coo.data[top], counts)
+            ],
+            'max_fan_out': {'ip': names[fan_out.argmax()],
+                            'destinations': int(fan_out.max())},
+            'max_fan_in': {'ip': names[fan_in.argmax()],
+                           'sources': int(fan_in.max())}
+        }
+
+    def _identify_traffic_hotspots(self, adjacency, addresses: np.ndarray) -> List[Dict]:
+        """
+        Addresses whose total (sent plus received) bytes lie more than the
+        volume threshold in standard deviations above the mean
+        """
+        if not adjacency.nnz:
+            return []
+        sent = np.asarray(adjacency.sum(axis=1)).ravel()
+        received = np.asarray(adjacency.sum(axis=0)).ravel()
+        total = sent + received
+        std = total.std()
+        if not std:
+            return []
+        scores = (total - total.mean()) / std
+        hot = np.flatnonzero(scores > self.anomaly_thresholds['volume'])
+        hot = hot[np.argsort(total[hot])[::-1][:self.MAX_HOTSPOTS]]
+        degree = np.diff(adjacency.indptr) + np.bincount(adjacency.indices,
+                                                         minlength=adjacency.shape[0])
+        names = addresses.tolist()
+        return [
+            {'ip': names[i], 'bytes_sent': float(sent[i]),
+             'bytes_received': float(received[i]), 'peers': int(degree[i]),
+             'z_score': float(scores[i])}
+            for i in hot
+        ]
+
+    def _analyze_protocol_distribution(self, cube: TrafficCube) -> Dict:
         """Analyze protocol usage patterns"""
-        protocol_stats = data.groupby('protocol').agg({
-            'bytes': ['sum', 'mean', 'std'],
-            'packets': ['count', 'mean', 'std']
-        }).to_dict()
-        
+        protocol_stats, protocol_counts = self._protocol_table(cube)
+        return self._protocol_from_statistics(protocol_stats, protocol_counts, cube)
+
+    @staticmethod
+    def _protocol_table(cube: TrafficCube) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        The frame data.groupby('protocol').agg({'bytes': ['sum', 'mean',
+        'std'], 'packets': ['count', 'mean', 'std']}) gives, and the flow
+        count per protocol, from the cube's cells
+        """
+        size = len(cube.protocols)
+        n = np.bincount(cube.protocol, cube.flows, size)
+        byte_sum = np.bincount(cube.protocol, cube.bytes, size)
+        packet_sum = np.bincount(cube.protocol, cube.packets, size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            byte_std = np.sqrt(np.bincount(cube.protocol, cube.bytes_m2, size) / (n - 1))
+            packet_std = np.sqrt(np.bincount(cube.protocol, cube.packets_m2, size) / (n - 1))
+        index = pd.Index(cube.protocols, name='protocol')
+        stats = pd.DataFrame({
+            ('bytes', 'sum'): byte_sum,
+            ('bytes', 'mean'): byte_sum / n,
+            ('bytes', 'std'): np.where(n > 1, byte_std, np.nan),
+            ('packets', 'count'): n.astype(np.int64),
+            ('packets', 'mean'): packet_sum / n,
+            ('packets', 'std'): np.where(n > 1, packet_std, np.nan)
+        }, index=index)
+        return stats, pd.Series(n.astype(np.int64), index=index, name='count')
+
+    def _protocol_from_statistics(self, protocol_stats: pd.DataFrame, protocol_counts: pd.Series,
+                                  cube: TrafficCube) -> Dict:
+        from scipy import stats
+
         # Calculate protocol entropy
-        protocol_counts = data['protocol'].value_counts()
         protocol_entropy = stats.entropy(protocol_counts)
         
         return {
-            'statistics': protocol_stats,
+            'statistics': protocol_stats.to_dict(),
             'entropy': protocol_entropy,
-            'unusual_combinations': self._detect_unusual_protocol_combinations(data)
+            'unusual_combinations': self._detect_unusual_protocol_combinations(cube)
         }
 
-    def _detect_anomalies(self, data: pd.DataFrame) -> List[Dict]:
+    def _detect_unusual_protocol_combinations(self, cube: TrafficCube) -> List[Dict]:
+        """
+        Sources using a protocol that fewer than RARE_PROTOCOL_SHARE of all
+        sources use, heaviest first
+        """
+        if not len(cube.flows):
+            return []
+        # Flows and bytes per (source, protocol) pair
+        pairs, keys = pd.factorize(cube.source.astype(np.int64) * len(cube.protocols)
+                                   + cube.protocol)
+        flows = np.bincount(pairs, cube.flows)
+        volume = np.bincount(pairs, cube.bytes)
+        sources, protocols = keys // len(cube.protocols), keys % len(cube.protocols)
+        users = np.bincount(protocols, minlength=len(cube.protocols))
+        rare = users[protocols] < self.RARE_PROTOCOL_SHARE * len(np.unique(sources))
+        rare = np.flatnonzero(rare)
+        rare = rare[np.argsort(volume[rare])[::-1][:self.MAX_ANOMALIES]]
+        names = cube.addresses.tolist()
+        return [
+            {'ip': names[sources[i]], 'protocol': cube.protocols[protocols[i]],
+             'flows': int(flows[i]), 'bytes': float(volume[i]),
+             'sources_using_protocol': int(users[protocols[i]])}
+            for i in rare
+        ]
+
+    def _detect_anomalies(self, cube: TrafficCube) -> List[Dict]:
         """Detect various types of traffic anomalies"""
         anomalies = []
         
         # Volume-based anomalies
-        volume_anomalies = self._detect_volume_anomalies(data)
+        volume_anomalies = self._detect_volume_anomalies(cube)
         if volume_anomalies:
             anomalies.extend(volume_anomalies)
         
         # Pattern-based anomalies
-        pattern_anomalies = self._detect_pattern_anomalies(data)
+        pattern_anomalies = self._detect_pattern_anomalies(cube)
         if pattern_anomalies:
             anomalies.extend(pattern_anomalies)
         
         # Protocol anomalies
-        protocol_anomalies = self._detect_protocol_anomalies(data)
+        protocol_anomalies = self._detect_protocol_anomalies(cube)
         if protocol_anomalies:
             anomalies.extend(protocol_anomalies)
         
         return anomalies
 
-    def _assess_traffic_risk(self, data: pd.DataFrame) -> Dict:
-        """Assess risk levels in traffic patterns"""
+    def _detect_volume_anomalies(self, cube: TrafficCube) -> List[Dict]:
+        """Windows whose bytes lie more than the volume threshold in deviations above the mean"""
+        volume = cube.timeline['bytes'].to_numpy(dtype=np.float64)
+        scores = _z_scores(volume)
+        spikes = np.flatnonzero(scores > self.anomaly_thresholds['volume'])
+        spikes = spikes[np.argsort(scores[spikes])[::-1][:self.MAX_ANOMALIES]]
+        return [
+            {'type': 'volume_spike', 'window': cube.windows[i], 'bytes': float(volume[i]),
+             'z_score': float(scores[i])}
+            for i in spikes
+        ]
+
+    def _detect_pattern_anomalies(self, cube: TrafficCube) -> List[Dict]:
+        """
+        Scanning sources: fan-out to at least SCAN_MIN_DESTINATIONS
+        destinations, well above other sources, with flows spread evenly
+        over them (normalized destination entropy above the threshold)
+        """
+        if not len(cube.flows):
+            return []
+        pairs, keys = pd.factorize(cube.source.astype(np.int64) * len(cube.addresses)
+                                   + cube.destination)
+        flows = np.bincount(pairs, cube.flows)
+        sources = keys // len(cube.addresses)
+        fan_out = np.bincount(sources, minlength=len(cube.addresses)).astype(np.float64)
+        total = np.bincount(sources, flows, len(cube.addresses))
+        share = flows / total[sources]
+        entropy = -np.bincount(sources, share * np.log(share), len(cube.addresses))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            evenness = np.where(fan_out > 1, entropy / np.log(fan_out), 0.0)
+
+        active = np.flatnonzero(fan_out)
+        scores = np.zeros(len(fan_out))
+        scores[active] = _z_scores(fan_out[active])
+        scanning = np.flatnonzero((fan_out >= self.SCAN_MIN_DESTINATIONS)
+                                  & (scores > self.anomaly_thresholds['volume'])
+                                  & (evenness > self.anomaly_thresholds['entropy']))
+        scanning = scanning[np.argsort(fan_out[scanning])[::-1][:self.MAX_ANOMALIES]]
+        names = cube.addresses.tolist()
+        return [
+            {'type': 'scanning', 'ip': names[i], 'destinations': int(fan_out[i]),
+             'flows': int(total[i]), 'evenness': float(evenness[i]), 'z_score': float(scores[i])}
+            for i in scanning
+        ]
+
+    def _detect_protocol_anomalies(self, cube: TrafficCube) -> List[Dict]:
+        """Windows in which a protocol's flow count spikes against its own history"""
+        if not len(cube.flows):
+            return []
+        shape = (len(cube.protocols), len(cube.windows))
+        flows = _series_matrix(cube.protocol, cube.window, cube.flows, shape)
+        scores = _z_scores(flows, axis=1)
+        protocols, windows = np.nonzero(scores > self.anomaly_thresholds['volume'])
+        order = np.argsort(scores[protocols, windows])[::-1][:self.MAX_ANOMALIES]
+        return [
+            {'type': 'protocol_spike', 'protocol': cube.protocols[p], 'window': cube.windows[w],
+             'flows': int(flows[p, w]), 'z_score': float(scores[p, w])}
+            for p, w in zip(protocols[order], windows[order])
+        ]
+
+    def _assess_traffic_risk(self, cube: TrafficCube, results: Dict) -> Dict:
+        """Assess risk levels from the anomaly and protocol sections' findings"""
+        risk_factors = self._identify_risk_factors(
+            cube, results['anomalies'], results['protocol_analysis']['unusual_combinations'])
         return {
-            'overall_risk_score': self._calculate_risk_score(data),
-            'risk_factors': self._identify_risk_factors(data),
-            'recommendations': self._generate_risk_recommendations(data)
+            'overall_risk_score': self._calculate_risk_score(risk_factors),
+            'risk_factors': risk_factors,
+            'recommendations': self._generate_risk_recommendations(risk_factors)
+        }
+
+    def _identify_risk_factors(self, cube: TrafficCube, anomalies: List[Dict],
+                               unusual_combinations: List[Dict]) -> List[Dict]:
+        """Findings that raise the risk score, each with its RISK_WEIGHTS key"""
+        factors = []
+        found = Counter(anomaly['type'] for anomaly in anomalies)
+        for anomaly_type in ('volume_spike', 'scanning', 'protocol_spike'):
+            count = found[anomaly_type]
+            if count:
+                factors.append({'factor': anomaly_type, 'count': count,
+                                'detail': f"{count} {anomaly_type.replace('_', ' ')} finding(s)"})
+
+        total = cube.flows.sum()
+        if total:
+            flows = pd.Series(np.bincount(cube.protocol, cube.flows, len(cube.protocols)),
+                              index=cube.protocols)
+            for protocol, description in self.RISKY_PROTOCOLS.items():
+                if flows.get(protocol, 0):
+                    factors.append({'factor': 'risky_protocol', 'protocol': protocol,
+                                    'count': int(flows[protocol]),
+                                    'detail': f"{flows[protocol] / total:.1%} of flows are "
+                                              f"{protocol} ({description})"})
+
+        if unusual_combinations:
+            count = len(unusual_combinations)
+            factors.append({'factor': 'rare_protocol', 'count': count,
+                            'detail': f"{count} source(s) use protocols few others use"})
+        return factors
+
+    def _calculate_risk_score(self, risk_factors: List[Dict]) -> float:
+        """Sum of the factors' weights, capped at 100"""
+        return float(min(100, sum(self.RISK_WEIGHTS[factor['factor']]
+                                  for factor in risk_factors)))
+
+    def _generate_risk_recommendations(self, risk_factors: List[Dict]) -> List[str]:
+        recommendations = {
+            'volume_spike': "Review the spiking windows for exfiltration or DoS traffic",
+            'scanning': "Investigate scanning sources and block them at the zone boundary",
+            'protocol_spike': "Check what drove the protocol spikes against change records",
+            'risky_protocol': "Replace cleartext and remote desktop access with SSH or a VPN",
+            'rare_protocol': "Confirm that sources using rare protocols are authorized"
         }
+        seen = dict.fromkeys(factor['factor'] for factor in risk_factors)
+        return [recommendations[factor] for factor in seen]
 
     def _correlate_findings(self, results: Dict) -> List[Dict]:
         """Correlate findings across different analysis methods"""
@@ -179,15 +568,88 @@ def _correlate_findings(self, results: Dict) -> List[Dict]:
         
         return correlated_findings
 
+    def _correlate_temporal_spatial(self, temporal: Dict, spatial: Dict) -> List[Dict]:
+        """Traffic hotspots whose own bytes burst, with the windows they burst in"""
+        bursts = defaultdict(list)
+        for burst in temporal.get('series', {}).get('source_ip', {}).get('bursts', []):
+            bursts[burst['source_ip']].append(burst['start'])
+        return [
+            {'type': 'bursting_hotspot', 'ip': hotspot['ip'], 'z_score': hotspot['z_score'],
+             'burst_windows': bursts[hotspot['ip']]}
+            for hotspot in spatial['hotspots'] if hotspot['ip'] in bursts
+        ]
+
+    def _correlate_anomalies_protocols(self, anomalies: List[Dict],
+                                       protocol_analysis: Dict) -> List[Dict]:
+        """Anomalies involving protocols or sources that also show up as unusual combinations"""
+        unusual = protocol_analysis['unusual_combinations']
+        rare_protocols = {combination['protocol'] for combination in unusual}
+        rare_sources = defaultdict(list)
+        for combination in unusual:
+            rare_sources[combination['ip']].append(combination['protocol'])
+        findings = []
+        for anomaly in anomalies:
+            if anomaly['type'] == 'protocol_spike' and anomaly['protocol'] in rare_protocols:
+                findings.append({'type': 'rare_protocol_spike', 'protocol': anomaly['protocol'],
+                                 'window': anomaly['window'], 'z_score': anomaly['z_score']})
+            elif anomaly['type'] == 'scanning' and anomaly['ip'] in rare_sources:
+                findings.append({'type': 'scanner_using_rare_protocols', 'ip': anomaly['ip'],
+                                 'protocols': rare_sources[anomaly['ip']],
+                                 'destinations': anomaly['destinations']})
+        return findings
+
     def _detect_seasonality(self, series: pd.Series) -> int:
-        """Detect the dominant seasonality period"""
-        # Implementation using FFT or autocorrelation
-        return 24  # Default to daily seasonality
+        """Detect the dominant seasonality period, defaulting to daily"""
+        period = _seasonal_periods(series.to_numpy(dtype=np.float64)[np.newaxis])[0]
+        return int(period) or 24
 
     def _detect_traffic_bursts(self, series: pd.Series) -> List[Dict]:
         """Detect sudden traffic bursts"""
-        # Implementation using wavelet transform or rolling statistics
-        return []
+        runs = _burst_runs(series.to_numpy(dtype=np.float64)[np.newaxis], self.BURST_WINDOW,
+                           self.anomaly_thresholds['burst_factor'],
+                           self.anomaly_thresholds['volume'])
+        return [self._burst(series.index, run) for run in runs]
+
+    @staticmethod
+    def _burst(windows: pd.Index, run: Tuple) -> Dict:
+        _, start, end, peak, baseline = run
+        return {'start': windows[start], 'end': windows[end], 'peak_bytes': peak,
+                'baseline_bytes': baseline,
+                'factor': peak / baseline if baseline else float('inf')}
+
+    def _analyze_series(self, cube: TrafficCube) -> Dict:
+        """
+        Seasonality and bursts of the per-window bytes of every source
+        address, zone and application (whichever columns the data has).
+        Each key's series are stacked into one matrix, so there is no
+        per-series loop. Source series come from the cube.
+        """
+        results = {}
+        for key in self.SERIES_KEYS:
+            if key not in cube.data.columns or cube.data.empty:
+                continue
+            if key == 'source_ip':
+                rows, sources = pd.factorize(cube.source)
+                labels, columns, weights = cube.addresses[sources], cube.window, cube.bytes
+            else:
+                rows, labels = pd.factorize(cube.data[key])
+                columns = cube.row_windows
+                weights = cube.data['bytes'].to_numpy(dtype=np.float64)
+            labels = np.asarray(labels)
+            matrix = _series_matrix(rows, columns, weights, (len(labels), len(cube.windows)))
+            windows = cube.windows
+            names = labels.tolist()
+            periods = _seasonal_periods(matrix)
+            seasonal = np.flatnonzero(periods)
+            runs = _burst_runs(matrix, self.BURST_WINDOW, self.anomaly_thresholds['burst_factor'],
+                               self.anomaly_thresholds['volume'])
+            results[key] = {
+                'series': len(labels),
+                'seasonality': dict(zip(labels[seasonal].tolist(), periods[seasonal].tolist())),
+                'bursts': [dict(self._burst(windows, run), **{key: names[run[0]]})
+                           for run in runs]
+            }
+        return results
 
     def _extract_daily_patterns(self, data: pd.DataFrame) -> Dict:
         """Extract daily traffic patterns"""
@@ -195,4 +657,181 @@ def _extract_daily_patterns(self, data: pd.DataFrame) -> Dict:
 
     def _extract_weekly_patterns(self, data: pd.DataFrame) -> Dict:
         """Extract weekly traffic patterns"""
-        return {} 
\ No newline at end of file
+        return {} 
+
+
+def _label_propagation(adjacency, max_iterations: int = 50, tolerance: float = 1e-4,
+                       seed: int = 0) -> np.ndarray:
+    """
+    Community label per node of a sparse (directed) weight matrix, treated
+    as undirected. Each round, every node's strongest neighbouring label is
+    found by summing edge weights into a sparse (node, label) matrix; a
+    random half of the nodes adopt it, which stops two-coloured
+    neighbourhoods from swapping labels forever. Ties keep the current label, then pick the
+    smallest one. Only nodes next to a change are revisited, and the loop
+    stops once at most `tolerance` of the nodes still want to change.
+    """
+    from scipy import sparse
+
+    n = adjacency.shape[0]
+    edges = (adjacency + adjacency.T).tocoo()
+    keep = edges.row != edges.col
+    rows, cols, weights = edges.row[keep].astype(np.int64), edges.col[keep], edges.data[keep]
+    labels = np.arange(n, dtype=np.int64)
+    if not len(rows):
+        return labels
+    rng = np.random.default_rng(seed)
+    active = np.ones(n, dtype=bool)
+    for _ in range(max_iterations):
+        # Weight per (node, neighbouring label) for the nodes whose
+        # neighbourhood changed; building the CSR matrix sums duplicates and
+        # sorts labels within each row, with no global sort
+        selected = active[rows]
+        votes = sparse.csr_matrix((weights[selected], (rows[selected], labels[cols[selected]])),
+                                  shape=(n, n))
+        votes.sum_duplicates()
+        per_row = np.diff(votes.indptr)
+        key_rows = np.repeat(np.arange(n), per_row)
+        key_labels, totals = votes.indices, votes.data
+        starts = votes.indptr[:-1][per_row > 0]
+        strongest = np.maximum.reduceat(totals, starts)
+        is_max = totals == np.repeat(strongest, per_row[per_row > 0])
+        candidates = np.flatnonzero(is_max)
+        first = candidates[np.r_[True, key_rows[candidates][1:] != key_rows[candidates][:-1]]]
+        best = labels.copy()
+        best[key_rows[first]] = key_labels[first]
+        keeps = key_rows[is_max & (key_labels == labels[key_rows])]
+        best[keeps] = labels[keeps]
+        wanting = best != labels
+        if wanting.sum() <= tolerance * n:
+            break
+        update = wanting & (rng.random(n) < 0.5)
+        labels[update] = best[update]
+        # Next round only revisits neighbours of changed nodes and the nodes
+        # that wanted to change but were not picked
+        active = wanting & ~update
+        active[rows[update[cols]]] = True
+    return labels
+
+
+# Series are processed in blocks of this many rows to bound FFT memory
+SERIES_BLOCK = 4096
+# Autocorrelation a detected period must reach
+MIN_SEASONAL_ACF = 0.3
+
+
+def _timed(section, cube: TrafficCube, *args):
+    started = time.perf_counter()
+    return section(cube, *args), time.perf_counter() - started
+
+
+def _z_scores(values: np.ndarray, axis: int = None) -> np.ndarray:
+    """Standard scores along axis; zero where the values do not vary"""
+    if not values.size:
+        return np.zeros(values.shape)
+    mean = values.mean(axis=axis, keepdims=True)
+    std = values.std(axis=axis, keepdims=True)
+    return np.divide(values - mean, std, out=np.zeros(values.shape), where=std > 0)
+
+
+def _series_matrix(rows: np.ndarray, columns: np.ndarray, weights: np.ndarray,
+                   shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Summed weights per (row, column) as a dense 2-D array, e.g. bytes per
+    (key value, window). Negative rows (missing key values) are left out.
+    """
+    keyed = rows >= 0
+    matrix = np.bincount(rows[keyed].astype(np.int64) * shape[1] + columns[keyed],
+                         weights=weights[keyed], minlength=shape[0] * shape[1])
+    return matrix.reshape(shape)
+
+
+def _seasonal_periods(matrix: np.ndarray) -> np.ndarray:
+    """
+    Dominant period of every row of matrix, 0 where there is none. One
+    batched FFT of the zero-padded, mean-removed rows gives each row's
+    periodogram; its inverse gives the autocorrelation (Wiener-Khinchin).
+    The periodogram peak picks a candidate range of periods and the lag
+    in that range with the highest mean autocorrelation over its first
+    few multiples refines it, so bin resolution and noise at a single lag
+    do not skew the period. Periods run from 2 to half the series length,
+    and the autocorrelation at the period must reach MIN_SEASONAL_ACF.
+    """
+    from scipy import fft
+
+    count, length = matrix.shape
+    periods = np.zeros(count, dtype=np.int64)
+    if length < 4:
+        return periods
+    padded = 2 * length
+    lags = np.arange(length // 2 + 1)
+    max_lag = lags[-1]
+    # Periodogram bins of the padded transform: bin j is period padded / j,
+    # so periods up to length / 2 are bins 4 .. length
+    bins = np.arange(4, length + 1)
+    for first in range(0, count, SERIES_BLOCK):
+        block = matrix[first:first + SERIES_BLOCK]
+        centered = block - block.mean(axis=1, keepdims=True)
+        spectrum = fft.rfft(centered, n=padded, axis=1, workers=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        acf = fft.irfft(power, n=padded, axis=1, workers=-1)[:, :len(lags)]
+        variance = acf[:, :1]
+        acf = np.divide(acf, variance, out=np.zeros_like(acf), where=variance > 0)
+
+        peak = bins[power[:, bins].argmax(axis=1)]
+        low = np.maximum(np.floor(padded / (peak + 1)), 2)[:, np.newaxis]
+        high = np.minimum(np.ceil(padded / (peak - 1)), max_lag)[:, np.newaxis]
+        # Every candidate of a row is scored over the same number of
+        # multiples: as many as its longest candidate has
+        multiples = (max_lag // high).astype(np.int64)
+        comb = np.zeros_like(acf)
+        for multiple in range(1, int(multiples.max()) + 1):
+            reach = lags[:max_lag // multiple + 1]
+            comb[:, reach] += np.where(multiples >= multiple, acf[:, reach * multiple], 0)
+        candidates = np.where((lags >= low) & (lags <= high), comb / multiples, -np.inf)
+        best = candidates.argmax(axis=1)
+        strong = acf[np.arange(len(block)), best] >= MIN_SEASONAL_ACF
+        periods[first:first + len(block)] = np.where(strong, best, 0)
+    return periods
+
+
+def _burst_runs(matrix: np.ndarray, window: int, factor: float,
+                deviations: float) -> List[Tuple]:
+    """
+    (row, start, end, peak, baseline) for each run of consecutive columns
+    where a row's value exceeds `factor` times the mean of its previous
+    `window` values and lies more than `deviations` standard deviations
+    above that mean. Trailing sums are differences of prefix sums taken at
+    a fixed stride, so every window of every row costs O(1) and no
+    per-series loop runs; baseline is the trailing mean at the run's
+    first column.
+    """
+    count, length = matrix.shape
+    if length <= window:
+        return []
+    # Prefix sums of the row-centred values keep the variance stable
+    offset = matrix.mean(axis=1, keepdims=True)
+    centered = matrix - offset
+    sums = np.pad(np.cumsum(centered, axis=1), ((0, 0), (1, 0)))
+    squares = np.pad(np.cumsum(centered * centered, axis=1), ((0, 0), (1, 0)))
+    mean = (sums[:, window:-1] - sums[:, :-window - 1]) / window
+    variance = (squares[:, window:-1] - squares[:, :-window - 1]) / window - mean * mean
+    std = np.sqrt(np.maximum(variance, 0))
+    mean += offset
+    current = matrix[:, window:]
+    bursting = (mean > 0) & (current > factor * mean) & (current > mean + deviations * std)
+    if not bursting.any():
+        return []
+
+    # Runs: a burst column starts a run unless the previous column (same
+    # row) also bursts; padding a False column keeps rows apart when flat
+    padded = np.pad(bursting, ((0, 0), (1, 1)))
+    edges = np.diff(padded.astype(np.int8), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    flat = np.flatnonzero(bursting)
+    offsets = np.searchsorted(flat, rows * current.shape[1] + starts)
+    peaks = np.maximum.reduceat(current.ravel()[flat], offsets)
+    baselines = mean[rows, starts]
+    return [(int(row), int(start) + window, int(end) - 1 + window, float(peak), float(baseline))
+            for row, start, end, peak, baseline in zip(rows, starts, ends, peaks, baselines)]
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import argparse
+from typing import Set, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config_validation'))
+
+from address_utils import address_intervals, covers, overlaps
+from config_parser import ConfigModel
+from validate_nat_rules import _zone_matches, check_nat_rules, nat_type
+from policy_optimizer import _Rule
+from generators import NAT_SHAPES, nat_model
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+
+
+def pairwise_findings(model: ConfigModel) -> Tuple[Set[str], Set[Tuple[str, str]]]:
+    """O(n^2) reference: unreachable rule names and bidirectional conflict pairs"""
+    from validate_nat_rules import validate_nat_rules
+
+    rules = validate_nat_rules(model)
+    compiled = [_Rule(i, {'policy_name': rule['rule_name'], 'source_zone': rule['source_zone'],
+                          'destination_zone': rule['destination_zone'], 'source': rule['source'],
+                          'destination': rule['destination'], 'service': rule['service']}, {})
+                for i, rule in enumerate(rules)]
+    unreachable = set()
+    for j, rule in enumerate(compiled):
+        if any(earlier.name not in unreachable and earlier.covers(rule) for earlier in compiled[:j]):
+            unreachable.add(rule.name)
+
+    conflicts = set()
+    for a in rules:
+        if nat_type(a) != 'source':
+            continue
+        pool, source = address_intervals(a['translated']), address_intervals(a['source'])
+        for b in rules:
+            if nat_type(b) != 'destination':
+                continue
+            if (overlaps(pool, address_intervals(b['destination']))
+                    and _zone_matches(a['source_zone'], b['destination_zone'])
+                    and _zone_matches(a['destination_zone'], b['source_zone'])
+                    and not covers(source, address_intervals(b['translated']))):
+                conflicts.add((a['rule_name'], b['rule_name']))
+    return unreachable, conflicts
+
+
+def run(sizes, seed=0, check=False, shape='mixed'):
+    for size in sizes:
+        model = nat_model(size, seed, shape)
+        started = time.perf_counter()
+        report = check_nat_rules(model)
+        seconds = time.perf_counter() - started
+        counts = {}
+        for finding in report['findings']:
+            counts[finding['type']] = counts.get(finding['type'], 0) + 1
+        print(f"{size:>7} rules: {seconds:8.3f}s ({size / seconds:,.0f} rules/s), "
+              f"{counts.get('overlapping_pools', 0)} pool overlaps, "
+              f"{counts.get('bidirectional_conflict', 0)} conflicts, "
+              f"{counts.get('unreachable', 0)} unreachable")
+        if check:
+            unreachable, conflicts = pairwise_findings(model)
+            found_unreachable = {f['rules'][0] for f in report['findings'] if f['type'] == 'unreachable'}
+            found_conflicts = {tuple(f['rules']) for f in report['findings']
+                               if f['type'] == 'bidirectional_conflict'}
+            same = found_unreachable == unreachable and found_conflicts == conflicts
+            print(f"         {'matches' if same else 'DIFFERS FROM'} pairwise comparison "
+                  f"({len(unreachable)} unreachable, {len(conflicts)} conflicts)")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NAT rule checks on generated rulebases")
+    parser.add_argument('sizes', nargs='*', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', action='store_true',
+                        help="compare against O(n^2) pairwise analysis (small sizes only)")
+    parser.add_argument('--shape', choices=NAT_SHAPES, default='mixed',
+                        help="'port-forwarding': destination NAT of one address, a port per rule")
+    args = parser.parse_args(argv)
+
+    run(args.sizes, args.seed, args.check, args.shape)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import argparse
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config_validation'))
+
+from policy_optimizer import PolicyOptimizer, _Rule
+from generators import POLICY_SHAPES, generate_policies
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def pairwise_covered(policies: List[Dict]) -> Dict[str, str]:
+    """O(n^2) reference: rule name -> earliest covering rule name"""
+    rules = [_Rule(i, policy, {}) for i, policy in enumerate(policies)]
+    covered = {}
+    for j, rule in enumerate(rules):
+        for earlier in rules[:j]:
+            if earlier.name not in covered and earlier.covers(rule):
+                covered[rule.name] = earlier.name
+                break
+    return covered
+
+
+def run(sizes, seed=0, check=False, shape='mixed'):
+    for size in sizes:
+        optimizer = PolicyOptimizer()
+        optimizer.policies = generate_policies(size, seed, shape)
+        started = time.perf_counter()
+        report = optimizer.optimize_policies()
+        seconds = time.perf_counter() - started
+        print(f"{size:>7} rules: {seconds:8.3f}s ({size / seconds:,.0f} rules/s), "
+              f"{len(report['shadowed'])} shadowed, {len(report['redundant'])} redundant, "
+              f"{len(report['mergeable'])} mergeable groups")
+        if check:
+            expected = pairwise_covered(optimizer.policies)
+            found = {entry['rule']: entry['covered_by']
+                     for entry in report['shadowed'] + report['redundant']}
+            status = 'matches' if found == expected else 'DIFFERS FROM'
+            print(f"         {status} pairwise comparison ({len(expected)} covered rules)")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PolicyOptimizer on generated rulebases")
+    parser.add_argument('sizes', nargs='*', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', action='store_true',
+                        help="compare against O(n^2) pairwise analysis (small sizes only)")
+    parser.add_argument('--shape', choices=POLICY_SHAPES, default='mixed',
+                        help="'services': trust -> untrust rules that differ only in port")
+    args = parser.parse_args(argv)
+
+    run(args.sizes, args.seed, args.check, args.shape)
+
+if __name__ == '__main__':
+    cli()
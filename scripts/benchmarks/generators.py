@@ -0,0 +1,320 @@
+import os
+import random
+import ipaddress
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# Deterministic inputs for the benchmarks: the same (size, seed) always
+# gives byte-identical configs and logs, so timings are comparable across
+# runs and machines. Formats follow examples/config_samples/ and
+# examples/log_samples/.
+
+ZONES = ['trust', 'untrust', 'dmz', 'guest', 'vpn', 'mgmt', 'datacenter', 'partner']
+APPLICATIONS = ['web-browsing', 'ssl', 'ssh', 'dns', 'ntp', 'smtp', 'ldap', 'ms-rdp', 'any']
+SERVICES = ['application-default', 'any', 'tcp/8080', 'tcp/8000-8999', '443']
+NAT_ZONES = ['trust', 'untrust', 'dmz', 'guest', 'vpn', 'partner']
+NAT_SERVICES = ['any', 'any', 'http', 'https', 'ssh', 'tcp/8080']
+POLICY_SHAPES = ('mixed', 'services')
+NAT_SHAPES = ('mixed', 'port-forwarding')
+
+# Stanza attribute for each validate_security_policies() key
+POLICY_ATTRIBUTES = {
+    'source_zone': 'source_zone',
+    'destination_zone': 'destination_zone',
+    'source': 'source_address',
+    'destination': 'destination_address',
+    'application': 'application',
+    'service': 'service',
+    'action': 'action'
+}
+
+MB = 1024 * 1024
+LOG_START = datetime(2024, 5, 28)
+TRAFFIC_PORTS = [80, 443, 22, 53, 123, 25, 3389, 8080, 23]
+TRAFFIC_PROTOCOLS = ['http', 'https', 'ssh', 'dns', 'ntp', 'smtp', 'rdp', 'port-8080', 'telnet']
+THREAT_EVENTS = [('CRITICAL', 'Detected malware'), ('ERROR', 'SQL Injection attempt'),
+                 ('WARNING', 'Suspicious activity detected'), ('CRITICAL', 'Brute force attempt')]
+SYSTEM_EVENTS = [('INFO', 'System rebooted successfully'),
+                 ('ERROR', 'Failed to apply configuration changes'),
+                 ('WARNING', 'High CPU usage detected'),
+                 ('ERROR', 'Session table usage at {}%'),
+                 ('INFO', 'Configuration committed by admin')]
+
+
+def ip(value: int) -> str:
+    return '.'.join(str(value >> shift & 255) for shift in (24, 16, 8, 0))
+
+
+def subnet(rng: random.Random, length: int) -> str:
+    base = rng.getrandbits(32) >> (32 - length) << (32 - length)
+    return ip(base) if length == 32 else f"{ip(base)}/{length}"
+
+
+def _policy_address(rng: random.Random) -> str:
+    if rng.random() < 0.15:
+        return 'any'
+    return subnet(rng, rng.choice([8, 16, 24, 24, 32]))
+
+
+def _service_policy(i: int) -> Dict:
+    # Outbound rules that differ only in their TCP port
+    return {
+        'source_zone': 'trust',
+        'destination_zone': 'untrust',
+        'source': '10.0.0.0/8',
+        'destination': 'any',
+        'application': 'any',
+        'service': f"tcp/{1024 + i % (65536 - 1024)}",
+        'action': 'allow'
+    }
+
+
+def generate_policies(count: int, seed: int = 0, shape: str = 'mixed') -> List[Dict]:
+    """
+    Random rulebase in validate_security_policies() form. About one rule in
+    ten copies an earlier rule with a narrower source, so shadowed and
+    redundant rules are guaranteed to exist. The 'services' shape makes
+    every other rule trust -> untrust from 10.0.0.0/8 to any on its own
+    TCP port, as in service-heavy rulebases.
+    """
+    if shape not in POLICY_SHAPES:
+        raise ValueError(f"Unknown policy shape: {shape}")
+    rng = random.Random(seed)
+    policies = []
+    for i in range(count):
+        if policies and rng.random() < 0.1:
+            policy = dict(rng.choice(policies))
+            if policy['source'] != 'any':
+                base, _, length = policy['source'].partition('/')
+                policy['source'] = base if not length else f"{base}/{min(32, int(length) + 4)}"
+            policy['action'] = rng.choice(['allow', 'deny'])
+        elif shape == 'services':
+            policy = _service_policy(i)
+        else:
+            policy = {
+                'source_zone': rng.choice(ZONES),
+                'destination_zone': rng.choice(ZONES),
+                'source': _policy_address(rng),
+                'destination': _policy_address(rng),
+                'application': rng.choice(APPLICATIONS),
+                'service': rng.choice(SERVICES),
+                'action': rng.choice(['allow', 'allow', 'deny'])
+            }
+        policy.update(policy_name=f"rule-{i}", line=i + 1)
+        policies.append(policy)
+    return policies
+
+
+def generate_nat_rules(count: int, seed: int = 0, shape: str = 'mixed') -> List[Dict]:
+    """
+    Random NAT rules as stanza attribute dicts (plus 'name'). Source NAT
+    rules share a /20 public range, so overlapping pools occur; one rule in
+    ten narrows an earlier rule (unreachable) and a few destination NAT
+    rules forward addresses of that public range. The 'port-forwarding'
+    shape makes every other rule forward its own TCP port of one public
+    address to an internal host.
+    """
+    if shape not in NAT_SHAPES:
+        raise ValueError(f"Unknown NAT shape: {shape}")
+    rng = random.Random(seed)
+    public = rng.getrandbits(20) << 12
+    rules: List[Dict] = []
+    for i in range(count):
+        roll = rng.random()
+        if rules and roll < 0.1:
+            rule = dict(rng.choice(rules))
+            if rule['source_address'] != 'any':
+                base, _, length = rule['source_address'].partition('/')
+                rule['source_address'] = base if not length else f"{base}/{min(32, int(length) + 4)}"
+        elif shape == 'port-forwarding':
+            rule = {
+                'source_zone': 'untrust',
+                'destination_zone': 'untrust',
+                'source_address': 'any',
+                'destination_address': ip(public),
+                'translated_address': ip(0x0A000000 + rng.randrange(1 << 16)),
+                'service': f"tcp/{1024 + i % (65536 - 1024)}"
+            }
+        elif roll < 0.15:
+            rule = {
+                'source_zone': rng.choice(NAT_ZONES),
+                'destination_zone': rng.choice(NAT_ZONES),
+                'source_address': 'any',
+                'destination_address': ip(public + rng.randrange(4096)),
+                'translated_address': subnet(rng, 32),
+                'service': rng.choice(NAT_SERVICES)
+            }
+        else:
+            pool = public + rng.randrange(4096)
+            rule = {
+                'source_zone': rng.choice(NAT_ZONES),
+                'destination_zone': rng.choice(NAT_ZONES),
+                'source_address': subnet(rng, rng.choice([16, 24, 24, 28])),
+                'destination_address': rng.choice(['any', 'any', subnet(rng, 24)]),
+                'translated_address': ip(pool) if rng.random() < 0.8 else f"{ip(pool & ~3)}/30",
+                'service': rng.choice(NAT_SERVICES)
+            }
+        rule['name'] = f"nat-{i}"
+        rules.append(rule)
+    return rules
+
+
+def generate_interfaces(count: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [{'name': f"ethernet1/{i + 1}",
+             'ip-address': f"{ip((rng.getrandbits(24) << 8) + 1)}/24",
+             'zone': rng.choice(ZONES)}
+            for i in range(count)]
+
+
+def _stanza_text(kind: str, name: str, attributes: Dict) -> str:
+    lines = [f"{kind} {name}"]
+    lines.extend(f"  {key} {value}" for key, value in attributes.items())
+    return '\n'.join(lines) + '\n\n'
+
+
+def write_config(path: str, policies: int = 0, nat_rules: int = 0, interfaces: int = 0,
+                 seed: int = 0) -> str:
+    """Stanza-format config with the given number of each kind; path is returned"""
+    with open(path, 'w') as f:
+        for interface in generate_interfaces(interfaces, seed):
+            attributes = {key: value for key, value in interface.items() if key != 'name'}
+            f.write(_stanza_text('INTERFACE', interface['name'], attributes))
+        for rule in generate_nat_rules(nat_rules, seed):
+            attributes = {key: value for key, value in rule.items() if key != 'name'}
+            f.write(_stanza_text('NAT_RULE', rule['name'], attributes))
+        for policy in generate_policies(policies, seed):
+            attributes = {attribute: policy[key] for key, attribute in POLICY_ATTRIBUTES.items()}
+            f.write(_stanza_text('SECURITY_POLICY', policy['policy_name'], attributes))
+    return path
+
+
+def nat_model(count: int, seed: int = 0, shape: str = 'mixed'):
+    """generate_nat_rules() as an in-memory ConfigModel"""
+    from config_parser import NAT_RULE, ConfigModel, Stanza
+
+    model = ConfigModel('<generated>')
+    for i, rule in enumerate(generate_nat_rules(count, seed, shape)):
+        stanza = Stanza(NAT_RULE, rule['name'], (), i + 1)
+        for key, value in rule.items():
+            if key != 'name':
+                stanza.add(key, value)
+        model.add(stanza)
+    return model
+
+
+def _log_lines(rng: random.Random, hosts: List[str], count: int, timestamp: str) -> List[str]:
+    lines = []
+    for roll in [rng.random() for _ in range(count)]:
+        if roll < 0.85:
+            port = rng.choice(TRAFFIC_PORTS)
+            verb = 'Denied' if roll < 0.1 else 'Allowed'
+            lines.append(f"[{timestamp}] [INFO] [TRAFFIC] {verb} traffic from {rng.choice(hosts)} "
+                         f"to {rng.choice(hosts)} on port {port}\n")
+        elif roll < 0.95:
+            level, event = rng.choice(THREAT_EVENTS)
+            lines.append(f"[{timestamp}] [{level}] [THREAT] {event} from {rng.choice(hosts)} "
+                         f"to {rng.choice(hosts)}\n")
+        else:
+            level, event = rng.choice(SYSTEM_EVENTS)
+            lines.append(f"[{timestamp}] [{level}] [SYSTEM] {event.format(rng.randrange(70, 100))}\n")
+    return lines
+
+
+def write_logs(path: str, size_bytes: int, seed: int = 0, lines_per_second: int = 50) -> str:
+    """
+    Mixed traffic, threat and system log of about size_bytes, with one
+    timestamp shared by each run of lines_per_second lines. Hosts come from
+    a fixed pool so per-address statistics stay meaningful at any size.
+    """
+    rng = random.Random(seed)
+    hosts = [ip(rng.choice([0xC0A80000, 0x0A000000, 0xAC100000]) + rng.randrange(65536))
+             for _ in range(4096)]
+    moment = LOG_START
+    written = 0
+    with open(path, 'w') as f:
+        while written < size_bytes:
+            block = _log_lines(rng, hosts, lines_per_second, moment.strftime('%Y-%m-%d %H:%M:%S'))
+            text = ''.join(block)
+            f.write(text)
+            written += len(text)
+            moment += timedelta(seconds=1)
+    return path
+
+
+def cached_file(data_dir: str, name: str, writer, *args) -> str:
+    """Path of a generated file under data_dir, writing it on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        writer(tmp_path, *args)
+        os.replace(tmp_path, path)
+    return path
+
+
+def drift_config(entries: int, seed: int = 0) -> Dict:
+    """Nested running-config dict with about `entries` leaf sections"""
+    rng = random.Random(seed)
+    return {
+        'zones': {zone: {'interfaces': [f"ethernet1/{i}" for i in range(rng.randrange(1, 4))],
+                         'protection_profile': rng.choice(['default', 'strict'])}
+                  for zone in ZONES},
+        'objects': {f"host-{i}": {'ip-netmask': subnet(rng, 32), 'tag': rng.choice(ZONES)}
+                    for i in range(entries // 2)},
+        'policies': {f"rule-{i}": {'from': rng.choice(ZONES), 'to': rng.choice(ZONES),
+                                   'source': [subnet(rng, 24)], 'action': rng.choice(['allow', 'deny']),
+                                   'log_end': True}
+                     for i in range(entries - entries // 2)}
+    }
+
+
+def mutate_config(config: Dict, fraction: float, seed: int = 0) -> Dict:
+    """Copy of a drift_config() with `fraction` of its policies and objects changed"""
+    rng = random.Random(seed)
+    changed = {section: dict(items) if isinstance(items, dict) else items
+               for section, items in config.items()}
+    for section in ('objects', 'policies'):
+        names = list(changed[section])
+        for name in rng.sample(names, int(len(names) * fraction)):
+            entry = dict(changed[section][name])
+            if section == 'objects':
+                entry['tag'] = 'changed'
+            else:
+                entry['action'] = 'deny' if entry['action'] == 'allow' else 'allow'
+            changed[section][name] = entry
+    return changed
+
+
+def traffic_frame(rows: int, seed: int = 0, days: int = 7, string_ips: bool = False):
+    """
+    Flow DataFrame in extract_traffic() layout with byte counts, spread over
+    `days` days with a daily cycle, as TrafficPatternAnalyzer expects.
+    string_ips gives dotted-quad address strings instead of packed uint32,
+    as frames built from parse_logs records carry.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    seconds = days * 86400
+    # Daily cycle: more flows during the day than at night
+    offsets = np.sort(rng.integers(0, seconds, rows))
+    hours = offsets // 3600 % 24
+    keep = rng.random(rows) < 0.4 + 0.6 * np.sin(np.pi * hours / 24)
+    offsets = offsets[keep]
+    count = len(offsets)
+    hosts = rng.integers(0xC0A80000, 0xC0A80000 + 4096, 2048, dtype=np.uint32)
+    if string_ips:
+        hosts = np.array([str(ipaddress.IPv4Address(int(host))) for host in hosts], dtype=object)
+    port = rng.integers(0, len(TRAFFIC_PORTS), count)
+    return pd.DataFrame({
+        # Zipf-distributed sources give a few heavy talkers
+        'source_ip': hosts[rng.zipf(1.5, count) % len(hosts)],
+        'dest_ip': hosts[rng.integers(0, len(hosts), count)],
+        'dest_port': np.array(TRAFFIC_PORTS, dtype=np.uint16)[port],
+        'protocol': pd.Categorical.from_codes(port, categories=TRAFFIC_PROTOCOLS),
+        'bytes': rng.lognormal(8, 2, count).astype(np.uint64),
+        'packets': rng.integers(1, 200, count, dtype=np.uint32)
+    }, index=pd.DatetimeIndex(pd.Timestamp(LOG_START) + pd.to_timedelta(offsets, unit='s'),
+                              name='timestamp'))
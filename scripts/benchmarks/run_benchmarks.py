@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import resource
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+for directory in ('config_validation', 'log_analysis', 'analysis'):
+    sys.path.insert(0, os.path.join(HERE, '..', directory))
+sys.path.insert(0, HERE)
+
+import generators
+from generators import MB
+
+# Input sizes per tier; 'large' writes a 2 GB log on first use
+TIERS = {
+    'small': {'log_mb': 16, 'rules': 1000, 'drift_entries': 10000, 'flows': 100000},
+    'medium': {'log_mb': 256, 'rules': 10000, 'drift_entries': 100000, 'flows': 1000000},
+    'large': {'log_mb': 2048, 'rules': 50000, 'drift_entries': 500000, 'flows': 5000000}
+}
+DEFAULT_TOLERANCE = 0.2
+SEED = 0
+
+
+def _log_file(tier: Dict, data_dir: str) -> str:
+    return generators.cached_file(data_dir, f"logs-{tier['log_mb']}mb-{SEED}.txt",
+                                  generators.write_logs, tier['log_mb'] * MB, SEED)
+
+
+def _config_file(tier: Dict, data_dir: str) -> str:
+    count = tier['rules']
+    return generators.cached_file(data_dir, f"config-{count}-{SEED}.txt", generators.write_config,
+                                  count, count, 16, SEED)
+
+
+# Each case takes (tier, data_dir) and returns (work, amount, unit). Files
+# are generated by the parent before the case runs, so the child's peak
+# RSS covers only loading and processing.
+
+def case_parse_logs(tier, data_dir) -> Tuple[Callable, float, str]:
+    from parse_logs import parse_logs
+
+    path = _log_file(tier, data_dir)
+    return lambda: sum(1 for _ in parse_logs(path)), os.path.getsize(path) / MB, 'MB'
+
+
+def case_identify_anomalies(tier, data_dir):
+    from identify_anomalies import identify_anomalies
+
+    path = _log_file(tier, data_dir)
+    return lambda: identify_anomalies(path), os.path.getsize(path) / MB, 'MB'
+
+
+def case_validate_nat(tier, data_dir):
+    from validate_nat_rules import check_nat_rules
+
+    path = _config_file(tier, data_dir)
+    return lambda: check_nat_rules(path), tier['rules'], 'rules'
+
+
+def case_optimize_policies(tier, data_dir):
+    from policy_optimizer import PolicyOptimizer
+
+    path = _config_file(tier, data_dir)
+    return (lambda: PolicyOptimizer().load_policies(path).optimize_policies(),
+            tier['rules'], 'rules')
+
+
+def case_detect_drift(tier, data_dir):
+    from drift_detector import ConfigDriftDetector
+
+    # In-memory input: built in the child, so peak RSS includes both configs
+    baseline = generators.drift_config(tier['drift_entries'], SEED)
+    current = generators.mutate_config(baseline, 0.01, SEED)
+    detector = ConfigDriftDetector()
+    detector.set_baseline('running', baseline)
+    return lambda: detector.detect_drift('running', current), tier['drift_entries'], 'entries'
+
+
+def case_analyze_traffic(tier, data_dir):
+    from traffic_pattern_analyzer import TrafficPatternAnalyzer
+
+    frame = generators.traffic_frame(tier['flows'], SEED)
+    return lambda: TrafficPatternAnalyzer().analyze_traffic(frame), len(frame), 'flows'
+
+
+def case_analyze_traffic_str_ips(tier, data_dir):
+    from traffic_pattern_analyzer import TrafficPatternAnalyzer
+
+    # Dotted-quad strings, as frames built from parse_logs records carry
+    frame = generators.traffic_frame(tier['flows'], SEED, string_ips=True)
+    return lambda: TrafficPatternAnalyzer().analyze_traffic(frame), len(frame), 'flows'
+
+
+CASES = {
+    'parse_logs': case_parse_logs,
+    'identify_anomalies': case_identify_anomalies,
+    'validate_nat_rules': case_validate_nat,
+    'optimize_policies': case_optimize_policies,
+    'detect_drift': case_detect_drift,
+    'analyze_traffic': case_analyze_traffic,
+    'analyze_traffic_str_ips': case_analyze_traffic_str_ips
+}
+
+
+def _prepare(case: str, tier: Dict, data_dir: str):
+    """Write the files a case reads, in the parent"""
+    if case in ('parse_logs', 'identify_anomalies'):
+        _log_file(tier, data_dir)
+    elif case in ('validate_nat_rules', 'optimize_policies'):
+        _config_file(tier, data_dir)
+
+
+def _measure(case: str, tier_name: str, data_dir: str, repeat: int) -> Dict:
+    """Runs in a fresh child process, so ru_maxrss is this case's peak"""
+    try:
+        work, amount, unit = CASES[case](TIERS[tier_name], data_dir)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            work()
+            timings.append(time.perf_counter() - started)
+    except Exception as exc:
+        return {'error': f"{type(exc).__name__}: {exc}"}
+    seconds = min(timings)
+    return {
+        'seconds': round(seconds, 4),
+        'amount': round(amount, 2),
+        'unit': unit,
+        'throughput': round(amount / seconds, 2) if seconds else None,
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def run(cases: List[str], tiers: List[str], data_dir: str, repeat: int = 1) -> Dict[str, Dict]:
+    results = {}
+    for tier_name in tiers:
+        for case in cases:
+            _prepare(case, TIERS[tier_name], data_dir)
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                results[f"{case}/{tier_name}"] = pool.submit(_measure, case, tier_name,
+                                                             data_dir, repeat).result()
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Regressions against a baseline: throughput below (1 - tolerance) of the
+    baseline, or peak RSS above (1 + tolerance) of it
+    """
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if not before or 'error' in before:
+            continue
+        if 'error' in result:
+            regressions.append(f"{key}: now fails ({result['error']})")
+            continue
+        if result['throughput'] < before['throughput'] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {result['throughput']:,.1f} {result['unit']}/s, "
+                               f"baseline {before['throughput']:,.1f}")
+        if result['peak_rss_mb'] > before['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{key}: peak RSS {result['peak_rss_mb']} MB, "
+                               f"baseline {before['peak_rss_mb']} MB")
+    return regressions
+
+
+def main(cases, tiers, data_dir, repeat=1, baseline=None, save_baseline=None,
+         tolerance=DEFAULT_TOLERANCE, as_json=False):
+    results = run(cases, tiers, data_dir, repeat)
+    regressions = []
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), tolerance)
+    if save_baseline:
+        with open(save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if as_json:
+        print(json.dumps({'results': results, 'regressions': regressions}, indent=2))
+    else:
+        for key, result in results.items():
+            if 'error' in result:
+                print(f"{key:<30} error: {result['error']}")
+                continue
+            print(f"{key:<30} {result['seconds']:9.3f}s {result['throughput']:>14,.1f} "
+                  f"{result['unit']}/s  peak RSS {result['peak_rss_mb']:8.1f} MB")
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Time toolkit components on generated inputs")
+    parser.add_argument('--tier', action='append', choices=list(TIERS),
+                        help="size tier, may be repeated (default: small)")
+    parser.add_argument('--case', action='append', choices=list(CASES),
+                        help="benchmark to run, may be repeated (default: all)")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'toolkit-bench'),
+                        help="where generated configs and logs are kept between runs")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per case; the fastest is kept")
+    parser.add_argument('--baseline', help="baseline JSON to check for regressions")
+    parser.add_argument('--save-baseline', help="write these results as a baseline JSON")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed fractional slowdown or RSS growth (default: 0.2)")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    sys.exit(main(args.case or list(CASES), args.tier or ['small'], args.data_dir, args.repeat,
+                  args.baseline, args.save_baseline, args.tolerance, args.json))
+
+if __name__ == '__main__':
+    cli()
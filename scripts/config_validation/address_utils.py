@@ -0,0 +1,197 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+Interval = Tuple[int, int]  # inclusive bounds
+
+ADDRESS_BITS = 32  # IPv4 only; other values are reported as unresolved
+MAX_ADDRESS = 2 ** ADDRESS_BITS - 1
+MAX_PORT = 65535
+ALL_ADDRESSES: List[Interval] = [(0, MAX_ADDRESS)]
+ALL_PORTS: List[Interval] = [(0, MAX_PORT)]
+
+ANY = 'any'
+APPLICATION_DEFAULT = 'application-default'
+
+# Well-known service names and the default ports of common App-IDs
+SERVICE_PORTS: Dict[str, List[Interval]] = {
+    'http': [(80, 80)],
+    'https': [(443, 443)],
+    'service-http': [(80, 80), (8080, 8080)],
+    'service-https': [(443, 443)],
+    'ssh': [(22, 22)],
+    'telnet': [(23, 23)],
+    'ftp': [(21, 21)],
+    'smtp': [(25, 25)],
+    'dns': [(53, 53)],
+    'ntp': [(123, 123)],
+    'snmp': [(161, 162)],
+    'ldap': [(389, 389)],
+    'rdp': [(3389, 3389)]
+}
+APPLICATION_PORTS: Dict[str, List[Interval]] = {
+    'web-browsing': [(80, 80), (8080, 8080)],
+    'ssl': [(443, 443)],
+    'ssh': [(22, 22)],
+    'telnet': [(23, 23)],
+    'ftp': [(20, 21)],
+    'smtp': [(25, 25), (587, 587)],
+    'dns': [(53, 53)],
+    'ntp': [(123, 123)],
+    'snmp': [(161, 162)],
+    'ldap': [(389, 389), (636, 636)],
+    'ms-rdp': [(3389, 3389)],
+    'ping': [(0, 0)]
+}
+
+PORT_PATTERN = re.compile(r'^(?:(?:tcp|udp)[/-])?(\d+)(?:-(\d+))?$')
+
+
+def as_values(value: Union[None, str, Iterable[str]]) -> Tuple[str, ...]:
+    """Normalize a stanza attribute (missing, single or repeated) to a tuple"""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(value)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort and coalesce overlapping or adjacent intervals"""
+    merged: List[Interval] = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1] + 1:
+            if hi > merged[-1][1]:
+                merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def covers(outer: List[Interval], inner: List[Interval]) -> bool:
+    """True if every interval of inner lies within one of outer (both merged)"""
+    i = 0
+    for lo, hi in inner:
+        while i < len(outer) and outer[i][1] < lo:
+            i += 1
+        if i == len(outer) or outer[i][0] > lo or outer[i][1] < hi:
+            return False
+    return True
+
+
+def overlaps(a: List[Interval], b: List[Interval]) -> bool:
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i][1] < b[j][0]:
+            i += 1
+        elif b[j][1] < a[i][0]:
+            j += 1
+        else:
+            return True
+    return False
+
+
+def interval_cidrs(lo: int, hi: int, bits: int = ADDRESS_BITS) -> List[Tuple[int, int]]:
+    """Minimal (base, prefix length) blocks exactly covering [lo, hi]"""
+    blocks = []
+    while lo <= hi:
+        # Largest aligned block starting at lo that stays within hi
+        size = lo & -lo if lo else 1 << bits
+        while size > hi - lo + 1:
+            size >>= 1
+        blocks.append((lo, bits - size.bit_length() + 1))
+        lo += size
+    return blocks
+
+
+def format_address(value: int) -> str:
+    return '.'.join(str(value >> shift & 255) for shift in (24, 16, 8, 0))
+
+
+def format_interval(lo: int, hi: int) -> str:
+    return format_address(lo) if lo == hi else f"{format_address(lo)}-{format_address(hi)}"
+
+
+def _ipv4(text: str) -> int:
+    octets = text.split('.')
+    if len(octets) != 4 or not all(map(str.isdigit, octets)):
+        raise ValueError(text)
+    a, b, c, d = map(int, octets)
+    if a > 255 or b > 255 or c > 255 or d > 255:
+        raise ValueError(text)
+    return a << 24 | b << 16 | c << 8 | d
+
+
+@lru_cache(maxsize=65536)
+def parse_address(value: str) -> Optional[Interval]:
+    """'any', an IPv4 address, CIDR or 'a.b.c.d-e.f.g.h' range as an interval"""
+    if value == ANY:
+        return 0, MAX_ADDRESS
+    try:
+        if '-' in value:
+            first, last = value.split('-', 1)
+            lo, hi = _ipv4(first), _ipv4(last)
+            return (lo, hi) if lo <= hi else None
+        address, _, length = value.partition('/')
+        length = int(length) if length else ADDRESS_BITS
+        if not 0 <= length <= ADDRESS_BITS:
+            return None
+        # Host bits are ignored, as with ipaddress.ip_network(strict=False)
+        host_bits = ADDRESS_BITS - length
+        lo = _ipv4(address) >> host_bits << host_bits
+    except ValueError:
+        return None
+    return lo, lo + (1 << host_bits) - 1
+
+
+def address_intervals(values, address_book: Dict[str, str] = None) -> Optional[List[Interval]]:
+    """
+    Merged intervals for an address attribute, resolving names through
+    address_book. None if any value cannot be resolved; a missing
+    attribute means 'any'.
+    """
+    values = as_values(values)
+    if not values:
+        return list(ALL_ADDRESSES)
+    intervals = []
+    for value in values:
+        interval = parse_address(value)
+        if interval is None and address_book and value in address_book:
+            interval = parse_address(address_book[value])
+        if interval is None:
+            return None
+        intervals.append(interval)
+    return merge_intervals(intervals)
+
+
+def parse_ports(value: str) -> Optional[List[Interval]]:
+    if value in (ANY, APPLICATION_DEFAULT):
+        return list(ALL_PORTS)
+    if value in SERVICE_PORTS:
+        return SERVICE_PORTS[value]
+    match = PORT_PATTERN.match(value)
+    if not match:
+        return None
+    lo = int(match.group(1))
+    hi = int(match.group(2) or lo)
+    return [(lo, hi)] if lo <= hi <= MAX_PORT else None
+
+
+def service_ports(services, applications=()) -> Optional[List[Interval]]:
+    """
+    Merged destination port intervals for a service attribute. With
+    'application-default' the ports come from the applications' defaults
+    when every application is known. None if a service is unknown.
+    """
+    services = as_values(services) or (ANY,)
+    applications = as_values(applications)
+    if (services == (APPLICATION_DEFAULT,) and applications
+            and all(app in APPLICATION_PORTS for app in applications)):
+        return merge_intervals(port for app in applications for port in APPLICATION_PORTS[app])
+    intervals = []
+    for service in services:
+        ports = parse_ports(service)
+        if ports is None:
+            return None
+        intervals.extend(ports)
+    return merge_intervals(intervals)
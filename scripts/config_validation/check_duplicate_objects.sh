@@ -7,13 +7,5 @@ fi
 
 config_file=$1
 
-echo "Checking for duplicate objects in $config_file..."
-
-duplicates=$(grep -oP 'OBJECT\s+\K\S+' $config_file | sort | uniq -d)
-
-if [ -z "$duplicates" ]; then
-  echo "No duplicate objects found."
-else
-  echo "Duplicate objects found:"
-  echo "$duplicates"
-fi
+# Name and value comparison lives in duplicate_objects.py
+exec python3 "$(dirname "$0")/duplicate_objects.py" "$config_file"
@@ -1,8 +1,18 @@
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 import yaml
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import re
+import os
+import sys
+import marshal
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from config_parser import load_config
+from validate_nat_rules import validate_nat_rules
+from validate_security_policies import validate_security_policies
 
 class ComplianceLevel(Enum):
     CRITICAL = "CRITICAL"
@@ -10,6 +20,17 @@ class ComplianceLevel(Enum):
     MEDIUM = "MEDIUM"
     LOW = "LOW"
 
+LEVEL_ORDER = [ComplianceLevel.CRITICAL, ComplianceLevel.HIGH,
+               ComplianceLevel.MEDIUM, ComplianceLevel.LOW]
+
+# Names a check expression may use besides `item`, `section` and `config`
+CHECK_BUILTINS = {
+    'all': all, 'any': any, 'len': len, 'min': min, 'max': max, 'sum': sum,
+    'set': set, 'sorted': sorted, 'int': int, 'str': str, 'isinstance': isinstance,
+    'list': list, 'dict': dict, 'tuple': tuple, 're': re, 'True': True, 'False': False,
+    'None': None
+}
+
 @dataclass
 class ComplianceRule:
     id: str
@@ -18,17 +39,84 @@ class ComplianceRule:
     check_function: str
     remediation_steps: List[str]
     references: List[str]
+    # Dotted path of the config section the check reads; with scope 'item'
+    # the check runs once per element of that section as `item`, with scope
+    # 'section' once with the whole section as `section`
+    section: str = ''
+    scope: str = 'item'
+    name_key: Optional[str] = None
+    check: Optional[Callable] = field(default=None, repr=False, compare=False)
 
 class ComplianceChecker:
-    def __init__(self, compliance_framework: str):
+    def __init__(self, compliance_framework: str, cache_dir: str = None):
+        self.framework_path = compliance_framework
+        self.cache_dir = cache_dir
         self.framework = self._load_compliance_framework(compliance_framework)
         self.rules: Dict[str, ComplianceRule] = {}
+        self.sections: Dict[str, List[ComplianceRule]] = {}
         self.validation_results = []
-        
+        self._compile_rules()
+
     def _load_compliance_framework(self, framework_path: str):
-        with open(framework_path, 'r') as f:
-            return yaml.safe_load(f)
-    
+        with open(framework_path, 'rb') as f:
+            raw = f.read()
+        # Compiled checks are cached per framework content and interpreter,
+        # since marshal's code format is version specific
+        self.framework_hash = hashlib.sha256(raw + sys.version.encode()).hexdigest()
+        return yaml.safe_load(raw)
+
+    def _cache_path(self) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"compliance-{self.framework_hash}.marshal")
+
+    def _compile_rules(self):
+        """
+        Build self.rules from the framework and turn each check_function
+        expression into a callable. Code objects are loaded from the marshal
+        cache when the framework is unchanged.
+        """
+        definitions = self.framework.get('rules', [])
+        cache_path = self._cache_path()
+        code_objects = None
+        if cache_path:
+            try:
+                with open(cache_path, 'rb') as f:
+                    code_objects = marshal.load(f)
+            except (FileNotFoundError, EOFError, ValueError, TypeError):
+                code_objects = None
+
+        compiled = {}
+        for definition in definitions:
+            rule = ComplianceRule(
+                id=str(definition['id']),
+                description=definition.get('description', ''),
+                level=ComplianceLevel(definition.get('level', 'MEDIUM').upper()),
+                check_function=definition['check_function'],
+                remediation_steps=definition.get('remediation_steps', []),
+                references=definition.get('references', []),
+                section=definition.get('section', ''),
+                scope=definition.get('scope', 'item'),
+                name_key=definition.get('name_key')
+            )
+            if code_objects is not None and rule.id in code_objects:
+                code = code_objects[rule.id]
+            else:
+                argument = 'item' if rule.scope == 'item' else 'section'
+                code = compile(f"lambda {argument}, config: ({rule.check_function})",
+                               f"<{rule.id}>", 'eval')
+            compiled[rule.id] = code
+            rule.check = eval(code, {'__builtins__': CHECK_BUILTINS})
+            self.rules[rule.id] = rule
+            self.sections.setdefault(rule.section, []).append(rule)
+
+        if cache_path and code_objects is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(compiled, f)
+            os.replace(tmp_path, cache_path)
+
     def validate_configuration(self, config: Dict) -> Dict:
         results = {
             'compliant': True,
@@ -36,9 +124,9 @@ def validate_configuration(self, config: Dict) -> Dict:
             'risk_score': 0.0,
             'remediation_plan': []
         }
-        
-        for rule_id, rule in self.rules.items():
-            check_result = self._evaluate_rule(rule, config)
+
+        for rule_id, check_result in self._evaluate_sections(config):
+            rule = self.rules[rule_id]
             if not check_result['compliant']:
                 results['compliant'] = False
                 results['violations'].append({
@@ -49,16 +137,49 @@ def validate_configuration(self, config: Dict) -> Dict:
                     'remediation': rule.remediation_steps
                 })
                 results['risk_score'] += self._calculate_violation_risk_score(rule)
-        
+
         if not results['compliant']:
             results['remediation_plan'] = self._generate_remediation_plan(results['violations'])
-        
+
         return results
-    
-    def _evaluate_rule(self, rule: ComplianceRule, config: Dict) -> Dict:
-        # Implementation of rule evaluation logic
-        pass
-    
+
+    def _evaluate_sections(self, config: Dict):
+        """Walk each config section once, running every rule that reads it"""
+        outcomes = {}
+        for section_path, rules in self.sections.items():
+            section = _resolve_section(config, section_path)
+            item_rules = [rule for rule in rules if rule.scope == 'item']
+            failures = {rule.id: [] for rule in item_rules}
+            if item_rules and section is not None:
+                items = section.values() if isinstance(section, dict) else section
+                for position, item in enumerate(items):
+                    for rule in item_rules:
+                        try:
+                            passed = rule.check(item, config)
+                        except Exception as exc:
+                            failures[rule.id].append(f"{_item_name(item, rule, position)}: "
+                                                     f"check failed ({exc!r})")
+                            continue
+                        if not passed:
+                            failures[rule.id].append(_item_name(item, rule, position))
+            for rule in item_rules:
+                outcomes[rule.id] = {'compliant': not failures[rule.id],
+                                     'details': failures[rule.id]}
+            for rule in rules:
+                if rule.scope != 'item':
+                    outcomes[rule.id] = self._evaluate_rule(rule, config, section)
+        # Report in framework order
+        for rule_id in self.rules:
+            yield rule_id, outcomes[rule_id]
+
+    def _evaluate_rule(self, rule: ComplianceRule, config: Dict, section) -> Dict:
+        """Run a section-scoped rule; item-scoped rules are run per item by _evaluate_sections"""
+        try:
+            passed = bool(rule.check(section, config))
+        except Exception as exc:
+            return {'compliant': False, 'details': [f"check failed ({exc!r})"]}
+        return {'compliant': passed, 'details': [] if passed else [rule.section or 'config']}
+
     def _calculate_violation_risk_score(self, rule: ComplianceRule) -> float:
         risk_weights = {
             ComplianceLevel.CRITICAL: 10.0,
@@ -66,4 +187,106 @@ def _calculate_violation_risk_score(self, rule: ComplianceRule) -> float:
             ComplianceLevel.MEDIUM: 5.0,
             ComplianceLevel.LOW: 2.5
         }
-        return risk_weights[rule.level] 
\ No newline at end of file
+        return risk_weights[rule.level]
+
+    def _generate_remediation_plan(self, violations: List[Dict]) -> List[Dict]:
+        """Remediation steps ordered by severity, each distinct step listed once"""
+        ordered = sorted(violations,
+                         key=lambda v: LEVEL_ORDER.index(ComplianceLevel(v['level'])))
+        plan, seen = [], set()
+        for violation in ordered:
+            steps = [step for step in violation['remediation'] if step not in seen]
+            seen.update(steps)
+            plan.append({
+                'priority': len(plan) + 1,
+                'rule_id': violation['rule_id'],
+                'level': violation['level'],
+                'affected': violation['details'],
+                'steps': steps
+            })
+        return plan
+
+    def validate_fleet(self, configs: Dict[str, object], workers: int = None) -> Dict[str, Dict]:
+        """
+        Validate many devices in a process pool. configs maps a device name
+        to a config dict or a config file path; each worker compiles the
+        framework once (from the marshal cache when available).
+        """
+        workers = workers or os.cpu_count() or 1
+        names = list(configs)
+        if workers == 1 or len(names) < 2:
+            return {name: self.validate_configuration(_as_config(configs[name])) for name in names}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.framework_path, self.cache_dir)) as pool:
+            results = pool.map(_validate_in_worker, (configs[name] for name in names),
+                               chunksize=max(1, len(names) // (workers * 4)))
+            return dict(zip(names, results))
+
+
+def _resolve_section(config: Dict, path: str):
+    section = config
+    for part in path.split('.') if path else ():
+        if not isinstance(section, dict):
+            return None
+        section = section.get(part)
+    return section
+
+
+def _item_name(item, rule: ComplianceRule, position: int) -> str:
+    if isinstance(item, dict):
+        for key in (rule.name_key, 'name', 'policy_name', 'rule_name'):
+            if key and key in item:
+                return str(item[key])
+    return f"{rule.section}[{position}]"
+
+
+def config_from_file(config_file) -> Dict:
+    """Sections compliance rules can read, built from a parsed config file"""
+    model = load_config(config_file)
+    return {
+        'security_policies': validate_security_policies(model),
+        'nat_rules': validate_nat_rules(model),
+        'interfaces': [dict(stanza.attributes, name=stanza.name) for stanza in model.interfaces],
+        'objects': [dict(stanza.attributes, name=stanza.name) for stanza in model.objects]
+    }
+
+
+def _as_config(config) -> Dict:
+    return config if isinstance(config, dict) else config_from_file(config)
+
+
+_worker_checker: Optional[ComplianceChecker] = None
+
+def _init_worker(framework_path, cache_dir):
+    global _worker_checker
+    _worker_checker = ComplianceChecker(framework_path, cache_dir)
+
+def _validate_in_worker(config) -> Dict:
+    return _worker_checker.validate_configuration(_as_config(config))
+
+
+def main(framework, config_files, workers=1, cache_dir=None):
+    checker = ComplianceChecker(framework, cache_dir)
+    results = checker.validate_fleet({path: path for path in config_files}, workers)
+    for path, result in results.items():
+        status = 'compliant' if result['compliant'] else f"{len(result['violations'])} violations"
+        print(f"{path}: {status}, risk score {result['risk_score']}")
+        for step in result['remediation_plan']:
+            print(f"  {step['priority']}. [{step['level']}] {step['rule_id']}: "
+                  f"{', '.join(step['affected'])}")
+            for action in step['steps']:
+                print(f"     - {action}")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Check device configs against a compliance framework")
+    parser.add_argument('config_files', nargs='+')
+    parser.add_argument('--framework', required=True, help="framework YAML file")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes used to validate many devices (default: 1)")
+    parser.add_argument('--cache-dir', help="keep compiled framework rules in this directory")
+    args = parser.parse_args(argv)
+
+    main(args.framework, args.config_files, args.workers, args.cache_dir)
+
+if __name__ == '__main__':
+    cli()
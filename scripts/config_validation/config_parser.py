@@ -0,0 +1,150 @@
+import sys
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+NAT_RULE = 'NAT_RULE'
+SECURITY_POLICY = 'SECURITY_POLICY'
+INTERFACE = 'INTERFACE'
+OBJECT = 'OBJECT'
+
+# Fields carried on the header line by the older one-line format,
+# e.g. "NAT_RULE name source destination translated"
+LEGACY_FIELDS = {
+    NAT_RULE: ('source_address', 'destination_address', 'translated_address'),
+    SECURITY_POLICY: ('source_address', 'destination_address', 'action')
+}
+
+
+class Stanza:
+    """
+    One configuration block: a header line such as "NAT_RULE nat-rule-1"
+    followed by indented "key value" lines. Kinds, names, keys and values
+    are interned, so the thousands of repeated zone and address strings in
+    a large config share storage.
+    """
+
+    __slots__ = ('kind', 'name', 'args', 'attributes', 'line')
+
+    def __init__(self, kind: str, name: str, args: Tuple[str, ...] = (), line: int = 0):
+        self.kind = kind
+        self.name = name
+        self.args = args
+        self.attributes: Dict[str, Union[str, Tuple[str, ...]]] = {}
+        self.line = line
+
+    def add(self, key: str, value: str):
+        # A repeated key (e.g. several "member" lines) collects into a tuple
+        previous = self.attributes.get(key)
+        if previous is None:
+            self.attributes[key] = value
+        elif isinstance(previous, tuple):
+            self.attributes[key] = previous + (value,)
+        else:
+            self.attributes[key] = (previous, value)
+
+    def get(self, key: str, default=None):
+        return self.attributes.get(key, default)
+
+    def values(self, key: str) -> Tuple[str, ...]:
+        """Every value given for key, as a tuple"""
+        value = self.attributes.get(key)
+        if value is None:
+            return ()
+        return value if isinstance(value, tuple) else (value,)
+
+    def missing(self, keys: Iterable[str]) -> List[str]:
+        return [key for key in keys if key not in self.attributes]
+
+    def __repr__(self):
+        return f"Stanza({self.kind!r}, {self.name!r}, line={self.line}, {self.attributes!r})"
+
+
+class ConfigModel:
+    """Every stanza of one config file, grouped by kind in file order"""
+
+    def __init__(self, source: str = None):
+        self.source = source
+        self.stanzas: Dict[str, List[Stanza]] = {}
+        self.line_count = 0
+
+    def add(self, stanza: Stanza):
+        self.stanzas.setdefault(stanza.kind, []).append(stanza)
+
+    def of_kind(self, kind: str) -> List[Stanza]:
+        return self.stanzas.get(kind, [])
+
+    @property
+    def nat_rules(self) -> List[Stanza]:
+        return self.of_kind(NAT_RULE)
+
+    @property
+    def security_policies(self) -> List[Stanza]:
+        return self.of_kind(SECURITY_POLICY)
+
+    @property
+    def interfaces(self) -> List[Stanza]:
+        return self.of_kind(INTERFACE)
+
+    @property
+    def objects(self) -> List[Stanza]:
+        return self.of_kind(OBJECT)
+
+    def duplicate_names(self, kind: str) -> List[str]:
+        """Names defined more than once for kind, sorted"""
+        counts = Counter(stanza.name for stanza in self.of_kind(kind))
+        return sorted(name for name, count in counts.items() if count > 1)
+
+    def __iter__(self) -> Iterator[Stanza]:
+        for stanzas in self.stanzas.values():
+            yield from stanzas
+
+    def __len__(self):
+        return sum(len(stanzas) for stanzas in self.stanzas.values())
+
+
+def parse_lines(lines: Iterable[str], source: str = None) -> ConfigModel:
+    """
+    Build a ConfigModel in a single pass. Unindented lines open a stanza,
+    indented lines add a "key value" attribute to the open one; blank lines
+    and '#' comments are skipped.
+    """
+    intern = sys.intern
+    model = ConfigModel(source)
+    current: Optional[Stanza] = None
+    line_number = 0
+    for line_number, line in enumerate(lines, 1):
+        if line[:1] in (' ', '\t'):
+            text = line.strip()
+            if current is None or not text or text[0] == '#':
+                continue
+            key, _, value = text.partition(' ')
+            key, value = intern(key), intern(value.lstrip())
+            if key in current.attributes:
+                current.add(key, value)
+            else:
+                current.attributes[key] = value
+            continue
+        text = line.strip()
+        if not text or text[0] == '#':
+            continue
+        tokens = text.split()
+        name = intern(tokens[1]) if len(tokens) > 1 else ''
+        args = tuple(map(intern, tokens[2:]))
+        current = Stanza(intern(tokens[0]), name, args, line_number)
+        for key, value in zip(LEGACY_FIELDS.get(current.kind, ()), args):
+            current.add(key, value)
+        model.add(current)
+    model.line_count = line_number
+    return model
+
+
+def parse_config(config_file: str) -> ConfigModel:
+    with open(config_file, 'r') as file:
+        return parse_lines(file, config_file)
+
+
+def load_config(config) -> ConfigModel:
+    """Accept either a config file path or an already parsed ConfigModel"""
+    if isinstance(config, ConfigModel):
+        return config
+    return parse_config(config)
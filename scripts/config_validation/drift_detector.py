@@ -1,52 +1,173 @@
 from deepdiff import DeepDiff
 import hashlib
-import json
+from collections import deque
 from datetime import datetime
+from typing import Dict, List, Optional
+
+# Options for every DeepDiff call. Without threshold_to_diff_deeper=0 a dict
+# whose keys mostly changed is reported as one values_changed on the dict,
+# which the per-key walk in diff_subtrees cannot reproduce; with it, changes
+# are always reported per key.
+DEEPDIFF_OPTIONS = {'ignore_order': True, 'threshold_to_diff_deeper': 0}
+
+
+class MerkleNode:
+    """
+    Content hash of one config subtree. Dict nodes keep their children by
+    key so a diff can descend only into keys whose hashes differ; lists are
+    hashed order-insensitively to match DeepDiff's ignore_order=True.
+    """
+
+    __slots__ = ('digest', 'children')
+
+    def __init__(self, digest: bytes, children: Optional[Dict] = None):
+        self.digest = digest
+        self.children = children
+
+    def hexdigest(self) -> str:
+        return self.digest.hex()
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def build_merkle_tree(value) -> MerkleNode:
+    if isinstance(value, dict):
+        children = {key: build_merkle_tree(child) for key, child in value.items()}
+        entries = sorted(repr(key).encode() + b'\0' + node.digest for key, node in children.items())
+        return MerkleNode(_digest(b'dict\0' + b''.join(entries)), children)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        digests = sorted(build_merkle_tree(item).digest for item in value)
+        return MerkleNode(_digest(type(value).__name__.encode() + b'\0' + b''.join(digests)))
+    return MerkleNode(_digest(f"{type(value).__name__}:{value!r}".encode()))
+
+
+def _merge_diff(total: Dict, diff: Dict, path: str):
+    """Fold a DeepDiff.to_dict() computed at `path` into total, rewriting its paths"""
+    def rewrite(key):
+        return path + key[len('root'):] if isinstance(key, str) and key.startswith('root') else key
+
+    for change_type, changes in diff.items():
+        if isinstance(changes, dict):
+            total.setdefault(change_type, {}).update(
+                (rewrite(key), change) for key, change in changes.items())
+        else:
+            total.setdefault(change_type, []).extend(rewrite(key) for key in changes)
+
 
 class ConfigDriftDetector:
-    def __init__(self):
+    def __init__(self, journal=None, history_size: int = 1000):
+        """
+        journal is an optional drift_journal.DriftJournal; drift_history
+        then is its in-memory ring of recent events, reloaded on restart.
+        """
         self.baseline_configs = {}
-        self.drift_history = []
-        
+        self.journal = journal
+        self.drift_history = journal.recent if journal is not None else deque(maxlen=history_size)
+
     def compute_config_hash(self, config):
-        config_str = json.dumps(config, sort_keys=True)
-        return hashlib.sha256(config_str.encode()).hexdigest()
-    
+        return build_merkle_tree(config).hexdigest()
+
     def set_baseline(self, config_type, config):
+        tree = build_merkle_tree(config)
         self.baseline_configs[config_type] = {
             'config': config,
-            'hash': self.compute_config_hash(config),
+            'hash': tree.hexdigest(),
+            'tree': tree,
             'timestamp': datetime.now()
         }
-    
+
     def detect_drift(self, config_type, current_config):
         if config_type not in self.baseline_configs:
             raise ValueError(f"No baseline set for {config_type}")
-            
-        baseline = self.baseline_configs[config_type]['config']
-        diff = DeepDiff(baseline, current_config, ignore_order=True)
-        
+
+        baseline = self.baseline_configs[config_type]
+        current_tree = build_merkle_tree(current_config)
+        if current_tree.digest == baseline['tree'].digest:
+            return None
+
+        diff = self.diff_subtrees(baseline['config'], baseline['tree'],
+                                  current_config, current_tree)
         if diff:
             drift_event = {
                 'timestamp': datetime.now(),
                 'config_type': config_type,
-                'changes': diff.to_dict(),
+                'changes': diff,
                 'severity': self._calculate_drift_severity(diff)
             }
-            self.drift_history.append(drift_event)
+            if self.journal is not None:
+                self.journal.append(drift_event)
+            else:
+                self.drift_history.append(drift_event)
             return drift_event
         return None
-    
+
+    def query_history(self, config_type=None, since=None, until=None, limit=None):
+        """Drift events, oldest first; served from the journal when there is one"""
+        if self.journal is not None:
+            return self.journal.query(config_type, since, until, limit)
+        since = since.timestamp() if isinstance(since, datetime) else since
+        until = until.timestamp() if isinstance(until, datetime) else until
+        events = [event for event in self.drift_history
+                  if (config_type is None or event['config_type'] == config_type)
+                  and (since is None or event['timestamp'].timestamp() >= since)
+                  and (until is None or event['timestamp'].timestamp() <= until)]
+        return events[-limit:] if limit else events
+
+    def diff_subtrees(self, old, old_tree: MerkleNode, new, new_tree: MerkleNode,
+                      path: str = 'root') -> Dict:
+        """
+        DeepDiff(old, new, **DEEPDIFF_OPTIONS).to_dict(), computed only over
+        the subtrees whose hashes differ. Added and removed keys are read off
+        the trees, dicts present on both sides are descended into, and the
+        remaining changed keys at a level go to a single DeepDiff call over
+        just those keys.
+        """
+        result: Dict = {}
+        if old_tree.digest == new_tree.digest:
+            return result
+        if old_tree.children is None or new_tree.children is None:
+            _merge_diff(result, DeepDiff(old, new, **DEEPDIFF_OPTIONS).to_dict(), path)
+            return result
+
+        removed = [f"{path}[{key!r}]" for key in old if key not in new]
+        added = [f"{path}[{key!r}]" for key in new if key not in old]
+        if removed:
+            result['dictionary_item_removed'] = removed
+        if added:
+            result['dictionary_item_added'] = added
+
+        pending: List = []
+        for key, old_child in old_tree.children.items():
+            new_child = new_tree.children.get(key)
+            if new_child is None or old_child.digest == new_child.digest:
+                continue
+            if old_child.children is not None and new_child.children is not None:
+                # Child paths are already absolute
+                _merge_diff(result, self.diff_subtrees(old[key], old_child, new[key], new_child,
+                                                       f"{path}[{key!r}]"), 'root')
+            else:
+                pending.append(key)
+        if pending:
+            reduced = DeepDiff({key: old[key] for key in pending},
+                               {key: new[key] for key in pending}, **DEEPDIFF_OPTIONS)
+            _merge_diff(result, reduced.to_dict(), path)
+        return result
+
     def _calculate_drift_severity(self, diff):
-        # Implement severity calculation based on change types
+        # Implement severity calculation based on change types. Changes are
+        # counted per key (see DEEPDIFF_OPTIONS), so replacing most of a dict
+        # scores each added and removed key rather than one values_changed
         severity_scores = {
             'dictionary_item_added': 5,
             'dictionary_item_removed': 8,
             'values_changed': 3,
             'type_changes': 10
         }
+        changes_by_type = diff.to_dict() if hasattr(diff, 'to_dict') else diff
         total_score = sum(
             severity_scores.get(change_type, 1) * len(changes)
-            for change_type, changes in diff.to_dict().items()
+            for change_type, changes in changes_by_type.items()
         )
-        return 'HIGH' if total_score > 20 else 'MEDIUM' if total_score > 10 else 'LOW' 
\ No newline at end of file
+        return 'HIGH' if total_score > 20 else 'MEDIUM' if total_score > 10 else 'LOW'
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import argparse
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+SEGMENT_PREFIX = 'drift-'
+DEFAULT_ROTATE_SECONDS = 24 * 3600
+DEFAULT_RETENTION_SECONDS = 90 * 24 * 3600
+DEFAULT_RING_SIZE = 1000
+
+
+def _epoch(value) -> Optional[float]:
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+class _Segment:
+    """
+    One journal file plus its sidecar index. The .jsonl holds one compact
+    event per line; the .idx holds "config_type<TAB>epoch<TAB>offset" per
+    event, so a query reads the small index and seeks straight to matches.
+
+    Indexed epochs never decrease within a segment: an event whose clock
+    stepped back is indexed at the latest epoch already in the segment (or
+    the segment start), so the per-type epoch lists stay sorted for bisect
+    and every indexed epoch falls inside the segment. Such an event matches
+    time-range queries at that clamped epoch; its own timestamp is unchanged.
+    """
+
+    def __init__(self, directory: str, start: int):
+        self.start = start
+        base = os.path.join(directory, f"{SEGMENT_PREFIX}{start}")
+        self.path = f"{base}.jsonl"
+        self.index_path = f"{base}.idx"
+        self.last_epoch = float(start)
+        self._index: Optional[Dict[str, Tuple[List[float], List[int]]]] = None
+
+    def index(self) -> Dict[str, Tuple[List[float], List[int]]]:
+        """config_type -> (epochs, offsets), both in append order"""
+        if self._index is None:
+            self._index = {}
+            try:
+                with open(self.index_path, 'r') as f:
+                    for line in f:
+                        config_type, epoch, offset = line.rstrip('\n').rsplit('\t', 2)
+                        self._add(config_type, float(epoch), int(offset))
+            except FileNotFoundError:
+                pass
+        return self._index
+
+    def _add(self, config_type, epoch, offset):
+        # The .idx keeps raw epochs; clamping here covers appends and index loads alike
+        self.last_epoch = max(self.last_epoch, epoch)
+        epochs, offsets = self._index.setdefault(config_type, ([], []))
+        epochs.append(self.last_epoch)
+        offsets.append(offset)
+
+    def append(self, config_type: str, epoch: float, line: bytes, fsync: bool):
+        self.index()
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(line)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        # The event is written before its index entry; a crash in between
+        # leaves an unindexed line, never an index entry without its event
+        with open(self.index_path, 'a') as f:
+            f.write(f"{config_type}\t{epoch!r}\t{offset}\n")
+        self._add(config_type, epoch, offset)
+
+    def offsets(self, config_type=None, since=None, until=None) -> List[int]:
+        selected = []
+        for name, (epochs, offsets) in self.index().items():
+            if config_type is not None and name != config_type:
+                continue
+            # Indexed epochs are clamped to never decrease, so each list is sorted
+            lo = bisect_left(epochs, since) if since is not None else 0
+            hi = bisect_right(epochs, until) if until is not None else len(epochs)
+            selected.extend(offsets[lo:hi])
+        return sorted(selected)
+
+    def read(self, offsets: List[int]) -> Iterator[Dict]:
+        with open(self.path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield _decode(f.readline())
+
+    def remove(self):
+        for path in (self.path, self.index_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _encode(event: Dict) -> bytes:
+    record = dict(event, timestamp=event['timestamp'].isoformat())
+    # DeepDiff type_changes carry classes; default=str keeps them readable
+    return json.dumps(record, separators=(',', ':'), default=str).encode() + b'\n'
+
+
+def _decode(line: bytes) -> Dict:
+    event = json.loads(line)
+    event['timestamp'] = datetime.fromisoformat(event['timestamp'])
+    return event
+
+
+class DriftJournal:
+    """
+    Append-only on-disk drift history.
+
+    Events go to segment files covering rotate_seconds each; segments that
+    ended more than retention_seconds ago are deleted on rotation. The most
+    recent ring_size events are also kept in memory (and reloaded from disk
+    on start) so the usual "what just changed" question never touches disk.
+    """
+
+    def __init__(self, directory: str, rotate_seconds: int = DEFAULT_ROTATE_SECONDS,
+                 retention_seconds: int = DEFAULT_RETENTION_SECONDS,
+                 ring_size: int = DEFAULT_RING_SIZE, fsync: bool = False):
+        self.directory = directory
+        self.rotate_seconds = rotate_seconds
+        self.retention_seconds = retention_seconds
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self.segments: List[_Segment] = [_Segment(directory, start)
+                                         for start in self._segment_starts()]
+        self.recent: Deque[Dict] = deque(maxlen=ring_size)
+        self._load_recent()
+
+    def _segment_starts(self) -> List[int]:
+        starts = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith('.jsonl'):
+                stem = name[len(SEGMENT_PREFIX):-len('.jsonl')]
+                if stem.isdigit():
+                    starts.append(int(stem))
+        return sorted(starts)
+
+    def _load_recent(self):
+        needed = self.recent.maxlen
+        loaded: List[Dict] = []
+        for segment in reversed(self.segments):
+            if needed is not None and len(loaded) >= needed:
+                break
+            offsets = segment.offsets()
+            if needed is not None:
+                offsets = offsets[-(needed - len(loaded)):]
+            loaded[:0] = segment.read(offsets)
+        self.recent.extend(loaded)
+
+    def _segment_for(self, epoch: float) -> _Segment:
+        start = int(epoch // self.rotate_seconds * self.rotate_seconds)
+        if self.segments and self.segments[-1].start >= start:
+            # Clock stepped back or still inside the current segment
+            return self.segments[-1]
+        segment = _Segment(self.directory, start)
+        self.segments.append(segment)
+        self.enforce_retention(epoch)
+        return segment
+
+    def enforce_retention(self, now: float = None):
+        """Delete segments that ended before the retention window"""
+        cutoff = (time.time() if now is None else now) - self.retention_seconds
+        while len(self.segments) > 1 and self.segments[0].start + self.rotate_seconds < cutoff:
+            self.segments.pop(0).remove()
+
+    def append(self, event: Dict):
+        epoch = event['timestamp'].timestamp()
+        self._segment_for(epoch).append(event['config_type'], epoch, _encode(event), self.fsync)
+        self.recent.append(event)
+
+    def query(self, config_type: str = None, since=None, until=None,
+              limit: int = None) -> List[Dict]:
+        """
+        Events for config_type (all types if None) with since <= timestamp
+        <= until, oldest first; since/until are datetimes, ISO strings or
+        epoch seconds. With limit, the newest `limit` matches are returned.
+        """
+        since, until = _epoch(since), _epoch(until)
+        events: List[Dict] = []
+        for segment in reversed(self.segments):
+            if until is not None and segment.start > until:
+                continue
+            if since is not None and segment.start + self.rotate_seconds < since:
+                break
+            offsets = segment.offsets(config_type, since, until)
+            if limit is not None:
+                offsets = offsets[-(limit - len(events)):] if limit > len(events) else []
+            events[:0] = segment.read(offsets)
+            if limit is not None and len(events) >= limit:
+                break
+        return events
+
+
+def main(directory, config_type=None, since=None, until=None, limit=None):
+    journal = DriftJournal(directory)
+    for event in journal.query(config_type, since, until, limit):
+        changes = sum(len(items) for items in event['changes'].values())
+        print(f"{event['timestamp'].isoformat(sep=' ', timespec='seconds')} "
+              f"{event['config_type']}: {event['severity']}, {changes} changes")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Query a configuration drift journal")
+    parser.add_argument('directory')
+    parser.add_argument('--config-type')
+    parser.add_argument('--since', help="ISO timestamp, e.g. 2024-05-28T00:00")
+    parser.add_argument('--until', help="ISO timestamp")
+    parser.add_argument('--limit', type=int, help="only the newest N matching events")
+    args = parser.parse_args(argv)
+
+    main(args.directory, args.config_type, args.since, args.until, args.limit)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,241 @@
+import time
+import json
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from address_utils import as_values, format_address, merge_intervals, parse_address, parse_ports
+from config_parser import OBJECT, load_config
+
+# Stanza kinds holding address, service or group objects
+OBJECT_KINDS = (OBJECT, 'ADDRESS', 'ADDRESS_GROUP', 'SERVICE', 'SERVICE_GROUP')
+ADDRESS_KEYS = ('ip-netmask', 'ip-range', 'ip-address', 'address')
+MEMBER_KEYS = ('member', 'members', 'static')
+PROTOCOLS = ('tcp', 'udp', 'sctp', 'icmp')
+
+
+def _members(stanza) -> Tuple[str, ...]:
+    members = []
+    for key in MEMBER_KEYS:
+        if key in stanza.attributes:
+            for value in as_values(stanza.attributes[key]):
+                members.extend(value.replace(',', ' ').split())
+    return tuple(members)
+
+
+def _service_ports(stanza) -> Optional[Dict[str, Tuple]]:
+    """{protocol: merged port intervals} for a service object, None if not one"""
+    attributes = stanza.attributes
+    if 'protocol' not in attributes and 'service' not in attributes:
+        return None
+    protocol = attributes.get('protocol')
+    ports = attributes.get('port') or attributes.get('destination-port')
+    entries = []
+    if protocol and ports:
+        entries = [(protocol.lower(), part) for value in as_values(ports)
+                   for part in value.split(',')]
+    for value in as_values(attributes.get('service')):
+        # 'tcp/80' or 'udp/5000-5100'
+        name, _, part = value.partition('/')
+        if name.lower() in PROTOCOLS and part:
+            entries.append((name.lower(), part))
+    if not entries:
+        return None
+    by_protocol = defaultdict(list)
+    for protocol, part in entries:
+        intervals = parse_ports(part.strip())
+        if intervals is None:
+            return None
+        by_protocol[protocol].extend(intervals)
+    return {protocol: tuple(merge_intervals(intervals)) for protocol, intervals in by_protocol.items()}
+
+
+class ObjectNormalizer:
+    """
+    Canonical forms of address, service and group objects:
+      ('address', intervals, fqdns) -- merged IPv4 intervals plus FQDNs
+      ('service', ((protocol, intervals), ...))
+    Groups resolve to the same forms as the union of their members, so a
+    group and a plain object covering the same values are equivalent.
+    """
+
+    def __init__(self, stanzas):
+        self.stanzas = {}
+        for stanza in stanzas:
+            # With duplicate names the last definition wins, as on commit
+            self.stanzas[stanza.name] = stanza
+        self.forms: Dict[str, Optional[tuple]] = {}
+        self._resolving = set()
+
+    def canonical(self, name: str) -> Optional[tuple]:
+        if name in self.forms:
+            return self.forms[name]
+        if name in self._resolving:
+            return None  # group cycle
+        self._resolving.add(name)
+        form = self._normalize(self.stanzas[name]) if name in self.stanzas else None
+        self._resolving.discard(name)
+        self.forms[name] = form
+        return form
+
+    def _normalize(self, stanza) -> Optional[tuple]:
+        members = _members(stanza)
+        if members:
+            return self._union([self.canonical(member) if member in self.stanzas
+                                else _literal(member) for member in members])
+        services = _service_ports(stanza)
+        if services is not None:
+            return ('service', tuple(sorted(services.items())))
+        fqdn = stanza.get('fqdn')
+        if isinstance(fqdn, str):
+            return ('address', (), (fqdn.lower().rstrip('.'),))
+        for key in ADDRESS_KEYS:
+            value = stanza.get(key)
+            if value:
+                return _literal(value) if isinstance(value, str) else self._union(map(_literal, value))
+        if stanza.args:
+            # One-line form: "OBJECT name <address>"
+            return _literal(stanza.args[0])
+        return None
+
+    @staticmethod
+    def _union(forms) -> Optional[tuple]:
+        forms = list(forms)
+        if not forms or any(form is None for form in forms):
+            return None
+        kinds = {form[0] for form in forms}
+        if len(kinds) != 1:
+            return None  # mixed address/service group
+        if kinds == {'address'}:
+            intervals = merge_intervals(i for form in forms for i in form[1])
+            fqdns = sorted({fqdn for form in forms for fqdn in form[2]})
+            return ('address', tuple(intervals), tuple(fqdns))
+        by_protocol = defaultdict(list)
+        for form in forms:
+            for protocol, intervals in form[1]:
+                by_protocol[protocol].extend(intervals)
+        return ('service', tuple(sorted((protocol, tuple(merge_intervals(intervals)))
+                                        for protocol, intervals in by_protocol.items())))
+
+
+def _literal(value: str) -> Optional[tuple]:
+    interval = parse_address(value)
+    if interval is not None:
+        return ('address', (interval,), ())
+    protocol, _, ports = value.partition('/')
+    if protocol.lower() in PROTOCOLS and ports:
+        intervals = parse_ports(ports)
+        if intervals is not None:
+            return ('service', ((protocol.lower(), tuple(merge_intervals(intervals))),))
+    return None
+
+
+def _format(form: tuple) -> str:
+    def intervals(values, render):
+        return ','.join(render(lo) if lo == hi else f"{render(lo)}-{render(hi)}" for lo, hi in values)
+
+    if form[0] == 'address':
+        return ' '.join(filter(None, [intervals(form[1], format_address), ','.join(form[2])]))
+    return ' '.join(f"{protocol}/{intervals(ports, str)}" for protocol, ports in form[1])
+
+
+def _containment(classes: Dict[tuple, List[str]]) -> List[Dict]:
+    """
+    Objects whose values lie inside another, non-equivalent object. One
+    sweep per value space (addresses, and ports per protocol) over intervals
+    sorted by (start, -end): an interval is contained if the widest-reaching
+    interval seen so far ends at or after it. Only contiguous objects are
+    checked as the contained side; any object can be the container.
+    """
+    spaces = defaultdict(list)
+    for form, names in classes.items():
+        if form[0] == 'address':
+            if form[2]:
+                continue  # FQDNs have no interval to compare
+            for lo, hi in form[1]:
+                spaces['address'].append((lo, -hi, len(form[1]) == 1, names[0]))
+        elif len(form[1]) == 1:
+            protocol, ports = form[1][0]
+            for lo, hi in ports:
+                spaces[protocol].append((lo, -hi, len(ports) == 1, names[0]))
+        else:
+            for protocol, ports in form[1]:
+                for lo, hi in ports:
+                    spaces[protocol].append((lo, -hi, False, names[0]))
+
+    contained = []
+    for space, intervals in spaces.items():
+        intervals.sort()
+        reach, owner = -1, None
+        for lo, neg_hi, contiguous, name in intervals:
+            hi = -neg_hi
+            if contiguous and owner is not None and owner != name and reach >= hi:
+                contained.append({'object': name, 'container': owner, 'space': space})
+            if hi > reach:
+                reach, owner = hi, name
+    return contained
+
+
+def find_duplicate_objects(config) -> Dict:
+    """
+    Equivalence classes of objects with the same canonical value, objects
+    contained in others, names defined more than once, and objects that
+    could not be normalized. config is a path or a parsed ConfigModel.
+    """
+    model = load_config(config)
+    stanzas = [stanza for kind in OBJECT_KINDS for stanza in model.of_kind(kind)]
+    normalizer = ObjectNormalizer(stanzas)
+
+    classes: Dict[tuple, List[str]] = defaultdict(list)
+    unresolved = []
+    for name in normalizer.stanzas:
+        form = normalizer.canonical(name)
+        if form is None:
+            unresolved.append(name)
+        else:
+            classes[form].append(name)
+
+    counts = defaultdict(int)
+    for stanza in stanzas:
+        counts[stanza.name] += 1
+    return {
+        'objects': len(normalizer.stanzas),
+        'equivalent': [{'value': _format(form), 'objects': names}
+                       for form, names in classes.items() if len(names) > 1],
+        'contained': _containment(classes),
+        'duplicate_names': sorted(name for name, count in counts.items() if count > 1),
+        'unresolved': unresolved
+    }
+
+
+def main(config_file, as_json=False):
+    started = time.perf_counter()
+    result = find_duplicate_objects(config_file)
+    seconds = time.perf_counter() - started
+    if as_json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"Checking for duplicate objects in {config_file}...")
+    if result['duplicate_names']:
+        print("Duplicate objects found:")
+        print('\n'.join(result['duplicate_names']))
+    for group in result['equivalent']:
+        print(f"Equivalent objects ({group['value']}): {', '.join(group['objects'])}")
+    for entry in result['contained']:
+        print(f"Contained: {entry['object']} is covered by {entry['container']}")
+    if result['unresolved']:
+        print(f"Could not normalize: {', '.join(result['unresolved'])}")
+    if not (result['duplicate_names'] or result['equivalent'] or result['contained']):
+        print("No duplicate objects found.")
+    print(f"{result['objects']} objects checked in {seconds:.3f}s")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Find objects that duplicate or contain each other")
+    parser.add_argument('config_file')
+    parser.add_argument('--json', action='store_true', help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    main(args.config_file, args.json)
+
+if __name__ == '__main__':
+    cli()
@@ -2,6 +2,8 @@
 import networkx as nx
 from dataclasses import dataclass
 
+from reachability import ReachabilityIndex
+
 @dataclass
 class ConfigChange:
     component: str
@@ -13,6 +15,7 @@ class ConfigChange:
 class ConfigImpactAnalyzer:
     def __init__(self):
         self.dependency_graph = nx.DiGraph()
+        self.reachability = ReachabilityIndex()
         self.service_map = {}
         self.risk_scores = {
             'security_policy': 8,
@@ -34,6 +37,32 @@ def build_dependency_graph(self, config_components):
         for component in config_components:
             for dep in component.get('dependencies', []):
                 self.dependency_graph.add_edge(component['name'], dep)
+
+        self.reachability = ReachabilityIndex(
+            {node: list(self.dependency_graph.successors(node)) for node in self.dependency_graph}
+        )
+
+    def add_component(self, name, component_type, dependencies=()):
+        """Add or extend one component; the reachability index is updated in place"""
+        self.dependency_graph.add_node(name, type=component_type,
+                                       dependencies=list(dependencies))
+        self.reachability.add_node(name)
+        for dep in dependencies:
+            self.add_dependency(name, dep)
+
+    def add_dependency(self, component, dependency):
+        self.dependency_graph.add_edge(component, dependency)
+        self.reachability.add_edge(component, dependency)
+
+    def remove_dependency(self, component, dependency):
+        if self.dependency_graph.has_edge(component, dependency):
+            self.dependency_graph.remove_edge(component, dependency)
+        self.reachability.remove_edge(component, dependency)
+
+    def remove_component(self, name):
+        if name in self.dependency_graph:
+            self.dependency_graph.remove_node(name)
+        self.reachability.remove_node(name)
     
     def analyze_change_impact(self, proposed_changes: List[ConfigChange]) -> Dict:
         impact_analysis = {
@@ -44,41 +73,63 @@ def analyze_change_impact(self, proposed_changes: List[ConfigChange]) -> Dict:
             'recommendations': []
         }
         
+        # Cascades of the whole change set are unioned as bitsets and only
+        # decoded into component names once
+        cascade_bits = 0
         for change in proposed_changes:
             # Analyze direct impacts
             direct_impact = self._analyze_direct_impact(change)
             
             # Analyze cascading impacts
             cascading_impact = self._analyze_cascading_impact(change)
+            cascade_bits |= cascading_impact['dependent_bits']
             
             # Calculate risk score
             risk_score = self._calculate_risk_score(change, direct_impact, cascading_impact)
             
             impact_analysis['risk_score'] += risk_score
             impact_analysis['affected_components'].update(direct_impact['affected_components'])
-            impact_analysis['service_impact'].update(cascading_impact['service_impact'])
-            impact_analysis['security_impact'].update(cascading_impact['security_impact'])
+            for service in change.affected_services:
+                impact_analysis['service_impact'].setdefault(service, set()).add(change.component)
             
             # Generate recommendations
             recommendations = self._generate_recommendations(
                 change, risk_score, direct_impact, cascading_impact
             )
             impact_analysis['recommendations'].extend(recommendations)
+
+        cascade = self.reachability.decode(cascade_bits)
+        impact_analysis['affected_components'].update(cascade)
+        for component in cascade:
+            for service in self.service_map.get(component, ()):
+                impact_analysis['service_impact'].setdefault(service, set()).add(component)
+            component_type = self.dependency_graph.nodes[component].get('type') \
+                if component in self.dependency_graph else None
+            if component_type in self.risk_scores:
+                impact_analysis['security_impact'][component] = {
+                    'type': component_type,
+                    'risk': self.risk_scores[component_type]
+                }
         
         return impact_analysis
     
     def _analyze_direct_impact(self, change: ConfigChange) -> Dict:
-        # Analyze immediate impact of the change
+        # The component itself and whatever depends on it directly
+        affected = {change.component}
+        if change.component in self.dependency_graph:
+            affected.update(self.dependency_graph.predecessors(change.component))
         return {
-            'affected_components': set(),
+            'affected_components': affected,
             'risk_level': 'LOW'
         }
     
     def _analyze_cascading_impact(self, change: ConfigChange) -> Dict:
-        # Analyze downstream impacts using dependency graph
+        # Everything that transitively depends on the changed component, as
+        # a bitset from the reachability index rather than a graph walk
+        bits = self.reachability.dependent_bits([change.component])
         return {
-            'service_impact': {},
-            'security_impact': {}
+            'dependent_bits': bits,
+            'affected_count': max(0, ReachabilityIndex.count(bits) - 1)
         }
     
     def _calculate_risk_score(self, change: ConfigChange, 
@@ -0,0 +1,273 @@
+import os
+import sys
+import time
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from address_utils import (ANY, APPLICATION_DEFAULT, APPLICATION_PORTS, MAX_ADDRESS, MAX_PORT,
+                           address_intervals, as_values, merge_intervals, parse_address,
+                           service_ports)
+from config_parser import load_config
+from policy_optimizer import load_address_book
+from validate_nat_rules import validate_nat_rules
+from validate_security_policies import validate_security_policies
+
+WORD_BITS = 64
+MAX_BATCH_WORDS = 1 << 22  # bound on the (flows x words) bitset scratch per step
+UNKNOWN_ZONE = 0  # zone code of addresses outside every interface subnet
+
+
+class ZoneMap:
+    """
+    Address-to-zone lookup built from INTERFACE stanzas. Nested subnets
+    resolve to the most specific one, as with a longest-prefix match.
+    """
+
+    def __init__(self, subnets: List[Tuple[int, int, str]] = ()):
+        self.zones: List[str] = [ANY]  # code 0: no interface subnet matched
+        self.codes: Dict[str, int] = {}
+        # Paint wider subnets first so narrower ones overwrite them
+        bounds = {0}
+        for lo, hi, _ in subnets:
+            bounds.update((lo, hi + 1))
+        self.bounds = np.array(sorted(b for b in bounds if b <= MAX_ADDRESS), dtype=np.int64)
+        self.zone_of = np.zeros(len(self.bounds), dtype=np.int32)
+        for lo, hi, zone in sorted(subnets, key=lambda s: s[0] - s[1]):
+            first, last = np.searchsorted(self.bounds, [lo, hi + 1])
+            self.zone_of[first:last] = self.code(zone)
+
+    def code(self, zone: str) -> int:
+        if zone not in self.codes:
+            self.codes[zone] = len(self.zones)
+            self.zones.append(zone)
+        return self.codes[zone]
+
+    @classmethod
+    def from_config(cls, config) -> 'ZoneMap':
+        subnets = []
+        for stanza in load_config(config).interfaces:
+            interval = parse_address(stanza.get('ip-address') or '')
+            if interval is not None and stanza.get('zone'):
+                subnets.append((interval[0], interval[1], stanza.get('zone')))
+        return cls(subnets)
+
+    def lookup(self, addresses) -> np.ndarray:
+        addresses = np.asarray(addresses, dtype=np.int64)
+        return self.zone_of[np.searchsorted(self.bounds, addresses, side='right') - 1]
+
+
+def _rule_ports(record: Dict) -> Optional[List[Tuple[int, int]]]:
+    services = as_values(record.get('service')) or (ANY,)
+    applications = as_values(record.get('application'))
+    # Flows from logs carry no App-ID, so a known application with 'any' or
+    # 'application-default' service is approximated by its default ports
+    if (services in ((ANY,), (APPLICATION_DEFAULT,)) and applications
+            and ANY not in applications
+            and all(app in APPLICATION_PORTS for app in applications)):
+        return merge_intervals(p for app in applications for p in APPLICATION_PORTS[app])
+    return service_ports(services, applications)
+
+
+class _Dimension:
+    """
+    Elementary intervals of one dimension, each mapped to a deduplicated
+    row of a (rows x words) uint64 bitset of the rules matching it.
+    """
+
+    def __init__(self, rule_intervals: List[List[Tuple[int, int]]], max_value: int, words: int):
+        bounds = {0}
+        for intervals in rule_intervals:
+            for lo, hi in intervals:
+                bounds.add(lo)
+                if hi < max_value:
+                    bounds.add(hi + 1)
+        self.bounds = np.array(sorted(bounds), dtype=np.int64)
+        bits = np.zeros((len(self.bounds), words), dtype=np.uint64)
+        for rule, intervals in enumerate(rule_intervals):
+            word, bit = divmod(rule, WORD_BITS)
+            mask = np.uint64(1 << bit)
+            for lo, hi in intervals:
+                first, last = np.searchsorted(self.bounds, [lo, hi + 1])
+                bits[first:last, word] |= mask
+        self.bits, self.row_of = np.unique(bits, axis=0, return_inverse=True)
+        self.row_of = self.row_of.reshape(-1)
+
+    def rows(self, values) -> np.ndarray:
+        return self.row_of[np.searchsorted(self.bounds, values, side='right') - 1]
+
+
+class _Table:
+    """First-match lookup over the rules that apply to one zone pair"""
+
+    def __init__(self, rule_ids: List[int], rules: List[Dict]):
+        self.rule_ids = np.array(rule_ids + [-1], dtype=np.int64)
+        self.words = max(1, -(-len(rule_ids) // WORD_BITS))
+        selected = [rules[i] for i in rule_ids]
+        self.source = _Dimension([r['src'] for r in selected], MAX_ADDRESS, self.words)
+        self.destination = _Dimension([r['dst'] for r in selected], MAX_ADDRESS, self.words)
+        self.port = _Dimension([r['ports'] for r in selected], MAX_PORT, self.words)
+
+    def lookup(self, src, dst, port) -> np.ndarray:
+        out = np.empty(len(src), dtype=np.int64)
+        step = max(1, MAX_BATCH_WORDS // self.words)
+        for start in range(0, len(src), step):
+            stop = start + step
+            bits = self.source.bits[self.source.rows(src[start:stop])]
+            bits &= self.destination.bits[self.destination.rows(dst[start:stop])]
+            bits &= self.port.bits[self.port.rows(port[start:stop])]
+            nonzero = bits != 0
+            first_word = nonzero.argmax(axis=1)
+            word = bits[np.arange(len(bits)), first_word]
+            # Isolate the lowest set bit; as a float it is an exact power of two
+            lowest = word & (~word + np.uint64(1))
+            bit = np.frexp(lowest.astype(np.float64))[1] - 1
+            local = first_word * WORD_BITS + bit
+            local[~nonzero.any(axis=1)] = len(self.rule_ids) - 1  # the -1 sentinel
+            out[start:stop] = self.rule_ids[local]
+        return out
+
+
+class PolicyLookup:
+    """
+    Compiled first-match evaluation of an ordered rule list against batches
+    of flows.
+
+    Rules are split by the zone pair they apply to; within a zone pair each
+    of source address, destination address and destination port is cut
+    into elementary intervals carrying a bitset of matching rules. A flow's
+    matching rules are the AND of its three bitsets, and the lowest set bit
+    is the first match. Tables are compiled lazily for the zone pairs that
+    actually appear in the flows.
+    """
+
+    def __init__(self, records: List[Dict], name_key: str, zones: ZoneMap = None,
+                 address_book: Dict[str, str] = None):
+        self.zones = zones or ZoneMap()
+        self.names = [record[name_key] for record in records]
+        self.rules: List[Dict] = []
+        self.unresolved: List[str] = []
+        for record in records:
+            rule = {
+                'src_zones': self._zone_codes(record.get('source_zone')),
+                'dst_zones': self._zone_codes(record.get('destination_zone')),
+                'src': address_intervals(record.get('source'), address_book),
+                'dst': address_intervals(record.get('destination'), address_book),
+                'ports': _rule_ports(record)
+            }
+            if rule['src'] is None or rule['dst'] is None or rule['ports'] is None:
+                # Cannot be evaluated; it never matches, so later rules may
+                # be credited with its hits
+                self.unresolved.append(record[name_key])
+                rule['src_zones'] = rule['dst_zones'] = frozenset()
+            self.rules.append(rule)
+        self._tables: Dict[Tuple[int, int], _Table] = {}
+
+    def _zone_codes(self, value):
+        zones = as_values(value)
+        if not zones or ANY in zones:
+            return None
+        return frozenset(self.zones.code(zone) for zone in zones)
+
+    @classmethod
+    def from_config(cls, config, kind: str = 'security', zones: ZoneMap = None) -> 'PolicyLookup':
+        """kind is 'security' for SECURITY_POLICY stanzas or 'nat' for NAT_RULE stanzas"""
+        model = load_config(config)
+        if zones is None:
+            zones = ZoneMap.from_config(model)
+        address_book = load_address_book(model)
+        if kind == 'nat':
+            return cls(validate_nat_rules(model), 'rule_name', zones, address_book)
+        return cls(validate_security_policies(model), 'policy_name', zones, address_book)
+
+    def _table(self, src_zone: int, dst_zone: int) -> _Table:
+        key = (src_zone, dst_zone)
+        if key not in self._tables:
+            rule_ids = [i for i, rule in enumerate(self.rules)
+                        if (rule['src_zones'] is None or src_zone in rule['src_zones'])
+                        and (rule['dst_zones'] is None or dst_zone in rule['dst_zones'])]
+            self._tables[key] = _Table(rule_ids, self.rules)
+        return self._tables[key]
+
+    def lookup(self, src, dst, port, src_zone=None, dst_zone=None) -> np.ndarray:
+        """
+        Index of the first matching rule for every flow, or -1. Addresses
+        are packed uint32 IPv4; zone codes are inferred from the interface
+        subnets unless given.
+        """
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        port = np.asarray(port, dtype=np.int64)
+        src_zone = self.zones.lookup(src) if src_zone is None else np.asarray(src_zone)
+        dst_zone = self.zones.lookup(dst) if dst_zone is None else np.asarray(dst_zone)
+
+        pair = src_zone.astype(np.int64) * len(self.zones.zones) + dst_zone
+        out = np.empty(len(src), dtype=np.int64)
+        if not len(src):
+            return out
+        # Group flows by zone pair so each table sees one contiguous batch
+        order = np.argsort(pair, kind='stable')
+        sorted_pairs = pair[order]
+        starts = np.flatnonzero(np.r_[True, sorted_pairs[1:] != sorted_pairs[:-1]])
+        for start, stop in zip(starts, np.r_[starts[1:], len(order)]):
+            members = order[start:stop]
+            table = self._table(*divmod(int(sorted_pairs[start]), len(self.zones.zones)))
+            out[members] = table.lookup(src[members], dst[members], port[members])
+        return out
+
+    def hit_counts(self, rule_ids) -> np.ndarray:
+        """Hits per rule, in rule order"""
+        rule_ids = np.asarray(rule_ids)
+        return np.bincount(rule_ids[rule_ids >= 0], minlength=len(self.rules))
+
+
+def _traffic_frames(log_files):
+    # Flow extraction lives with the log tools and needs pandas, so it is
+    # only imported when flows are replayed from logs
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'log_analysis'))
+    from extract_traffic import iter_traffic_frames
+    for log_file in log_files:
+        yield from iter_traffic_frames(log_file)
+
+
+def main(config_file, log_files, kind='security', interface_config=None):
+    zones = ZoneMap.from_config(interface_config or config_file)
+    lookup = PolicyLookup.from_config(config_file, kind, zones)
+    hits = np.zeros(len(lookup.rules), dtype=np.int64)
+    flows = unmatched = 0
+    seconds = 0.0
+    for frame in _traffic_frames(log_files):
+        started = time.perf_counter()
+        rule_ids = lookup.lookup(frame['source_ip'].to_numpy(), frame['dest_ip'].to_numpy(),
+                                 frame['dest_port'].to_numpy())
+        hits += lookup.hit_counts(rule_ids)
+        seconds += time.perf_counter() - started
+        flows += len(rule_ids)
+        unmatched += int((rule_ids < 0).sum())
+
+    rate = f", {flows / seconds:,.0f} lookups/s" if seconds else ''
+    print(f"{flows} flows replayed against {len(lookup.rules)} rules{rate}")
+    for name, count in zip(lookup.names, hits):
+        print(f"{name}: {count} hits")
+    print(f"No matching rule: {unmatched} flows")
+    unused = [name for name, count in zip(lookup.names, hits) if not count]
+    if unused:
+        print(f"Unused rules: {', '.join(unused)}")
+    if lookup.unresolved:
+        print(f"Not evaluated (unknown addresses or services): {', '.join(lookup.unresolved)}")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Replay logged flows against the rulebase and count rule hits")
+    parser.add_argument('config_file')
+    parser.add_argument('log_files', nargs='+')
+    parser.add_argument('--nat', action='store_true', help="replay against NAT rules instead of security policies")
+    parser.add_argument('--interfaces',
+                        help="config file with the INTERFACE stanzas used to infer zones "
+                             "(default: config_file)")
+    args = parser.parse_args(argv)
+
+    main(args.config_file, args.log_files, 'nat' if args.nat else 'security', args.interfaces)
+
+if __name__ == '__main__':
+    cli()
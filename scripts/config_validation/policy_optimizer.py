@@ -1,12 +1,305 @@
+import json
+import time
+import argparse
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional
+
+from address_utils import (ANY, address_intervals, as_values, covers, interval_cidrs,
+                           service_ports)
+from config_parser import load_config
+from validate_security_policies import validate_security_policies
+
+# Attributes an OBJECT stanza may carry its address in
+OBJECT_ADDRESS_KEYS = ('ip-netmask', 'ip-range', 'ip-address', 'address')
+MERGE_FIELDS = ('source_address', 'destination_address', 'service')
+# Rules matching at most this many ports are indexed under each of them;
+# wider ones under every port at once
+INDEXED_PORTS = 64
+
+
+class _Rule:
+    """A policy compiled to zone/application sets and merged interval lists"""
+
+    __slots__ = ('index', 'name', 'line', 'action', 'src_zones', 'dst_zones', 'apps',
+                 'src', 'dst', 'ports')
+
+    def __init__(self, index: int, policy: Dict, address_book: Dict[str, str]):
+        self.index = index
+        self.name = policy['policy_name']
+        self.line = policy.get('line')
+        self.action = policy.get('action')
+        # None stands for 'any' on the set-valued dimensions
+        self.src_zones = _value_set(policy.get('source_zone'))
+        self.dst_zones = _value_set(policy.get('destination_zone'))
+        self.apps = _value_set(policy.get('application'))
+        self.src = address_intervals(policy.get('source'), address_book)
+        self.dst = address_intervals(policy.get('destination'), address_book)
+        self.ports = service_ports(policy.get('service'), as_values(policy.get('application')))
+
+    @property
+    def resolved(self) -> bool:
+        return self.src is not None and self.dst is not None and self.ports is not None
+
+    def zone_pairs(self):
+        for src_zone in self.src_zones or (ANY,):
+            for dst_zone in self.dst_zones or (ANY,):
+                yield src_zone, dst_zone
+
+    def covers(self, other: '_Rule') -> bool:
+        """True if every packet other matches is matched by this rule"""
+        return (_set_covers(self.src_zones, other.src_zones)
+                and _set_covers(self.dst_zones, other.dst_zones)
+                and _set_covers(self.apps, other.apps)
+                and covers(self.src, other.src)
+                and covers(self.dst, other.dst)
+                and covers(self.ports, other.ports))
+
+
+def _value_set(value) -> Optional[FrozenSet[str]]:
+    values = frozenset(as_values(value))
+    return None if not values or ANY in values else values
+
+
+def _set_covers(outer, inner) -> bool:
+    if outer is None:
+        return True
+    return inner is not None and inner <= outer
+
+
+def _blocks(intervals):
+    return [block for lo, hi in intervals for block in interval_cidrs(lo, hi)]
+
+
+class _CoverIndex:
+    """
+    Earlier rules bucketed by zone pair, application, the CIDR blocks of
+    their source and destination, and port. A rule that covers another must
+    hold a block containing each of the other's blocks, so a lookup only
+    visits the buckets found by truncating one (source, destination) block
+    pair to each prefix-length pair present under the same zone pair. It
+    must also match the other's first port, so of each such pair only the
+    bucket of that port and the one of rules with more than INDEXED_PORTS
+    ports are visited.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[tuple, List[_Rule]] = defaultdict(list)
+        # Per key: (source, destination) prefix lengths -> whether narrow
+        # (True) and wide (False) rules are indexed under them
+        self.lengths: Dict[tuple, Dict[tuple, set]] = defaultdict(lambda: defaultdict(set))
+
+    def add(self, rule: _Rule):
+        src_blocks, dst_blocks = _blocks(rule.src), _blocks(rule.dst)
+        ports = _port_keys(rule.ports)
+        for zone_pair in rule.zone_pairs():
+            for app in rule.apps or (ANY,):
+                key = zone_pair + (app,)
+                lengths = self.lengths[key]
+                for src_base, src_len in src_blocks:
+                    for dst_base, dst_len in dst_blocks:
+                        lengths[src_len, dst_len].add(ports != [None])
+                        for port in ports:
+                            self.buckets[key + (src_base, src_len, dst_base, dst_len,
+                                                port)].append(rule)
+
+    def first_cover(self, rule: _Rule) -> Optional[_Rule]:
+        """Earliest indexed rule covering rule, if any"""
+        src_base, src_len = _blocks(rule.src)[0]
+        dst_base, dst_len = _blocks(rule.dst)[0]
+        src_zone, dst_zone = next(rule.zone_pairs())
+        app = next(iter(rule.apps)) if rule.apps else ANY
+        first_port = rule.ports[0][0]
+        best = None
+        for zs in {src_zone, ANY}:
+            for zd in {dst_zone, ANY}:
+                for a in {app, ANY}:
+                    key = (zs, zd, a)
+                    if key not in self.lengths:
+                        continue
+                    for (ls, ld), kinds in self.lengths[key].items():
+                        if ls > src_len or ld > dst_len:
+                            continue
+                        prefix = key + (_truncate(src_base, ls), ls, _truncate(dst_base, ld), ld)
+                        for port in (first_port if narrow else None for narrow in kinds):
+                            for candidate in self.buckets.get(prefix + (port,), ()):
+                                if best is not None and candidate.index >= best.index:
+                                    break
+                                if candidate.covers(rule):
+                                    best = candidate
+                                    break
+        return best
+
+
+def _port_keys(intervals) -> List[Optional[int]]:
+    """Each port of a narrow port set, or [None] for a wide one"""
+    if sum(hi - lo + 1 for lo, hi in intervals) > INDEXED_PORTS:
+        return [None]
+    return [port for lo, hi in intervals for port in range(lo, hi + 1)]
+
+
+def _truncate(address: int, length: int, bits: int = 32) -> int:
+    return address >> (bits - length) << (bits - length) if length else 0
+
+
+def load_address_book(model) -> Dict[str, str]:
+    """Address object name -> address value, for the OBJECTs of a ConfigModel"""
+    address_book = {}
+    for stanza in model.objects:
+        for key in OBJECT_ADDRESS_KEYS:
+            if stanza.get(key):
+                address_book[stanza.name] = stanza.get(key)
+                break
+        else:
+            if stanza.args:
+                address_book[stanza.name] = stanza.args[0]
+    return address_book
+
+
 class PolicyOptimizer:
     def __init__(self):
         self.policies = []
+        self.address_book: Dict[str, str] = {}
         self.optimization_metrics = {
             'security_score': 0,
             'performance_impact': 0,
             'policy_conflicts': 0
         }
-    
-    def optimize_policies(self):
-        # Implementation for policy optimization
-        pass 
\ No newline at end of file
+
+    def load_policies(self, config):
+        """Load security policies and address objects from a config path or ConfigModel"""
+        model = load_config(config)
+        self.policies = validate_security_policies(model)
+        self.address_book = load_address_book(model)
+        return self
+
+    def optimize_policies(self) -> Dict:
+        """
+        Find rules that can never match and rules that can be merged.
+
+        A rule is shadowed when an earlier rule with a different action
+        covers it, and redundant when the covering rule has the same action.
+        Rules that agree on everything but one of source, destination or
+        service are mergeable, provided no rule with another action sits
+        between them in an overlapping zone pair. Policies whose addresses
+        or services cannot be resolved are reported and left out.
+        """
+        rules = [_Rule(i, policy, self.address_book) for i, policy in enumerate(self.policies)]
+        index = _CoverIndex()
+        report = {'shadowed': [], 'redundant': [], 'mergeable': [], 'unresolved': []}
+        live: List[_Rule] = []
+        for rule in rules:
+            if not rule.resolved:
+                report['unresolved'].append({'rule': rule.name, 'line': rule.line})
+                live.append(rule)
+                continue
+            cover = index.first_cover(rule)
+            if cover is None:
+                index.add(rule)
+                live.append(rule)
+                continue
+            kind = 'redundant' if cover.action == rule.action else 'shadowed'
+            report[kind].append({
+                'rule': rule.name,
+                'line': rule.line,
+                'covered_by': cover.name,
+                'action': rule.action,
+                'covering_action': cover.action
+            })
+        report['mergeable'] = self._mergeable(live)
+        self._update_metrics(len(rules), report)
+        report['metrics'] = dict(self.optimization_metrics)
+        return report
+
+    def _mergeable(self, live: List[_Rule]) -> List[Dict]:
+        # Positions of live rules by expanded zone pair and action; merging
+        # across one of these could change which rule matches first
+        positions = defaultdict(list)
+        for rule in live:
+            for zone_pair in rule.zone_pairs():
+                positions[zone_pair, rule.action].append(rule.index)
+        actions = {rule.action for rule in live}
+        positions_pairs = {pair for pair, _ in positions}
+
+        def blocked(rule, first, last):
+            for src_zone, dst_zone in rule.zone_pairs():
+                pairs = [(src_zone, dst_zone), (src_zone, ANY), (ANY, dst_zone), (ANY, ANY)]
+                if src_zone == ANY or dst_zone == ANY:
+                    # An 'any' side overlaps every zone on that side
+                    pairs = [pair for pair in positions_pairs
+                             if src_zone in (ANY, pair[0]) and dst_zone in (ANY, pair[1])]
+                for pair in pairs:
+                    for action in actions - {rule.action}:
+                        found = positions.get((pair, action))
+                        if found and bisect_right(found, first) < bisect_right(found, last):
+                            return True
+            return False
+
+        signatures = {field: defaultdict(list) for field in MERGE_FIELDS}
+        for rule in live:
+            if not rule.resolved:
+                continue
+            dims = {'source_address': tuple(rule.src), 'destination_address': tuple(rule.dst),
+                    'service': tuple(rule.ports)}
+            common = (rule.src_zones, rule.dst_zones, rule.apps, rule.action)
+            for field in MERGE_FIELDS:
+                key = common + tuple(dims[other] for other in MERGE_FIELDS if other != field)
+                signatures[field][key].append(rule)
+
+        mergeable = []
+        for field in MERGE_FIELDS:
+            for group in signatures[field].values():
+                run = group[:1]
+                for rule in group[1:]:
+                    if blocked(rule, run[-1].index, rule.index):
+                        if len(run) > 1:
+                            mergeable.append({'field': field, 'rules': [r.name for r in run]})
+                        run = [rule]
+                    else:
+                        run.append(rule)
+                if len(run) > 1:
+                    mergeable.append({'field': field, 'rules': [r.name for r in run]})
+        return mergeable
+
+    def _update_metrics(self, total: int, report: Dict):
+        removable = (len(report['shadowed']) + len(report['redundant'])
+                     + sum(len(group['rules']) - 1 for group in report['mergeable']))
+        self.optimization_metrics = {
+            # Share of rules that do what their position suggests
+            'security_score': round(100.0 * (total - len(report['shadowed'])) / total, 1) if total else 100.0,
+            # Share of the rulebase that could be removed or folded away
+            'performance_impact': round(100.0 * min(removable, total) / total, 1) if total else 0.0,
+            'policy_conflicts': len(report['shadowed'])
+        }
+
+
+def main(config_file, as_json=False):
+    started = time.perf_counter()
+    optimizer = PolicyOptimizer().load_policies(config_file)
+    report = optimizer.optimize_policies()
+    seconds = time.perf_counter() - started
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{config_file}: {len(optimizer.policies)} policies analyzed in {seconds:.3f}s")
+    for entry in report['shadowed']:
+        print(f"Shadowed: {entry['rule']} ({entry['action']}) never matches; "
+              f"{entry['covered_by']} ({entry['covering_action']}) covers it")
+    for entry in report['redundant']:
+        print(f"Redundant: {entry['rule']} is covered by {entry['covered_by']}")
+    for group in report['mergeable']:
+        print(f"Mergeable on {group['field']}: {', '.join(group['rules'])}")
+    for entry in report['unresolved']:
+        print(f"Unresolved: {entry['rule']} (line {entry['line']}) has unknown addresses or services")
+    print(f"Metrics: {report['metrics']}")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Find shadowed, redundant and mergeable security policies")
+    parser.add_argument('config_file')
+    parser.add_argument('--json', action='store_true', help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    main(args.config_file, args.json)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,200 @@
+from typing import Dict, Hashable, Iterable, List, Set
+
+
+class ReachabilityIndex:
+    """
+    Transitive closure of a dependency graph, for answering "what does this
+    depend on" and "what depends on this" without walking the graph.
+
+    Strongly connected components are condensed into a DAG; each component
+    stores two Python-int bitsets over node ids: the nodes it reaches and
+    the nodes that reach it. A query is a dict lookup, a batch of queries is
+    an OR of ints, and only the final answer is decoded into node names.
+
+    Adding nodes and acyclic edges updates the bitsets in place. An edge
+    that closes a cycle, or any removal, marks the index stale and it is
+    rebuilt on the next query.
+    """
+
+    def __init__(self, edges: Dict[Hashable, Iterable[Hashable]] = None):
+        self.successors: Dict[Hashable, Set[Hashable]] = {}
+        self.node_ids: Dict[Hashable, int] = {}
+        self.nodes: List[Hashable] = []
+        self.component_of: Dict[Hashable, int] = {}
+        self.reach: List[int] = []       # per component: bits of nodes it reaches
+        self.reached_by: List[int] = []  # per component: bits of nodes reaching it
+        self._stale = False
+        for node, successors in (edges or {}).items():
+            self.successors.setdefault(node, set()).update(successors)
+            for successor in successors:
+                self.successors.setdefault(successor, set())
+        self.rebuild()
+
+    def _node_id(self, node) -> int:
+        if node not in self.node_ids:
+            self.node_ids[node] = len(self.nodes)
+            self.nodes.append(node)
+        return self.node_ids[node]
+
+    def rebuild(self):
+        """Recompute components and closures from self.successors"""
+        self.node_ids, self.nodes = {}, []
+        for node in self.successors:
+            self._node_id(node)
+        components = self._strongly_connected_components()
+        self.component_of = {node: c for c, members in enumerate(components) for node in members}
+        self.reach = [0] * len(components)
+        self.reached_by = [0] * len(components)
+        # Tarjan emits a component only after every component it reaches
+        for c, members in enumerate(components):
+            bits = 0
+            for node in members:
+                bits |= 1 << self.node_ids[node]
+            reach = bits
+            for node in members:
+                for successor in self.successors[node]:
+                    target = self.component_of[successor]
+                    if target != c:
+                        reach |= self.reach[target]
+            self.reach[c] = reach
+            self.reached_by[c] = bits
+        for c in range(len(components) - 1, -1, -1):
+            for node in components[c]:
+                for successor in self.successors[node]:
+                    target = self.component_of[successor]
+                    if target != c:
+                        self.reached_by[target] |= self.reached_by[c]
+        self._stale = False
+
+    def _strongly_connected_components(self) -> List[List[Hashable]]:
+        """Iterative Tarjan; components come out in reverse topological order"""
+        index: Dict[Hashable, int] = {}
+        lowlink: Dict[Hashable, int] = {}
+        on_stack: Set[Hashable] = set()
+        stack: List[Hashable] = []
+        components: List[List[Hashable]] = []
+        for root in self.successors:
+            if root in index:
+                continue
+            work = [(root, iter(self.successors[root]))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, successors = work[-1]
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = len(index)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(self.successors[successor])))
+                        break
+                    if successor in on_stack:
+                        lowlink[node] = min(lowlink[node], index[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        members = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            members.append(member)
+                            if member == node:
+                                break
+                        components.append(members)
+        return components
+
+    def add_node(self, node):
+        if node in self.successors:
+            return
+        self.successors[node] = set()
+        if self._stale:
+            return
+        bit = 1 << self._node_id(node)
+        self.component_of[node] = len(self.reach)
+        self.reach.append(bit)
+        self.reached_by.append(bit)
+
+    def add_edge(self, source, target):
+        """source depends on target"""
+        self.add_node(source)
+        self.add_node(target)
+        if target in self.successors[source]:
+            return
+        self.successors[source].add(target)
+        if self._stale:
+            return
+        source_c, target_c = self.component_of[source], self.component_of[target]
+        if source_c == target_c:
+            return
+        if self.reach[target_c] >> self.node_ids[source] & 1:
+            # target already reaches source: the edge merges components
+            self._stale = True
+            return
+        # Everything reaching source now also reaches whatever target reaches
+        gained = self.reach[target_c]
+        for c in self._components(self.reached_by[source_c]):
+            self.reach[c] |= gained
+        gained = self.reached_by[source_c]
+        for c in self._components(self.reach[target_c]):
+            self.reached_by[c] |= gained
+
+    def remove_edge(self, source, target):
+        if target in self.successors.get(source, ()):
+            self.successors[source].discard(target)
+            self._stale = True
+
+    def remove_node(self, node):
+        if node not in self.successors:
+            return
+        del self.successors[node]
+        for successors in self.successors.values():
+            successors.discard(node)
+        self._stale = True
+
+    def _components(self, bits: int) -> Set[int]:
+        return {self.component_of[node] for node in self.decode(bits)}
+
+    def _ensure(self):
+        if self._stale:
+            self.rebuild()
+
+    def decode(self, bits: int) -> List[Hashable]:
+        """Node names for the set bits of a closure bitset"""
+        nodes = []
+        while bits:
+            low = bits & -bits
+            nodes.append(self.nodes[low.bit_length() - 1])
+            bits ^= low
+        return nodes
+
+    def reach_bits(self, nodes: Iterable[Hashable]) -> int:
+        """Union of what the nodes depend on, themselves included"""
+        self._ensure()
+        bits = 0
+        for node in nodes:
+            if node in self.component_of:
+                bits |= self.reach[self.component_of[node]]
+        return bits
+
+    def dependent_bits(self, nodes: Iterable[Hashable]) -> int:
+        """Union of what depends on the nodes, themselves included"""
+        self._ensure()
+        bits = 0
+        for node in nodes:
+            if node in self.component_of:
+                bits |= self.reached_by[self.component_of[node]]
+        return bits
+
+    def dependencies(self, *nodes) -> Set[Hashable]:
+        return set(self.decode(self.reach_bits(nodes))) - set(nodes)
+
+    def dependents(self, *nodes) -> Set[Hashable]:
+        return set(self.decode(self.dependent_bits(nodes))) - set(nodes)
+
+    @staticmethod
+    def count(bits: int) -> int:
+        return bin(bits).count('1')
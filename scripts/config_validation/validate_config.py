@@ -0,0 +1,70 @@
+import time
+import argparse
+from typing import Dict
+
+from config_parser import NAT_RULE, OBJECT, SECURITY_POLICY, INTERFACE, parse_config
+from validate_nat_rules import check_nat_rules, validate_nat_rules
+from validate_security_policies import validate_security_policies
+
+
+def validate_config(config_file: str) -> Dict:
+    """
+    Parse config_file once and run every validator over the shared model
+    """
+    started = time.perf_counter()
+    model = parse_config(config_file)
+    parse_seconds = time.perf_counter() - started
+
+    nat_rules = validate_nat_rules(model)
+    security_policies = validate_security_policies(model)
+    duplicates = {kind: model.duplicate_names(kind)
+                  for kind in (OBJECT, NAT_RULE, SECURITY_POLICY, INTERFACE)}
+
+    # Zones referenced by rules but not assigned to any interface; only
+    # meaningful when the file defines interfaces at all
+    undefined_zones = []
+    if model.interfaces:
+        defined = {stanza.get('zone') for stanza in model.interfaces}
+        referenced = {rule[key] for rule in nat_rules + security_policies
+                      for key in ('source_zone', 'destination_zone') if rule[key]}
+        undefined_zones = sorted(referenced - defined - {'any'})
+
+    return {
+        'lines': model.line_count,
+        'stanzas': len(model),
+        'parse_seconds': parse_seconds,
+        'nat_rules': nat_rules,
+        'security_policies': security_policies,
+        'duplicates': {kind: names for kind, names in duplicates.items() if names},
+        'undefined_zones': undefined_zones,
+        'nat_findings': check_nat_rules(model)['findings'] if nat_rules else []
+    }
+
+
+def main(config_files):
+    for config_file in config_files:
+        result = validate_config(config_file)
+        print(f"{config_file}: {result['lines']} lines, {result['stanzas']} stanzas "
+              f"parsed in {result['parse_seconds']:.3f}s")
+        print(f"  NAT rules: {len(result['nat_rules'])}, "
+              f"security policies: {len(result['security_policies'])}")
+        for entry in result['nat_rules'] + result['security_policies']:
+            if entry['missing']:
+                name = entry.get('rule_name') or entry.get('policy_name')
+                print(f"  Warning: {name} (line {entry['line']}) missing {', '.join(entry['missing'])}")
+        for kind, names in result['duplicates'].items():
+            print(f"  Duplicate {kind} names: {', '.join(names)}")
+        if result['undefined_zones']:
+            print(f"  Zones not assigned to any interface: {', '.join(result['undefined_zones'])}")
+        for finding in result['nat_findings']:
+            print(f"  NAT {finding['type']}: {finding['detail']}")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Run every config validator over a single parse")
+    parser.add_argument('config_files', nargs='+')
+    args = parser.parse_args(argv)
+
+    main(args.config_files)
+
+if __name__ == '__main__':
+    cli()
@@ -1,34 +1,234 @@
-import sys
-import re
+import json
+import heapq
+import argparse
+from typing import Dict, List
 
-def validate_nat_rules(config_file):
-    with open(config_file, 'r') as file:
-        lines = file.readlines()
+from address_utils import ANY, address_intervals, as_values, covers, format_interval
+from config_parser import load_config
+
+REQUIRED_FIELDS = ('source_zone', 'destination_zone', 'source_address',
+                   'destination_address', 'translated_address')
+
+def validate_nat_rules(config):
+    """config is a config file path or a parsed ConfigModel"""
+    model = load_config(config)
 
     nat_rules = []
-    for line in lines:
-        # regex to match NAT rule entries
-        match = re.match(r'NAT_RULE\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)', line)
-        if match:
-            rule_name, source, destination, translated = match.groups()
-            nat_rules.append({
-                'rule_name': rule_name,
-                'source': source,
-                'destination': destination,
-                'translated': translated
-            })
-    
+    for stanza in model.nat_rules:
+        nat_rules.append({
+            'rule_name': stanza.name,
+            'source': stanza.get('source_address'),
+            'destination': stanza.get('destination_address'),
+            'translated': stanza.get('translated_address'),
+            'source_zone': stanza.get('source_zone'),
+            'destination_zone': stanza.get('destination_zone'),
+            'service': stanza.get('service', 'any'),
+            'nat_type': stanza.get('nat_type'),
+            'line': stanza.line,
+            'missing': stanza.missing(REQUIRED_FIELDS) if not stanza.args else []
+        })
+
     return nat_rules
 
-def main(config_file):
-    nat_rules = validate_nat_rules(config_file)
+
+def nat_type(rule: Dict) -> str:
+    """
+    'destination' if the rule rewrites the destination address, otherwise
+    'source'. An explicit nat_type attribute wins; without one, a rule
+    matching any source and a specific destination is taken as
+    destination NAT.
+    """
+    if rule.get('nat_type') in ('source', 'destination'):
+        return rule['nat_type']
+    sources, destinations = as_values(rule['source']), as_values(rule['destination'])
+    if sources in ((), (ANY,)) and destinations not in ((), (ANY,)):
+        return 'destination'
+    return 'source'
+
+
+def _zone_matches(zone, other) -> bool:
+    return zone in (None, ANY) or other in (None, ANY) or zone == other
+
+
+def _finding(kind: str, severity: str, rules: List[Dict], detail: str) -> Dict:
+    return {
+        'type': kind,
+        'severity': severity,
+        'rules': [rule['rule_name'] for rule in rules],
+        'lines': [rule['line'] for rule in rules],
+        'detail': detail
+    }
+
+
+def _overlapping_pools(rules: List[Dict], pools: Dict[int, list]) -> List[Dict]:
+    """
+    Sweep translated pools sorted by start address, growing a cluster while
+    the next pool starts before the cluster's furthest end. Rules sharing
+    exactly the same source pool are the usual port-translation setup and
+    are not reported.
+    """
+    intervals = sorted((lo, hi, i) for i, pool in pools.items() for lo, hi in pool)
+    findings = []
+    cluster, start, reach = [], None, -1
+
+    def flush():
+        members = sorted(set(cluster))
+        if len(members) < 2:
+            return
+        shared = (len({tuple(pools[i]) for i in members}) == 1
+                  and all(nat_type(rules[i]) == 'source' for i in members))
+        if not shared:
+            findings.append(_finding('overlapping_pools', 'warning', [rules[i] for i in members],
+                                     f"translated addresses overlap in {format_interval(start, reach)}"))
+
+    for lo, hi, i in intervals:
+        if cluster and lo > reach:
+            flush()
+            cluster, reach = [], -1
+        if not cluster:
+            start = lo
+        cluster.append(i)
+        reach = max(reach, hi)
+    flush()
+    return findings
+
+
+def _bidirectional_conflicts(rules: List[Dict], pools: Dict[int, list],
+                             destinations: Dict[int, list], sources: Dict[int, list]) -> List[Dict]:
+    """
+    A source NAT rule A (zone X to Y) and a destination NAT rule B (zone Y
+    to X) conflict when B's original destination overlaps A's translated
+    pool but B forwards to addresses outside A's sources: replies and new
+    inbound connections to the same public address reach different hosts.
+    Candidate pairs come from one sweep over both interval sets with a heap
+    of active intervals per side, so only overlapping pairs are visited.
+    """
+    events = []
+    for i, pool in pools.items():
+        if nat_type(rules[i]) == 'source':
+            events.extend((lo, hi, 0, i) for lo, hi in pool)
+    for i, destination in destinations.items():
+        if nat_type(rules[i]) == 'destination' and i in pools:
+            events.extend((lo, hi, 1, i) for lo, hi in destination)
+    events.sort()
+
+    active = ([], [])  # (end, rule index) heaps of source pools and destinations
+    pairs = set()
+    for lo, hi, side, i in events:
+        other = active[1 - side]
+        while other and other[0][0] < lo:
+            heapq.heappop(other)
+        for _, j in other:
+            pairs.add((i, j) if side == 0 else (j, i))
+        heapq.heappush(active[side], (hi, i))
+
+    findings = []
+    for a, b in sorted(pairs):
+        snat, dnat = rules[a], rules[b]
+        if not (_zone_matches(snat['source_zone'], dnat['destination_zone'])
+                and _zone_matches(snat['destination_zone'], dnat['source_zone'])):
+            continue
+        if a in sources and covers(sources[a], pools[b]):
+            continue
+        findings.append(_finding(
+            'bidirectional_conflict', 'error', [snat, dnat],
+            f"{dnat['rule_name']} forwards {snat['rule_name']}'s pool "
+            f"{snat['translated']} to {dnat['translated']}, outside {snat['source']}"))
+    return findings
+
+
+def _compile(rules: List[Dict], address_book: Dict[str, str]) -> List:
+    """
+    Rules as policy_optimizer _Rules, with the translation standing in for
+    the action, so the security policy cover index applies unchanged
+    """
+    from policy_optimizer import _Rule
+
+    return [_Rule(i, {'policy_name': rule['rule_name'], 'line': rule['line'],
+                      'source_zone': rule['source_zone'],
+                      'destination_zone': rule['destination_zone'],
+                      'source': rule['source'], 'destination': rule['destination'],
+                      'service': rule['service'], 'action': rule['translated']},
+                  address_book)
+            for i, rule in enumerate(rules)]
+
+
+def _unreachable(rules: List[Dict], compiled: List) -> List[Dict]:
+    """NAT rules are first match, so a rule covered by an earlier one never applies"""
+    from policy_optimizer import _CoverIndex
+
+    index = _CoverIndex()
+    findings = []
+    for rule in compiled:
+        if not rule.resolved:
+            continue
+        cover = index.first_cover(rule)
+        if cover is None:
+            index.add(rule)
+            continue
+        findings.append(_finding('unreachable', 'warning', [rules[rule.index], rules[cover.index]],
+                                 f"{rule.name} never matches; {cover.name} covers it"))
+    return findings
+
+
+def check_nat_rules(config) -> Dict:
+    """
+    Overlapping translated pools, bidirectional conflicts and unreachable
+    rules for the NAT rulebase of a config path or parsed ConfigModel.
+    Addresses are compared as merged IPv4 intervals; rules with values that
+    cannot be resolved are reported as 'unresolved' and skipped.
+    """
+    from policy_optimizer import load_address_book
+
+    model = load_config(config)
+    rules = validate_nat_rules(model)
+    address_book = load_address_book(model)
+    compiled = _compile(rules, address_book)
+
+    findings = []
+    sources, destinations, pools = {}, {}, {}
+    for i, rule in enumerate(rules):
+        source, destination = compiled[i].src, compiled[i].dst
+        pool = address_intervals(rule['translated'], address_book) if rule['translated'] else None
+        if source is not None:
+            sources[i] = source
+        if destination is not None:
+            destinations[i] = destination
+        if pool is not None:
+            pools[i] = pool
+        if source is None or destination is None or pool is None:
+            findings.append(_finding('unresolved', 'info', [rule],
+                                     f"{rule['rule_name']} has addresses that cannot be resolved"))
+
+    findings += _overlapping_pools(rules, pools)
+    findings += _bidirectional_conflicts(rules, pools, destinations, sources)
+    findings += _unreachable(rules, compiled)
+    return {'rules': len(rules), 'findings': findings}
+
+
+def main(config, check=False, as_json=False):
+    if as_json:
+        print(json.dumps(check_nat_rules(config), indent=2))
+        return
+    nat_rules = validate_nat_rules(config)
     for rule in nat_rules:
         print(f"Rule: {rule['rule_name']}, Source: {rule['source']}, Destination: {rule['destination']}, Translated: {rule['translated']}")
+        if rule['missing']:
+            print(f"  Warning: line {rule['line']}: missing {', '.join(rule['missing'])}")
+    if check:
+        for finding in check_nat_rules(config)['findings']:
+            print(f"{finding['severity'].upper()}: {finding['type']}: {finding['detail']} "
+                  f"(lines {', '.join(map(str, finding['lines']))})")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="List NAT rules and check them for conflicts")
+    parser.add_argument('config_file')
+    parser.add_argument('--check', action='store_true',
+                        help="report overlapping pools, bidirectional conflicts and unreachable rules")
+    parser.add_argument('--json', action='store_true', help="print the check findings as JSON")
+    args = parser.parse_args(argv)
+
+    main(args.config_file, args.check, args.json)
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python validate_nat_rules.py <config_file>")
-        sys.exit(1)
-    
-    config_file = sys.argv[1]
-    main(config_file)
+    cli()
@@ -1,34 +1,46 @@
 import sys
-import re
 
-def validate_security_policies(config_file):
-    with open(config_file, 'r') as file:
-        lines = file.readlines()
+from config_parser import load_config
+
+REQUIRED_FIELDS = ('source_zone', 'destination_zone', 'source_address',
+                   'destination_address', 'action')
+
+def validate_security_policies(config):
+    """config is a config file path or a parsed ConfigModel"""
+    model = load_config(config)
 
     security_policies = []
-    for line in lines:
-        # regex to match security policy entries
-        match = re.match(r'SECURITY_POLICY\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)', line)
-        if match:
-            policy_name, source, destination, action = match.groups()
-            security_policies.append({
-                'policy_name': policy_name,
-                'source': source,
-                'destination': destination,
-                'action': action
-            })
+    for stanza in model.security_policies:
+        security_policies.append({
+            'policy_name': stanza.name,
+            'source': stanza.get('source_address'),
+            'destination': stanza.get('destination_address'),
+            'action': stanza.get('action'),
+            'source_zone': stanza.get('source_zone'),
+            'destination_zone': stanza.get('destination_zone'),
+            'application': stanza.get('application', 'any'),
+            'service': stanza.get('service', 'any'),
+            'line': stanza.line,
+            'missing': stanza.missing(REQUIRED_FIELDS) if not stanza.args else []
+        })
     
     return security_policies
 
-def main(config_file):
-    security_policies = validate_security_policies(config_file)
+def main(config):
+    security_policies = validate_security_policies(config)
     for policy in security_policies:
         print(f"Policy: {policy['policy_name']}, Source: {policy['source']}, Destination: {policy['destination']}, Action: {policy['action']}")
+        if policy['missing']:
+            print(f"  Warning: line {policy['line']}: missing {', '.join(policy['missing'])}")
 
-if __name__ == '__main__':
-    if len(sys.argv) != 2:
+def cli(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
         print("Usage: python validate_security_policies.py <config_file>")
         sys.exit(1)
-    
-    config_file = sys.argv[1]
+
+    config_file = argv[0]
     main(config_file)
+
+if __name__ == '__main__':
+    cli()
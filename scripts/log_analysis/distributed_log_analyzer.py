@@ -1,11 +1,167 @@
-from pyspark.sql import SparkSession
+import os
+import json
+import argparse
+from collections import Counter
+from typing import Dict, List
+
+from parse_logs import LOG_PATTERN, iter_chunks, ordered_map, split_ranges, to_epoch
+from identify_anomalies import ERROR_LEVELS, TOKEN_MASKS, TOKEN_REGEXES, message_template
+
+
+def _empty_summary() -> Dict:
+    return {
+        'total': 0,
+        'log_levels': Counter(),
+        'sources': Counter(),
+        'time_buckets': Counter(),
+        'errors': Counter()
+    }
+
+
+def _summarize_range(task) -> Dict:
+    """Map step: aggregate one newline-aligned byte range"""
+    path, start, end, bucket_seconds = task
+    summary = _empty_summary()
+    levels, sources, buckets, errors = (summary['log_levels'], summary['sources'],
+                                        summary['time_buckets'], summary['errors'])
+    for chunk in iter_chunks(path, start=start, end=end):
+        for match in LOG_PATTERN.finditer(chunk):
+            timestamp, log_level, source, message = match.groups()
+            summary['total'] += 1
+            levels[log_level] += 1
+            sources[source] += 1
+            epoch = to_epoch(timestamp)
+            buckets[epoch - epoch % bucket_seconds if epoch >= 0 else -1] += 1
+            if log_level in ERROR_LEVELS:
+                errors[message_template(message)] += 1
+    return summary
+
+
+def merge_summaries(total: Dict, partial: Dict) -> Dict:
+    """Reduce step: fold one partial summary into the running total"""
+    total['total'] += partial['total']
+    for key in ('log_levels', 'sources', 'time_buckets', 'errors'):
+        total[key].update(partial[key])
+    return total
+
+
+def _finalize(summary: Dict) -> Dict:
+    return {
+        'total': summary['total'],
+        'log_levels': dict(sorted(summary['log_levels'].items())),
+        'sources': dict(sorted(summary['sources'].items())),
+        'time_buckets': dict(sorted(summary['time_buckets'].items())),
+        'errors': dict(summary['errors'].most_common())
+    }
+
+
+class LocalBackend:
+    """Process-pool map/reduce over files sharded into byte ranges"""
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or os.cpu_count() or 1
+
+    def process(self, log_sources: List[str], bucket_seconds: int) -> Dict:
+        tasks = [(path, start, end, bucket_seconds)
+                 for path, start, end in split_ranges(log_sources, self.workers)]
+        if self.workers > 1:
+            partials = ordered_map(_summarize_range, tasks, self.workers)
+        else:
+            partials = map(_summarize_range, tasks)
+        summary = _empty_summary()
+        for partial in partials:
+            merge_summaries(summary, partial)
+        return _finalize(summary)
+
+
+class SparkBackend:
+    """Spark SQL backend; the session is only created on first use"""
+
+    def __init__(self, app_name: str = "PaloAlto-Log-Analysis", master: str = None):
+        self.app_name = app_name
+        self.master = master
+        self._spark = None
+
+    @property
+    def spark(self):
+        if self._spark is None:
+            from pyspark.sql import SparkSession
+            builder = SparkSession.builder \
+                .appName(self.app_name) \
+                .config("spark.sql.session.timeZone", "UTC")
+            if self.master:
+                builder = builder.master(self.master)
+            self._spark = builder.getOrCreate()
+        return self._spark
+
+    def process(self, log_sources: List[str], bucket_seconds: int) -> Dict:
+        from pyspark.sql import functions as F
+
+        pattern = LOG_PATTERN.pattern
+        parsed = self.spark.read.text(log_sources).select(
+            *(F.regexp_extract('value', pattern, idx).alias(name)
+              for idx, name in enumerate(['timestamp', 'log_level', 'source', 'message'], 1))
+        ).where(F.col('timestamp') != '')
+        epoch = F.unix_timestamp('timestamp', 'yyyy-MM-dd HH:mm:ss')
+        parsed = parsed.withColumn(
+            'bucket', F.coalesce(epoch - epoch % bucket_seconds, F.lit(-1))
+        ).cache()
+
+        template = F.col('message')
+        for name, regex in TOKEN_REGEXES.items():
+            template = F.regexp_replace(template, regex, TOKEN_MASKS[name])
+        errors = parsed.where(F.col('log_level').isin(*ERROR_LEVELS)) \
+            .groupBy(template.alias('template')).count().collect()
+
+        summary = _empty_summary()
+        summary['total'] = parsed.count()
+        for key, column in (('log_levels', 'log_level'), ('sources', 'source'),
+                            ('time_buckets', 'bucket')):
+            summary[key].update({row[column]: row['count']
+                                 for row in parsed.groupBy(column).count().collect()})
+        summary['errors'].update({row['template']: row['count'] for row in errors})
+        parsed.unpersist()
+        return _finalize(summary)
+
+
+BACKENDS = {
+    'local': LocalBackend,
+    'spark': SparkBackend
+}
+
 
 class DistributedLogAnalyzer:
-    def __init__(self):
-        self.spark = SparkSession.builder \
-            .appName("PaloAlto-Log-Analysis") \
-            .getOrCreate()
-            
-    def process_logs(self, log_sources):
-        # Implementation for distributed log processing
-        pass 
\ No newline at end of file
+    def __init__(self, backend='local', **backend_options):
+        if isinstance(backend, str):
+            backend = BACKENDS[backend](**backend_options)
+        self.backend = backend
+
+    def process_logs(self, log_sources, bucket_seconds: int = 60) -> Dict:
+        """
+        Aggregate entry counts per level and source, per time bucket and per
+        error signature over all log_sources.
+        """
+        if isinstance(log_sources, str):
+            log_sources = [log_sources]
+        return self.backend.process(list(log_sources), bucket_seconds)
+
+
+def main(log_sources, backend='local', workers=None, bucket_seconds=60):
+    options = {'workers': workers} if backend == 'local' else {}
+    analyzer = DistributedLogAnalyzer(backend, **options)
+    print(json.dumps(analyzer.process_logs(log_sources, bucket_seconds), indent=2))
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate log statistics across many files")
+    parser.add_argument('log_sources', nargs='+')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='local')
+    parser.add_argument('--workers', type=int,
+                        help="local backend processes (default: all cores)")
+    parser.add_argument('--bucket', type=int, default=60,
+                        help="time bucket width in seconds (default: 60)")
+    args = parser.parse_args(argv)
+
+    main(args.log_sources, args.backend, args.workers, args.bucket)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,234 @@
+import re
+import argparse
+from itertools import chain
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from parse_logs import Categorical, iter_chunks, CHUNK_SIZE
+
+# Traffic and threat lines share the "<event> from <src> to <dst>" shape;
+# traffic lines additionally carry "on port <n>". Octets are captured
+# separately so addresses can be packed without re-splitting strings.
+FLOW_PATTERN = re.compile(
+    r'^\[([^\]]*)\] \[([^\]]*)\] \[([^\]]*)\] (.*?) from '
+    r'(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3}) to '
+    r'(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})'
+    r'(?: on port (\d{1,5}))?',
+    re.M
+)
+
+ACTIONS = ['allow', 'deny', 'alert']
+
+# Well-known ports reported as the flow protocol; anything else is 'port-<n>'
+PORT_PROTOCOLS = {
+    0: 'unknown',
+    22: 'ssh',
+    23: 'telnet',
+    25: 'smtp',
+    53: 'dns',
+    80: 'http',
+    123: 'ntp',
+    443: 'https',
+    3389: 'rdp'
+}
+
+CATEGORY_COLUMNS = ['log_level', 'source', 'event', 'action', 'protocol']
+
+
+def _pack_ipv4(octets):
+    a, b, c, d = (np.asarray(o).astype(np.uint32) for o in octets)
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+def _parse_flow_numbers(fields):
+    """
+    Octets and port as int64 columns plus a mask of the rows whose octets
+    fit in 0-255 and port in 0-65535; the regex alone admits 999 and 99999.
+    The regex caps each number at 5 digits, so they are read straight from
+    fixed-width characters; a missing port reads as 0.
+    """
+    digits = fields[:, 4:13].astype('U5')
+    chars = digits.view(np.uint32).reshape(*digits.shape, 5).astype(np.int64)
+    numbers = np.zeros(digits.shape, dtype=np.int64)
+    for position in range(5):
+        # Shorter numbers are NUL-padded on the right
+        char = chars[..., position]
+        numbers = np.where(char != 0, numbers * 10 + char - ord('0'), numbers)
+    octets, ports = numbers[:, :8].T, numbers[:, 8]
+    valid = (octets <= 0xFF).all(axis=0) & (ports <= 0xFFFF)
+    return octets, ports, valid
+
+
+def ipv4_to_str(values) -> np.ndarray:
+    """Vectorized inverse of the uint32 packing, for display"""
+    values = np.asarray(values, dtype=np.uint32)
+    octets = [((values >> shift) & 0xFF).astype(str) for shift in (24, 16, 8, 0)]
+    out = octets[0]
+    for octet in octets[1:]:
+        out = np.char.add(np.char.add(out, '.'), octet)
+    return out
+
+
+def _categorize(values, mapping):
+    """Map a small set of distinct values through mapping, keeping codes vectorized"""
+    uniques, inverse = np.unique(values, return_inverse=True)
+    codes, categories = pd.factorize(np.array([mapping(v) for v in uniques], dtype=object))
+    return pd.Categorical.from_codes(codes[inverse], categories=categories)
+
+
+def _action(event):
+    if event.startswith('Allowed'):
+        return 'allow'
+    if event.startswith('Denied'):
+        return 'deny'
+    return 'alert'
+
+
+def _frame_from_chunk(chunk) -> Optional[pd.DataFrame]:
+    matches = FLOW_PATTERN.findall(chunk)
+    if not matches:
+        return None
+    # One (rows, groups) array built in C; no per-column transpose in Python
+    fields = np.array(matches, dtype=object)
+    octets, ports, valid = _parse_flow_numbers(fields)
+    if not valid.all():
+        # Skip lines with out-of-range numbers rather than let them wrap
+        fields, octets, ports = fields[valid], octets[:, valid], ports[valid]
+        if not len(ports):
+            return None
+    timestamps, levels, sources, events = fields[:, :4].T
+    ports = ports.astype(np.uint16)
+
+    event = pd.Categorical(events)
+    action_codes = np.array([ACTIONS.index(_action(e)) for e in event.categories], dtype=np.int8)
+    return pd.DataFrame({
+        'log_level': pd.Categorical(levels),
+        'source': pd.Categorical(sources),
+        'event': event,
+        'action': pd.Categorical.from_codes(action_codes[event.codes], categories=ACTIONS),
+        'source_ip': _pack_ipv4(octets[0:4]),
+        'dest_ip': _pack_ipv4(octets[4:8]),
+        'dest_port': ports,
+        'protocol': _categorize(ports, lambda p: PORT_PROTOCOLS.get(int(p), f'port-{p}')),
+        # Log lines carry no byte counters; each line is one session
+        'bytes': np.zeros(len(ports), dtype=np.uint64),
+        'packets': np.ones(len(ports), dtype=np.uint32)
+    }, index=pd.DatetimeIndex(pd.to_datetime(timestamps, format='%Y-%m-%d %H:%M:%S'),
+                              name='timestamp'))
+
+
+def iter_traffic_frames(log_file, chunk_size=CHUNK_SIZE, start=0, end=None) -> Iterator[pd.DataFrame]:
+    """Yield one typed DataFrame per chunk of flow lines in log_file"""
+    for chunk in iter_chunks(log_file, chunk_size, start=start, end=end):
+        frame = _frame_from_chunk(chunk)
+        if frame is not None:
+            yield frame
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'log_level': pd.Categorical([]),
+        'source': pd.Categorical([]),
+        'event': pd.Categorical([]),
+        'action': pd.Categorical([], categories=ACTIONS),
+        'source_ip': np.array([], dtype=np.uint32),
+        'dest_ip': np.array([], dtype=np.uint32),
+        'dest_port': np.array([], dtype=np.uint16),
+        'protocol': pd.Categorical([]),
+        'bytes': np.array([], dtype=np.uint64),
+        'packets': np.array([], dtype=np.uint32)
+    }, index=pd.DatetimeIndex([], name='timestamp'))
+
+
+def concat_traffic_frames(frames) -> pd.DataFrame:
+    """Concatenate chunk frames, unifying categories instead of falling back to object"""
+    frames = list(frames)
+    if not frames:
+        return _empty_frame()
+    if len(frames) == 1:
+        return frames[0]
+    merged = {
+        column: union_categoricals([frame[column] for frame in frames])
+        for column in CATEGORY_COLUMNS
+    }
+    result = pd.concat([frame.drop(columns=CATEGORY_COLUMNS) for frame in frames])
+    for column in CATEGORY_COLUMNS:
+        result[column] = merged[column]
+    return result[frames[0].columns]
+
+
+def extract_traffic(log_files) -> pd.DataFrame:
+    """
+    Build the time-indexed frame TrafficPatternAnalyzer.analyze_traffic expects
+    (source_ip, dest_ip, protocol, bytes, packets) from raw traffic/threat logs.
+    """
+    if isinstance(log_files, str):
+        log_files = [log_files]
+    return concat_traffic_frames(
+        frame for log_file in log_files for frame in iter_traffic_frames(log_file)
+    )
+
+
+def load_traffic(log_file, cache) -> pd.DataFrame:
+    """extract_traffic for one file through a ParseCache: columns are memory-mapped on a hit"""
+    from parse_cache import file_fingerprint
+    fingerprint = file_fingerprint(log_file)
+    entry = cache.load(log_file, 'traffic', fingerprint)
+    if entry is None:
+        categories = {column: Categorical() for column in CATEGORY_COLUMNS}
+        empty = _empty_frame()
+        with cache.writer(log_file, 'traffic', fingerprint=fingerprint) as writer:
+            # The empty frame fixes every column's dtype before real data arrives
+            for frame in chain([empty], iter_traffic_frames(log_file, end=fingerprint.size)):
+                writer.append('timestamp', frame.index.values.astype('datetime64[ns]').view(np.int64))
+                for column in frame.columns:
+                    values = frame[column]
+                    if column in categories:
+                        lookup = np.array([categories[column].code(c) for c in values.cat.categories],
+                                          dtype=np.int32)
+                        writer.append(column, lookup[values.cat.codes.to_numpy()])
+                    else:
+                        writer.append(column, values.to_numpy())
+            writer.meta['categories'] = {column: categorical.categories
+                                         for column, categorical in categories.items()}
+        entry = writer.entry
+
+    data = {}
+    for column in _empty_frame().columns:
+        if column in CATEGORY_COLUMNS:
+            data[column] = pd.Categorical.from_codes(entry[column],
+                                                     categories=entry.meta['categories'][column])
+        else:
+            data[column] = entry[column]
+    return pd.DataFrame(data, index=pd.DatetimeIndex(entry['timestamp'].view('datetime64[ns]'),
+                                                     name='timestamp'))
+
+
+def main(log_files, cache_dir=None):
+    if cache_dir:
+        from parse_cache import ParseCache
+        cache = ParseCache(cache_dir)
+        traffic = concat_traffic_frames(load_traffic(log_file, cache) for log_file in log_files)
+    else:
+        traffic = extract_traffic(log_files)
+    print(traffic.dtypes.to_string())
+    print(f"{len(traffic)} flows, {traffic.memory_usage(deep=True).sum()} bytes in memory")
+    print(traffic.assign(
+        source_ip=ipv4_to_str(traffic['source_ip']),
+        dest_ip=ipv4_to_str(traffic['dest_ip'])
+    ).head(20).to_string())
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Extract typed flow columns from traffic/threat logs")
+    parser.add_argument('log_files', nargs='+')
+    parser.add_argument('--cache-dir',
+                        help="reuse (or build) memory-mapped extraction results in this directory")
+    args = parser.parse_args(argv)
+
+    main(args.log_files, args.cache_dir)
+
+if __name__ == '__main__':
+    cli()
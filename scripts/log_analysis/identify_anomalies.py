@@ -1,29 +1,273 @@
-import sys
 import re
+import time
+import heapq
+import argparse
 from collections import Counter
+from functools import lru_cache, partial
 
-def identify_anomalies(log_file):
-    with open(log_file, 'r') as file:
-        logs = file.readlines()
+from parse_logs import iter_chunks, ordered_map, split_ranges, time_range_bytes
+from time_index import in_range, normalize_bound
+from tail_logs import LogFollower
 
-    error_pattern = re.compile(r'\[(.*?)\] \[(ERROR|CRITICAL)\] \[(.*?)\] (.*)')
-    errors = [log for log in logs if error_pattern.match(log)]
+ERROR_LEVELS = ('ERROR', 'CRITICAL')
+ERROR_PATTERN = re.compile(r'^\[(.*?)\] \[(%s)\] \[(.*?)\] (.*)' % '|'.join(ERROR_LEVELS), re.M)
 
-    # Counting occurrences of each error message
-    error_messages = [error_pattern.match(log).group(4) for log in errors]
-    error_counts = Counter(error_messages)
+# Variable tokens masked out of messages so that e.g. every "Failed login
+# from <IP>" line lands on the same signature. Order matters: IPs before
+# hex IDs before plain numbers.
+TOKEN_REGEXES = {
+    'ip': r'\b\d{1,3}(?:\.\d{1,3}){3}(?:/\d{1,2}|:\d{1,5})?\b',
+    'hex': r'\b0x[0-9a-fA-F]+\b|\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{8,}\b',
+    'num': r'\b\d+\b'
+}
+TOKEN_PATTERN = re.compile('|'.join(f'(?P<{name}>{regex})' for name, regex in TOKEN_REGEXES.items()))
+TOKEN_MASKS = {'ip': '<IP>', 'hex': '<HEX>', 'num': '<NUM>'}
 
+
+@lru_cache(maxsize=65536)
+def message_template(message):
+    """Stable signature for a message with IPs, hex IDs and numbers masked"""
+    return TOKEN_PATTERN.sub(lambda match: TOKEN_MASKS[match.lastgroup], message)
+
+
+class SpaceSaving:
+    """
+    Space-saving top-k summary (Metwally et al.).
+
+    Tracks at most `capacity` keys. A key's reported count overestimates its
+    true count by at most its `error`, and any key whose true count exceeds
+    total / capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        # One (count, key) entry per tracked key; entries may lag behind
+        # `counts` and are refreshed lazily when the minimum is needed
+        self._heap = []
+
+    def _pop_min(self):
+        while True:
+            count, key = heapq.heappop(self._heap)
+            current = self.counts[key]
+            if current == count:
+                return count, key
+            heapq.heappush(self._heap, (current, key))
+
+    def add(self, key, weight=1):
+        self.total += weight
+        if key in self.counts:
+            self.counts[key] += weight
+            return
+        error = 0
+        if len(self.counts) >= self.capacity:
+            error, evicted = self._pop_min()
+            del self.counts[evicted]
+            del self.errors[evicted]
+        self.counts[key] = error + weight
+        self.errors[key] = error
+        heapq.heappush(self._heap, (error + weight, key))
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def floor(self):
+        """Largest count an untracked key could have"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def merge(self, other):
+        """Fold another summary into this one (mergeable summaries, Agarwal et al.)"""
+        own_floor, other_floor = self.floor(), other.floor()
+        counts, errors = {}, {}
+        for key in list(self.counts) + [key for key in other.counts if key not in self.counts]:
+            counts[key] = (self.counts.get(key, own_floor)
+                           + other.counts.get(key, other_floor))
+            errors[key] = (self.errors.get(key, own_floor)
+                           + other.errors.get(key, other_floor))
+        kept = sorted(counts, key=lambda key: (-counts[key], key))[:self.capacity]
+        self.total += other.total
+        self.counts = {key: counts[key] for key in kept}
+        self.errors = {key: errors[key] for key in kept}
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def to_dict(self):
+        return {'capacity': self.capacity, 'total': self.total,
+                'counts': self.counts, 'errors': self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls(data['capacity'])
+        summary.total = data['total']
+        summary.counts = dict(data['counts'])
+        summary.errors = dict(data['errors'])
+        summary._heap = [(count, key) for key, count in summary.counts.items()]
+        heapq.heapify(summary._heap)
+        return summary
+
+    def top(self, n=None):
+        """[(key, count, error)] by descending count"""
+        ranked = sorted(self.counts, key=lambda key: (-self.counts[key], key))
+        return [(key, self.counts[key], self.errors[key]) for key in ranked[:n]]
+
+
+def _error_messages(chunks, template, since=None, until=None):
+    for chunk in chunks:
+        for match in ERROR_PATTERN.finditer(chunk):
+            if (since or until) and not in_range(match.group(1), since, until):
+                continue
+            yield message_template(match.group(4)) if template else match.group(4)
+
+def _count_errors(chunks, template=True, top_k=None, since=None, until=None):
+    error_counts = Counter() if top_k is None else SpaceSaving(top_k)
+    error_counts.update(_error_messages(chunks, template, since, until))
+    return error_counts
+
+def _count_range(task, template=True, top_k=None):
+    path, start, end = task
+    return _count_errors(iter_chunks(path, start=start, end=end), template, top_k)
+
+def _merge_counts(total, partial_counts):
+    if isinstance(total, SpaceSaving):
+        return total.merge(partial_counts)
+    total.update(partial_counts)
+    return total
+
+def identify_anomalies(log_file, template=True, top_k=None, since=None, until=None):
+    """
+    Count error/critical messages, one chunk at a time.
+
+    With template=True messages are reduced to signatures first. With top_k
+    set, a fixed-size SpaceSaving summary replaces the unbounded Counter.
+    since/until restrict counting to a time window, reading only the bytes
+    the file's sparse time index points at.
+    """
+    since, until = normalize_bound(since), normalize_bound(until)
+    start, end = time_range_bytes(log_file, since, until)
+    return _count_errors(iter_chunks(log_file, start=start, end=end), template, top_k,
+                         since, until)
+
+def identify_anomalies_cached(log_file, cache, template=True, top_k=None):
+    """Count from cached parse columns, decoding only the error rows' messages"""
+    import numpy as np
+    from parse_cache import load_log_columns
+
+    columns = load_log_columns(log_file, cache)
+    rows = np.flatnonzero(columns.level_mask(ERROR_LEVELS))
+    messages = columns.messages(rows)
+    error_counts = Counter() if top_k is None else SpaceSaving(top_k)
+    error_counts.update(map(message_template, messages) if template else messages)
     return error_counts
 
-def main(log_file):
-    anomalies = identify_anomalies(log_file)
+def identify_anomalies_parallel(log_files, workers, template=True, top_k=None):
+    # Per-range results are merged in file order, so the result (including
+    # its iteration order) is identical on every run
+    error_counts = Counter() if top_k is None else SpaceSaving(top_k)
+    count_range = partial(_count_range, template=template, top_k=top_k)
+    for partial_counts in ordered_map(count_range, split_ranges(log_files, workers), workers):
+        error_counts = _merge_counts(error_counts, partial_counts)
+    return error_counts
+
+def follow_anomalies(log_files, checkpoint, template=True, top_k=None,
+                     interval=60.0, once=False):
+    """
+    Tail log_files and keep cumulative error counts, checkpointing byte
+    offsets and counts together after every cycle so a restart resumes at
+    the first unread line. Yields the running counts after each cycle.
+    """
+    follower = LogFollower(log_files, checkpoint)
+    options = {'template': template, 'top_k': top_k}
+    saved = follower.state
+    if saved and saved.get('options') != options:
+        raise ValueError(f"Checkpoint {checkpoint} was written with options "
+                         f"{saved.get('options')}, not {options}")
+    if top_k is None:
+        error_counts = Counter(saved.get('counts', {}))
+    else:
+        error_counts = (SpaceSaving.from_dict(saved['counts']) if saved
+                        else SpaceSaving(top_k))
+
+    while True:
+        error_counts.update(_error_messages(follower.poll(), template))
+        follower.state = {
+            'options': options,
+            'counts': error_counts if top_k is None else error_counts.to_dict()
+        }
+        follower.save()
+        yield error_counts
+        if once:
+            return
+        time.sleep(interval)
+
+def print_anomalies(anomalies):
+    if isinstance(anomalies, SpaceSaving):
+        for error, count, bound in anomalies.top():
+            print(f"{error}: {count} occurrences (overestimated by at most {bound})")
+        return
     for error, count in anomalies.items():
         print(f"{error}: {count} occurrences")
 
+def main(log_files, workers=1, template=True, top_k=None,
+         follow=False, checkpoint=None, interval=60.0, once=False, cache_dir=None,
+         since=None, until=None):
+    if follow:
+        for anomalies in follow_anomalies(log_files, checkpoint, template, top_k,
+                                          interval, once):
+            print_anomalies(anomalies)
+        return
+    if cache_dir:
+        from parse_cache import ParseCache
+        cache = ParseCache(cache_dir)
+        anomalies = Counter() if top_k is None else SpaceSaving(top_k)
+        for log_file in log_files:
+            anomalies = _merge_counts(
+                anomalies, identify_anomalies_cached(log_file, cache, template, top_k))
+    elif workers > 1 and not (since or until):
+        anomalies = identify_anomalies_parallel(log_files, workers, template, top_k)
+    else:
+        anomalies = Counter() if top_k is None else SpaceSaving(top_k)
+        for log_file in log_files:
+            anomalies = _merge_counts(
+                anomalies, identify_anomalies(log_file, template, top_k, since, until))
+    print_anomalies(anomalies)
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Count error and critical log messages")
+    parser.add_argument('log_files', nargs='+')
+    parser.add_argument('--workers', type=int, default=1,
+                        help="count byte ranges in this many processes (default: 1; "
+                             "time-window queries always read sequentially)")
+    parser.add_argument('--raw', action='store_true',
+                        help="count raw messages instead of masked signatures")
+    parser.add_argument('--top-k', type=int,
+                        help="keep a fixed-size summary of the K heaviest signatures")
+    parser.add_argument('--follow', action='store_true',
+                        help="tail the files, counting only newly appended lines")
+    parser.add_argument('--checkpoint',
+                        help="offsets/counts file used by --follow to resume after restarts")
+    parser.add_argument('--interval', type=float, default=60.0,
+                        help="seconds between --follow polls (default: 60)")
+    parser.add_argument('--once', action='store_true',
+                        help="with --follow, run a single incremental cycle and exit")
+    parser.add_argument('--cache-dir',
+                        help="reuse (or build) memory-mapped parse results in this directory")
+    parser.add_argument('--since', help="first timestamp to include, e.g. '2024-05-28 12:30'")
+    parser.add_argument('--until', help="last timestamp to include (prefix match)")
+    args = parser.parse_args(argv)
+    if args.once and not args.follow:
+        parser.error("--once requires --follow")
+    if (args.since or args.until) and (args.follow or args.cache_dir):
+        parser.error("--since/--until cannot be combined with --follow or --cache-dir")
+
+    main(args.log_files, args.workers, not args.raw, args.top_k,
+         args.follow, args.checkpoint, args.interval, args.once, args.cache_dir,
+         args.since, args.until)
+
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python identify_anomalies.py <log_file>")
-        sys.exit(1)
-    
-    log_file = sys.argv[1]
-    main(log_file)
+    cli()
@@ -1,19 +1,248 @@
-import tensorflow as tf
+import os
+import json
+import time
+import zlib
+import argparse
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
 from sklearn.preprocessing import StandardScaler
 
+from parse_logs import LogBatch, parse_log_batches
+from identify_anomalies import ERROR_LEVELS
+
+SOURCE_BUCKETS = 16  # sources are hashed into a fixed one-hot width
+SECONDS_PER_DAY = 86400
+
+
+def extract_features(batch: LogBatch, previous_timestamp: int = None,
+                     source_buckets: int = SOURCE_BUCKETS) -> np.ndarray:
+    """
+    Vectorized features for a parsed batch: time of day and day of week on
+    the unit circle, log inter-arrival gap, log message length and a hashed
+    one-hot of the log source. The level is left out since it is the
+    default training label.
+    """
+    timestamps = np.frombuffer(batch.timestamps, dtype=np.int64).astype(np.float64)
+    day_angle = 2 * np.pi * (timestamps % SECONDS_PER_DAY) / SECONDS_PER_DAY
+    week_angle = 2 * np.pi * ((timestamps // SECONDS_PER_DAY) % 7) / 7
+    previous = timestamps[0] if previous_timestamp is None else previous_timestamp
+    gaps = np.diff(timestamps, prepend=previous).clip(min=0)
+    lengths = np.fromiter(map(len, batch.messages), dtype=np.float64, count=len(batch))
+
+    # Hash each source category once; codes then index the bucket table
+    bucket_of = np.array([zlib.crc32(source.encode()) % source_buckets
+                          for source in batch.source_categories], dtype=np.intp)
+    sources = np.zeros((len(batch), source_buckets), dtype=np.float32)
+    if len(bucket_of):
+        codes = np.frombuffer(batch.sources, dtype=np.uint32)
+        sources[np.arange(len(batch)), bucket_of[codes]] = 1.0
+
+    dense = np.column_stack([
+        np.sin(day_angle), np.cos(day_angle),
+        np.sin(week_angle), np.cos(week_angle),
+        np.log1p(gaps), np.log1p(lengths)
+    ]).astype(np.float32)
+    return np.hstack([dense, sources])
+
+
+def error_labels(batch: LogBatch) -> np.ndarray:
+    """Default label: 1.0 for ERROR/CRITICAL entries"""
+    error_codes = [code for code, level in enumerate(batch.level_categories)
+                   if level in ERROR_LEVELS]
+    return np.isin(np.frombuffer(batch.log_levels, dtype=np.uint32),
+                   error_codes).astype(np.float32)
+
+
+def _rebatch(arrays: Iterable[Tuple[np.ndarray, ...]], batch_size: int) -> Iterator[Tuple[np.ndarray, ...]]:
+    """Regroup variable-size array tuples into fixed batch_size rows (last may be short)"""
+    pending: List[Tuple[np.ndarray, ...]] = []
+    pending_rows = 0
+    for parts in arrays:
+        pending.append(parts)
+        pending_rows += len(parts[0])
+        while pending_rows >= batch_size:
+            merged = tuple(np.concatenate(column) for column in zip(*pending))
+            yield tuple(column[:batch_size] for column in merged)
+            pending = [tuple(column[batch_size:] for column in merged)]
+            pending_rows -= batch_size
+    if pending_rows:
+        yield tuple(np.concatenate(column) for column in zip(*pending))
+
+
 class AnomalyDetector:
-    def __init__(self):
-        self.model = tf.keras.Sequential([
-            tf.keras.layers.Dense(64, activation='relu'),
-            tf.keras.layers.Dense(32, activation='relu'),
-            tf.keras.layers.Dense(16, activation='relu'),
-            tf.keras.layers.Dense(1, activation='sigmoid')
-        ])
-        
-    def train(self, log_data):
-        # Implementation for training the model
-        pass
-
-    def predict_anomalies(self, current_data):
-        # Implementation for prediction
-        pass 
\ No newline at end of file
+    def __init__(self, source_buckets: int = SOURCE_BUCKETS, cpu_only: bool = True):
+        self.source_buckets = source_buckets
+        self.cpu_only = cpu_only
+        self.scaler = StandardScaler()
+        self.batch_stats: List[Dict] = []
+        self._model = None
+
+    @property
+    def model(self):
+        # TensorFlow is only imported once a model is actually needed
+        if self._model is None:
+            tf = self._tensorflow()
+            self._model = tf.keras.Sequential([
+                tf.keras.Input(shape=(6 + self.source_buckets,)),
+                tf.keras.layers.Dense(64, activation='relu'),
+                tf.keras.layers.Dense(32, activation='relu'),
+                tf.keras.layers.Dense(16, activation='relu'),
+                tf.keras.layers.Dense(1, activation='sigmoid')
+            ])
+            self._model.compile(optimizer='adam', loss='binary_crossentropy',
+                                metrics=['accuracy'])
+        return self._model
+
+    def _tensorflow(self):
+        import tensorflow as tf
+        if self.cpu_only:
+            try:
+                tf.config.set_visible_devices([], 'GPU')
+            except RuntimeError:
+                pass  # devices already initialized by an earlier model
+        return tf
+
+    def _log_batches(self, log_data) -> Iterator[LogBatch]:
+        if isinstance(log_data, str):
+            return parse_log_batches(log_data)
+        return iter(log_data)
+
+    def _features(self, batches: Iterable[LogBatch],
+                  label_fn: Callable = None) -> Iterator[Tuple[np.ndarray, ...]]:
+        previous = None
+        for batch in batches:
+            if not len(batch):
+                continue
+            features = extract_features(batch, previous, self.source_buckets)
+            previous = batch.timestamps[-1]
+            yield (features, label_fn(batch)) if label_fn else (features,)
+
+    def _record(self, phase, rows, started):
+        seconds = time.perf_counter() - started
+        self.batch_stats.append({
+            'phase': phase,
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else float('inf')
+        })
+
+    def train(self, log_data, epochs: int = 1, batch_size: int = 1024,
+              label_fn: Callable = error_labels) -> Dict:
+        """
+        Stream log_data (a log file path, or an iterable of LogBatch) through
+        fixed-size mini-batches. Paths are re-parsed on every epoch; a
+        one-shot iterable only supports a single epoch. The scaler is fitted
+        incrementally as batches arrive during the first epoch; ValueError is
+        raised if that epoch yields no entries.
+        """
+        history = {'loss': [], 'accuracy': []}
+        for epoch in range(epochs):
+            loss = accuracy = float('nan')
+            batches = self._log_batches(log_data)
+            for features, labels in _rebatch(self._features(batches, label_fn), batch_size):
+                started = time.perf_counter()
+                if epoch == 0:
+                    self.scaler.partial_fit(features)
+                loss, accuracy = self.model.train_on_batch(
+                    self.scaler.transform(features).astype(np.float32), labels)
+                self._record('train', len(features), started)
+            if epoch == 0:
+                self._check_fitted()
+            history['loss'].append(float(loss))
+            history['accuracy'].append(float(accuracy))
+        return history
+
+    def iter_scores(self, current_data, batch_size: int = 8192) -> Iterator[np.ndarray]:
+        """Yield anomaly probabilities for each fixed-size inference batch"""
+        batches = self._log_batches(current_data)
+        for (features,) in _rebatch(self._features(batches), batch_size):
+            started = time.perf_counter()
+            scaled = self.scaler.transform(features).astype(np.float32)
+            scores = np.asarray(self.model.predict_on_batch(scaled)).reshape(-1)
+            self._record('predict', len(features), started)
+            yield scores
+
+    def predict_anomalies(self, current_data, batch_size: int = 8192,
+                          threshold: float = 0.5) -> Dict:
+        """Score every entry; returns scores, indices above threshold and throughput"""
+        first_stat = len(self.batch_stats)
+        scores = list(self.iter_scores(current_data, batch_size))
+        scores = np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+        stats = self.batch_stats[first_stat:]
+        total_seconds = sum(stat['seconds'] for stat in stats)
+        return {
+            'scores': scores,
+            'anomalies': np.flatnonzero(scores >= threshold),
+            'batch_stats': stats,
+            'rows_per_second': len(scores) / total_seconds if total_seconds else 0.0
+        }
+
+    def _check_fitted(self):
+        if not hasattr(self.scaler, 'mean_'):
+            raise ValueError("No log entries were trained on; the detector is not fitted")
+
+    def save(self, directory: str):
+        self._check_fitted()
+        os.makedirs(directory, exist_ok=True)
+        self.model.save(os.path.join(directory, 'model.keras'))
+        with open(os.path.join(directory, 'detector.json'), 'w') as f:
+            json.dump({
+                'source_buckets': self.source_buckets,
+                'scaler': {
+                    'mean': self.scaler.mean_.tolist(),
+                    'var': self.scaler.var_.tolist(),
+                    'scale': self.scaler.scale_.tolist(),
+                    'n_samples_seen': int(self.scaler.n_samples_seen_)
+                }
+            }, f)
+
+    @classmethod
+    def load(cls, directory: str, cpu_only: bool = True) -> 'AnomalyDetector':
+        with open(os.path.join(directory, 'detector.json'), 'r') as f:
+            saved = json.load(f)
+        detector = cls(saved['source_buckets'], cpu_only)
+        scaler = saved['scaler']
+        detector.scaler.mean_ = np.array(scaler['mean'])
+        detector.scaler.var_ = np.array(scaler['var'])
+        detector.scaler.scale_ = np.array(scaler['scale'])
+        detector.scaler.n_samples_seen_ = scaler['n_samples_seen']
+        detector.scaler.n_features_in_ = len(scaler['mean'])
+        tf = detector._tensorflow()
+        detector._model = tf.keras.models.load_model(os.path.join(directory, 'model.keras'))
+        return detector
+
+
+def main(command, model_dir, log_files, epochs=1, batch_size=None, threshold=0.5):
+    if command == 'train':
+        detector = AnomalyDetector()
+        for log_file in log_files:
+            history = detector.train(log_file, epochs, batch_size or 1024)
+            print(f"{log_file}: loss {history['loss'][-1]:.4f}, accuracy {history['accuracy'][-1]:.4f}")
+        detector.save(model_dir)
+        return
+    detector = AnomalyDetector.load(model_dir)
+    for log_file in log_files:
+        result = detector.predict_anomalies(log_file, batch_size or 8192, threshold)
+        for i, stat in enumerate(result['batch_stats']):
+            print(f"batch {i}: {stat['rows']} rows in {stat['seconds']:.3f}s "
+                  f"({stat['rows_per_second']:.0f} rows/s)")
+        print(f"{log_file}: {len(result['scores'])} entries scored, "
+              f"{len(result['anomalies'])} above {threshold}, "
+              f"{result['rows_per_second']:.0f} rows/s overall")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Train or run the log anomaly model")
+    parser.add_argument('command', choices=['train', 'score'])
+    parser.add_argument('model_dir')
+    parser.add_argument('log_files', nargs='+')
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int)
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    main(args.command, args.model_dir, args.log_files, args.epochs, args.batch_size,
+         args.threshold)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from parse_logs import LOG_PATTERN, Categorical, iter_chunks, to_epoch
+
+SAMPLE_SIZE = 1024 * 1024  # bytes hashed from each end of the file
+DEFAULT_BUDGET = 10 * 1024 ** 3  # total bytes kept on disk
+
+
+class Fingerprint(NamedTuple):
+    key: str
+    size: int  # bytes covered by key; parse only this far
+
+
+def file_fingerprint(path) -> Fingerprint:
+    """
+    Identify a file by absolute path, size, mtime and a hash of its first and
+    last MiB. Appending or rewriting the file changes the fingerprint without
+    having to hash gigabytes on every lookup. Only the first size bytes are
+    hashed, so a log still being appended to keeps a consistent fingerprint
+    as long as the parse stops at size too.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{os.path.abspath(path)}\0{size}\0{stat.st_mtime_ns}".encode())
+    with open(path, 'rb') as file:
+        digest.update(file.read(min(SAMPLE_SIZE, size)))
+        if size > SAMPLE_SIZE:
+            start = max(SAMPLE_SIZE, size - SAMPLE_SIZE)
+            file.seek(start)
+            digest.update(file.read(size - start))
+    return Fingerprint(digest.hexdigest(), size)
+
+
+class CacheEntry:
+    """Columns of one cached parse, memory-mapped read-only"""
+
+    def __init__(self, directory: str, meta: Dict):
+        self.directory = directory
+        self.meta = meta
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, spec in meta['columns'].items():
+            column_path = os.path.join(directory, f"{name}.bin")
+            if spec['length'] == 0:
+                self.columns[name] = np.empty(0, dtype=spec['dtype'])
+            else:
+                self.columns[name] = np.memmap(column_path, dtype=spec['dtype'], mode='r',
+                                               shape=(spec['length'],))
+
+    def __getitem__(self, name) -> np.ndarray:
+        return self.columns[name]
+
+
+class CacheWriter:
+    """Streams column chunks to a private directory, published on commit"""
+
+    def __init__(self, cache: 'ParseCache', final_dir: str, meta: Dict):
+        self.cache = cache
+        self.final_dir = final_dir
+        self.meta = meta
+        self.meta['columns'] = {}
+        self.directory = tempfile.mkdtemp(prefix='.building-', dir=cache.cache_dir)
+        self.entry: Optional[CacheEntry] = None  # set on commit
+        self._files = {}
+
+    def append(self, name: str, values):
+        values = np.ascontiguousarray(values)
+        spec = self.meta['columns'].setdefault(name, {'dtype': values.dtype.str, 'length': 0})
+        if values.dtype.str != spec['dtype']:
+            values = values.astype(spec['dtype'])
+        if name not in self._files:
+            self._files[name] = open(os.path.join(self.directory, f"{name}.bin"), 'wb')
+        values.tofile(self._files[name])
+        spec['length'] += len(values)
+
+    def append_strings(self, name: str, strings: List[str]):
+        """Variable-length strings as a UTF-8 blob plus int64 end offsets"""
+        encoded = [s.encode('utf-8') for s in strings]
+        spec = self.meta['columns'].get(f"{name}_bytes")
+        base = spec['length'] if spec else 0
+        ends = np.cumsum([len(b) for b in encoded], dtype=np.int64) + base
+        self.append(f"{name}_bytes", np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        self.append(f"{name}_ends", ends)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for file in self._files.values():
+            file.close()
+        if exc_type is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return False
+        with open(os.path.join(self.directory, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f)
+        try:
+            os.rename(self.directory, self.final_dir)
+            self.entry = CacheEntry(self.final_dir, self.meta)
+        except OSError:
+            # Another process published the same entry first
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.entry = self.cache.open_entry(self.final_dir)
+        self.cache.evict()
+        return False
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed log columns keyed by file fingerprint.
+
+    Each entry is a directory of raw little-endian column files plus a
+    meta.json describing dtypes and lengths, so a hit is a handful of
+    np.memmap calls. Entries are evicted least-recently-used first once
+    their total size exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_BUDGET):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_dir(self, path: str, kind: str, fingerprint: Fingerprint = None) -> str:
+        key = (fingerprint or file_fingerprint(path)).key
+        return os.path.join(self.cache_dir, f"{kind}-{key}")
+
+    def load(self, path: str, kind: str, fingerprint: Fingerprint = None) -> Optional[CacheEntry]:
+        """
+        Cached entry for path, or None on a miss. Pass the fingerprint used
+        for the matching writer() so both refer to the same file contents.
+        """
+        return self.open_entry(self._entry_dir(path, kind, fingerprint))
+
+    def open_entry(self, directory: str) -> Optional[CacheEntry]:
+        meta_path = os.path.join(directory, 'meta.json')
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        # meta.json's mtime doubles as the LRU timestamp
+        os.utime(meta_path)
+        return CacheEntry(directory, meta)
+
+    def writer(self, path: str, kind: str, meta: Dict = None,
+               fingerprint: Fingerprint = None) -> CacheWriter:
+        meta = dict(meta or {}, source=os.path.abspath(path), kind=kind, created=time.time())
+        return CacheWriter(self, self._entry_dir(path, kind, fingerprint), meta)
+
+    def _entries(self):
+        for name in os.listdir(self.cache_dir):
+            directory = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(directory, 'meta.json')
+            if name.startswith('.') or not os.path.exists(meta_path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(directory))
+            yield os.path.getmtime(meta_path), size, directory
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits its budget"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        # Never evict the most recent entry, even if it alone is over budget
+        for _, size, directory in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+
+
+class LogColumns:
+    """Cached parse_logs output: epoch/level/source columns plus raw strings"""
+
+    def __init__(self, entry: CacheEntry):
+        self.entry = entry
+        self.timestamps = entry['epoch']
+        self.log_levels = entry['log_levels']
+        self.sources = entry['sources']
+        self.level_categories: List[str] = entry.meta['level_categories']
+        self.source_categories: List[str] = entry.meta['source_categories']
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def _strings(self, name, indices) -> Iterator[str]:
+        blob, ends = self.entry[f"{name}_bytes"], self.entry[f"{name}_ends"]
+        for i in indices:
+            start = ends[i - 1] if i else 0
+            yield bytes(blob[start:ends[i]]).decode('utf-8')
+
+    def messages(self, indices=None) -> Iterator[str]:
+        return self._strings('message', range(len(self)) if indices is None else indices)
+
+    def level_mask(self, levels) -> np.ndarray:
+        codes = [i for i, level in enumerate(self.level_categories) if level in levels]
+        return np.isin(self.log_levels, codes)
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Same dicts as parse_logs.parse_logs, without touching the log file"""
+        rows = zip(self._strings('timestamp', range(len(self))), self.log_levels,
+                   self.sources, self.messages())
+        for timestamp, level, source, message in rows:
+            yield {
+                'timestamp': timestamp,
+                'log_level': self.level_categories[level],
+                'source': self.source_categories[source],
+                'message': message
+            }
+
+
+def load_log_columns(log_file: str, cache: ParseCache) -> LogColumns:
+    """Return cached columns for log_file, parsing and caching it on a miss"""
+    fingerprint = file_fingerprint(log_file)
+    entry = cache.load(log_file, 'logs', fingerprint)
+    if entry is None:
+        levels, sources = Categorical(), Categorical()
+        with cache.writer(log_file, 'logs', fingerprint=fingerprint) as writer:
+            for name, dtype in (('epoch', np.int64), ('log_levels', np.uint32),
+                                ('sources', np.uint32)):
+                writer.append(name, np.empty(0, dtype=dtype))
+            writer.append_strings('timestamp', [])
+            writer.append_strings('message', [])
+            for chunk in iter_chunks(log_file, end=fingerprint.size):
+                rows = LOG_PATTERN.findall(chunk)
+                if not rows:
+                    continue
+                timestamps, log_levels, log_sources, messages = zip(*rows)
+                writer.append('epoch', np.fromiter(map(to_epoch, timestamps),
+                                                   dtype=np.int64, count=len(rows)))
+                writer.append('log_levels', np.fromiter(map(levels.code, log_levels),
+                                                        dtype=np.uint32, count=len(rows)))
+                writer.append('sources', np.fromiter(map(sources.code, log_sources),
+                                                     dtype=np.uint32, count=len(rows)))
+                writer.append_strings('timestamp', timestamps)
+                writer.append_strings('message', messages)
+            writer.meta['level_categories'] = levels.categories
+            writer.meta['source_categories'] = sources.categories
+        entry = writer.entry
+    return LogColumns(entry)
@@ -1,34 +1,243 @@
+import os
 import sys
 import re
+import argparse
+import calendar
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterator, List
 
-def parse_logs(log_file):
-    with open(log_file, 'r') as file:
-        logs = file.readlines()
+from time_index import TimeIndex, in_range, normalize_bound
 
-    parsed_logs = []
-    for log in logs:
-        # Example regex to parse log entries
-        match = re.match(r'\[(.*?)\] \[(.*?)\] \[(.*?)\] (.*)', log)
-        if match:
+# Example regex to parse log entries, anchored per line so one finditer()
+# call walks a whole chunk
+LOG_PATTERN = re.compile(r'^\[(.*?)\] \[(.*?)\] \[(.*?)\] (.*)', re.M)
+
+CHUNK_SIZE = 4 * 1024 * 1024  # bytes read per I/O call
+RANGE_SIZE = 64 * 1024 * 1024  # upper bound on bytes handed to one worker task
+
+
+def iter_chunks(log_file, chunk_size=CHUNK_SIZE, start=0, end=None):
+    """Yield decoded text chunks that always end on a line boundary"""
+    with open(log_file, 'rb') as file:
+        file.seek(start)
+        remaining = end - start if end is not None else None
+        tail = b''
+        while True:
+            if remaining is None:
+                block = file.read(chunk_size)
+            else:
+                block = file.read(min(chunk_size, remaining))
+                remaining -= len(block)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b'\n') + 1
+            if cut == 0:
+                # No newline yet, keep accumulating the partial line
+                tail = block
+                continue
+            tail = block[cut:]
+            yield block[:cut].decode('utf-8', errors='replace')
+        if tail:
+            yield tail.decode('utf-8', errors='replace')
+
+
+def _next_line_start(file, offset):
+    """Smallest line start >= offset"""
+    if offset == 0:
+        return 0
+    file.seek(offset - 1)
+    file.readline()
+    return file.tell()
+
+
+def split_ranges(log_files, parts, max_range=RANGE_SIZE):
+    """
+    Split log files into (path, start, end) byte ranges aligned to newlines.
+
+    Each file is cut into roughly equal pieces so that the total number of
+    ranges is at least `parts` and no range is larger than max_range.
+    Ranges are returned in file order, which is the merge order.
+    """
+    sizes = [(path, os.path.getsize(path)) for path in log_files]
+    total = sum(size for _, size in sizes)
+    target = max(1, min(max_range, -(-total // max(1, parts))))
+    ranges = []
+    for path, size in sizes:
+        if size == 0:
+            continue
+        pieces = -(-size // target)
+        with open(path, 'rb') as file:
+            bounds = sorted({_next_line_start(file, size * i // pieces) for i in range(pieces)})
+        bounds.append(size)
+        ranges.extend((path, start, end) for start, end in zip(bounds, bounds[1:]) if end > start)
+    return ranges
+
+
+def ordered_map(func, tasks, workers):
+    """Run func over tasks in a process pool, yielding results in task order"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded window of in-flight tasks so a slow consumer
+        # doesn't make finished results pile up in memory
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(func, task))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _parse_range(task):
+    path, start, end = task
+    return [match.groups()
+            for chunk in iter_chunks(path, start=start, end=end)
+            for match in LOG_PATTERN.finditer(chunk)]
+
+
+def _to_record(groups):
+    timestamp, log_level, source, message = groups
+    return {
+        'timestamp': timestamp,
+        'log_level': log_level,
+        'source': source,
+        'message': message
+    }
+
+
+def time_range_bytes(log_file, since=None, until=None):
+    """(start, end) bytes to read for a time window, via the file's sparse index"""
+    if not (since or until):
+        return 0, None
+    return TimeIndex(log_file).update().byte_range(since, until)
+
+
+def parse_logs(log_file, chunk_size=CHUNK_SIZE, since=None, until=None):
+    """
+    Lazily yield one dict per log entry, in file order. With since/until
+    only the indexed byte range around the window is read.
+    """
+    since, until = normalize_bound(since), normalize_bound(until)
+    start, end = time_range_bytes(log_file, since, until)
+    for chunk in iter_chunks(log_file, chunk_size, start=start, end=end):
+        for match in LOG_PATTERN.finditer(chunk):
+            if (since or until) and not in_range(match.group(1), since, until):
+                continue
+            yield _to_record(match.groups())
+
+
+def parse_logs_parallel(log_files, workers=None):
+    """Parse one or many files in a process pool, yielding records in file order"""
+    workers = workers or os.cpu_count() or 1
+    for groups in ordered_map(_parse_range, split_ranges(log_files, workers), workers):
+        yield from map(_to_record, groups)
+
+
+@lru_cache(maxsize=4096)
+def _day_epoch(day):
+    return calendar.timegm((int(day[0:4]), int(day[5:7]), int(day[8:10]), 0, 0, 0))
+
+
+def to_epoch(timestamp):
+    """Convert a 'YYYY-MM-DD HH:MM:SS' stamp to epoch seconds (UTC), -1 if malformed"""
+    try:
+        return (_day_epoch(timestamp[:10])
+                + int(timestamp[11:13]) * 3600
+                + int(timestamp[14:16]) * 60
+                + int(timestamp[17:19]))
+    except (ValueError, IndexError):
+        return -1
+
+
+class Categorical:
+    """Interned string dictionary shared by every batch of a parse"""
+
+    def __init__(self):
+        self.categories: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.categories)
+            self.categories.append(sys.intern(value))
+        return code
+
+
+@dataclass
+class LogBatch:
+    timestamps: array = field(default_factory=lambda: array('q'))
+    log_levels: array = field(default_factory=lambda: array('I'))
+    sources: array = field(default_factory=lambda: array('I'))
+    messages: List[str] = field(default_factory=list)
+    level_categories: List[str] = field(default_factory=list)
+    source_categories: List[str] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.messages)
+
+
+def parse_log_batches(log_file, batch_size=65536, chunk_size=CHUNK_SIZE) -> Iterator[LogBatch]:
+    """
+    Yield columnar LogBatch objects of at most batch_size entries.
+
+    Level and source codes index into categories that are shared across the
+    whole file, so codes from different batches are directly comparable.
+    """
+    levels, sources = Categorical(), Categorical()
+    batch = LogBatch(level_categories=levels.categories,
+                     source_categories=sources.categories)
+    for chunk in iter_chunks(log_file, chunk_size):
+        for match in LOG_PATTERN.finditer(chunk):
             timestamp, log_level, source, message = match.groups()
-            parsed_logs.append({
-                'timestamp': timestamp,
-                'log_level': log_level,
-                'source': source,
-                'message': message
-            })
-    
-    return parsed_logs
-
-def main(log_file):
-    parsed_logs = parse_logs(log_file)
-    for log in parsed_logs:
+            batch.timestamps.append(to_epoch(timestamp))
+            batch.log_levels.append(levels.code(log_level))
+            batch.sources.append(sources.code(source))
+            batch.messages.append(message)
+            if len(batch.messages) >= batch_size:
+                yield batch
+                batch = LogBatch(level_categories=levels.categories,
+                                 source_categories=sources.categories)
+    if batch.messages:
+        yield batch
+
+
+def main(log_files, workers=1, cache_dir=None, since=None, until=None):
+    if since or until:
+        logs = (log for log_file in log_files
+                for log in parse_logs(log_file, since=since, until=until))
+    elif cache_dir:
+        # Optional numpy dependency, only needed when caching
+        from parse_cache import ParseCache, load_log_columns
+        cache = ParseCache(cache_dir)
+        logs = (log for log_file in log_files
+                for log in load_log_columns(log_file, cache).iter_records())
+    elif workers > 1:
+        logs = parse_logs_parallel(log_files, workers)
+    else:
+        logs = (log for log_file in log_files for log in parse_logs(log_file))
+    for log in logs:
         print(log)
 
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Parse Palo Alto log files")
+    parser.add_argument('log_files', nargs='+')
+    parser.add_argument('--workers', type=int, default=1,
+                        help="parse byte ranges in this many processes (default: 1; "
+                             "time-window queries always read sequentially)")
+    parser.add_argument('--cache-dir',
+                        help="reuse (or build) memory-mapped parse results in this directory")
+    parser.add_argument('--since', help="first timestamp to include, e.g. '2024-05-28 12:30'")
+    parser.add_argument('--until', help="last timestamp to include (prefix match)")
+    args = parser.parse_args(argv)
+    if (args.since or args.until) and args.cache_dir:
+        parser.error("--since/--until cannot be combined with --cache-dir")
+
+    main(args.log_files, args.workers, args.cache_dir, args.since, args.until)
+
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python parse_logs.py <log_file>")
-        sys.exit(1)
-    
-    log_file = sys.argv[1]
-    main(log_file)
+    cli()
@@ -0,0 +1,98 @@
+import os
+import glob
+import json
+from typing import Dict, Iterator, List, Optional
+
+from parse_logs import CHUNK_SIZE
+
+
+class LogFollower:
+    """
+    Incrementally read new complete lines from a set of growing log files.
+
+    For every file the byte offset of the first unread line is tracked
+    together with the file's (device, inode), so a rotated file is detected
+    and its unread tail is drained from the renamed copy before reading the
+    new file from the start. Offsets and an opaque caller `state` are
+    persisted together to a JSON checkpoint, which makes "counts up to
+    offset" consistent across restarts.
+    """
+
+    def __init__(self, log_files: List[str], checkpoint: Optional[str] = None,
+                 chunk_size: int = CHUNK_SIZE):
+        self.log_files = list(log_files)
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.positions: Dict[str, Dict] = {}
+        self.state: Dict = {}
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint, 'r') as f:
+                saved = json.load(f)
+            self.positions = saved.get('files', {})
+            self.state = saved.get('state', {})
+
+    def save(self):
+        """Atomically write offsets and state to the checkpoint file"""
+        if not self.checkpoint:
+            return
+        tmp_path = f"{self.checkpoint}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'files': self.positions, 'state': self.state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint)
+
+    def poll(self) -> Iterator[str]:
+        """Yield text chunks for everything appended since the last poll"""
+        for path in self.log_files:
+            position = self.positions.get(path)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Rotated away and not recreated yet; pick it up next poll
+                continue
+
+            if position and (position['dev'], position['inode']) != (stat.st_dev, stat.st_ino):
+                rotated = self._find_rotated(path, position)
+                if rotated:
+                    # The renamed file no longer grows, so its last line is complete
+                    yield from self._read(rotated, position['offset'], complete_only=False)
+                position = None
+            elif position and stat.st_size < position['offset']:
+                # Truncated in place (copytruncate rotation)
+                position = None
+
+            offset = position['offset'] if position else 0
+            offset = yield from self._read(path, offset, complete_only=True)
+            self.positions[path] = {'dev': stat.st_dev, 'inode': stat.st_ino, 'offset': offset}
+
+    def _find_rotated(self, path, position) -> Optional[str]:
+        for candidate in sorted(glob.glob(glob.escape(path) + '?*')):
+            try:
+                stat = os.stat(candidate)
+            except OSError:
+                continue
+            if (stat.st_dev, stat.st_ino) == (position['dev'], position['inode']):
+                return candidate
+        return None
+
+    def _read(self, path, offset, complete_only):
+        """Yield decoded complete lines from offset; return the offset reached"""
+        with open(path, 'rb') as file:
+            end = os.fstat(file.fileno()).st_size
+            file.seek(offset)
+            tail = b''
+            while offset + len(tail) < end:
+                data = file.read(min(self.chunk_size, end - offset - len(tail)))
+                if not data:
+                    break
+                block = tail + data
+                cut = block.rfind(b'\n') + 1
+                tail = block[cut:]
+                if cut:
+                    offset += cut
+                    yield block[:cut].decode('utf-8', errors='replace')
+            if tail and not complete_only:
+                offset += len(tail)
+                yield tail.decode('utf-8', errors='replace')
+        return offset
@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import argparse
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+STAMP_PATTERN = re.compile(rb'\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\]')
+DEFAULT_STRIDE = 256 * 1024  # bytes between index entries
+MAX_PROBE_LINES = 64  # lines inspected after a stride boundary to find a stamp
+
+
+def normalize_bound(value: Optional[str]) -> Optional[str]:
+    """Accept 'YYYY-MM-DD HH:MM[:SS]' or ISO 'YYYY-MM-DDTHH:MM[:SS]'"""
+    return value.replace('T', ' ') if value else value
+
+
+def in_range(timestamp: str, since: Optional[str], until: Optional[str]) -> bool:
+    """
+    since is inclusive; until is compared on its own length, so
+    until='2024-05-28 12:45' keeps every line stamped within 12:45.
+    """
+    if since and timestamp < since:
+        return False
+    if until and timestamp[:len(until)] > until:
+        return False
+    return True
+
+
+class TimeIndex:
+    """
+    Sparse sidecar index of a log file: (timestamp, byte offset of a line
+    start) roughly every `stride` bytes.
+
+    Building it seeks to each stride boundary and reads a single line there,
+    so even a first build touches a tiny fraction of the file. Appends are
+    indexed incrementally from the last entry; a different inode or a
+    shrunken file triggers a rebuild. Lines are assumed to be in timestamp
+    order, as firewall logs are written.
+    """
+
+    VERSION = 1
+
+    def __init__(self, log_file: str, index_file: str = None, stride: int = DEFAULT_STRIDE):
+        self.log_file = log_file
+        self.index_file = index_file or f"{log_file}.tidx"
+        self.stride = stride
+        self.stamps: List[str] = []
+        self.offsets: List[int] = []
+        self.identity = None
+        self.indexed_size = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if saved.get('version') != self.VERSION or saved.get('stride') != self.stride:
+            return
+        self.stamps = saved['stamps']
+        self.offsets = saved['offsets']
+        self.identity = tuple(saved['identity'])
+        self.indexed_size = saved['size']
+
+    def save(self):
+        tmp_path = f"{self.index_file}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'version': self.VERSION,
+                    'stride': self.stride,
+                    'identity': self.identity,
+                    'size': self.indexed_size,
+                    'stamps': self.stamps,
+                    'offsets': self.offsets
+                }, f)
+            os.replace(tmp_path, self.index_file)
+        except OSError:
+            # Read-only log directory: the index still serves this run
+            pass
+
+    def _probe(self, file, offset, size) -> Optional[Tuple[str, int]]:
+        """First stamped line starting at or after offset, as (stamp, line start)"""
+        file.seek(offset)
+        if offset:
+            file.readline()  # finish the line the boundary fell into
+        for _ in range(MAX_PROBE_LINES):
+            start = file.tell()
+            if start >= size:
+                return None
+            line = file.readline()
+            match = STAMP_PATTERN.match(line)
+            if match:
+                return match.group(1).decode('ascii'), start
+        return None
+
+    def update(self) -> 'TimeIndex':
+        """Bring the index up to date with the log file, saving it if it changed"""
+        stat = os.stat(self.log_file)
+        identity = (stat.st_dev, stat.st_ino)
+        if identity != self.identity or stat.st_size < self.indexed_size:
+            self.stamps, self.offsets = [], []
+            self.identity, self.indexed_size = identity, 0
+        if stat.st_size == self.indexed_size:
+            return self
+
+        with open(self.log_file, 'rb') as file:
+            position = self.offsets[-1] + self.stride if self.offsets else 0
+            while position < stat.st_size:
+                found = self._probe(file, position, stat.st_size)
+                if found is None:
+                    break
+                stamp, start = found
+                if not self.offsets or start > self.offsets[-1]:
+                    self.stamps.append(stamp)
+                    self.offsets.append(start)
+                position = start + self.stride
+        self.indexed_size = stat.st_size
+        self.save()
+        return self
+
+    def byte_range(self, since: Optional[str] = None, until: Optional[str] = None) -> Tuple[int, int]:
+        """
+        (start, end) bytes guaranteed to contain every line in [since, until].
+        Lines at the edges may fall outside and still need in_range().
+        """
+        size = os.path.getsize(self.log_file)
+        start, end = 0, size
+        if since and self.stamps:
+            # Last entry strictly before `since`; its block may hold matching lines
+            i = bisect_left(self.stamps, since) - 1
+            start = self.offsets[i] if i >= 0 else 0
+        if until and self.stamps:
+            # First entry strictly after every stamp matching `until`
+            i = bisect_right(self.stamps, until + '\uffff')
+            end = self.offsets[i] if i < len(self.offsets) else size
+        return start, max(start, end)
+
+
+def main(log_files, stride=DEFAULT_STRIDE, since=None, until=None):
+    for log_file in log_files:
+        index = TimeIndex(log_file, stride=stride).update()
+        start, end = index.byte_range(normalize_bound(since), normalize_bound(until))
+        print(f"{log_file}: {len(index.offsets)} entries, range {start}-{end} "
+              f"({end - start} of {index.indexed_size} bytes)")
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update sparse timestamp indexes")
+    parser.add_argument('log_files', nargs='+')
+    parser.add_argument('--stride', type=int, default=DEFAULT_STRIDE,
+                        help="bytes between index entries")
+    parser.add_argument('--since')
+    parser.add_argument('--until')
+    args = parser.parse_args(argv)
+
+    main(args.log_files, args.stride, args.since, args.until)
+
+if __name__ == '__main__':
+    cli()
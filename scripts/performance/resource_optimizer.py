@@ -1,5 +1,3 @@
-from pulp import *
-
 class ResourceOptimizer:
     def __init__(self):
         self.resources = {
@@ -1,39 +1,255 @@
 import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
 from sklearn.cluster import DBSCAN
+from sklearn.neighbors import KDTree
 from sklearn.preprocessing import StandardScaler
 import networkx as nx
 
+FEATURES = ('bytes', 'dest_port', 'hour_sin', 'hour_cos', 'severity')
+SEVERITY_LEVELS = {'informational': 0, 'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+# Incremental mode recompacts once the events folded since the last
+# compaction reach this share of the events compacted then
+COMPACT_GROWTH = 0.5
+
+
 class ThreatPatternAnalyzer:
     def __init__(self):
         self.pattern_database = {}
         self.threat_graph = nx.DiGraph()
         self.scaler = StandardScaler()
-        
+        self.eps = None
+        self.min_samples = None
+        self.events = []
+        self.features = np.empty((0, len(FEATURES)))
+        # Micro-clusters: event count and sum of scaled features (so the
+        # center is sums / counts), and the attack pattern (-1 for noise)
+        self.micro_counts = np.empty(0, dtype=np.int64)
+        self.micro_sums = np.empty((0, len(FEATURES)))
+        self.micro_patterns = np.empty(0, dtype=np.int64)
+        self.event_micro = np.empty(0, dtype=np.int64)
+        self.next_pattern = 0
+        self.compacted_events = 0
+        self._tree = None
+
     def extract_features(self, threat_event):
         # Convert threat events into numerical features
-        features = []
-        # Example features: source IP entropy, destination port distribution,
-        # payload size, temporal patterns, etc.
-        return np.array(features)
-    
-    def identify_attack_patterns(self, threat_events, eps=0.3, min_samples=5):
-        features = np.vstack([
-            self.extract_features(event) for event in threat_events
+        return self.extract_feature_matrix([threat_event])[0]
+
+    def extract_feature_matrix(self, threat_events):
+        """
+        One row of FEATURES per event: log payload size, log destination
+        port (so well-known ports sit together), time of day on a circle,
+        and severity. threat_events is a list of event dicts or a DataFrame
+        in extract_traffic() layout; missing fields count as 0.
+        """
+        frame = threat_events if isinstance(threat_events, pd.DataFrame) \
+            else pd.DataFrame.from_records(list(threat_events))
+        n = len(frame)
+
+        def column(*names):
+            for name in names:
+                if name in frame.columns:
+                    return pd.to_numeric(frame[name], errors='coerce').fillna(0).to_numpy(np.float64)
+            return np.zeros(n)
+
+        if 'timestamp' in frame.columns:
+            timestamps = pd.DatetimeIndex(pd.to_datetime(frame['timestamp'], errors='coerce'))
+        elif isinstance(frame.index, pd.DatetimeIndex):
+            timestamps = frame.index
+        else:
+            timestamps = pd.DatetimeIndex([pd.NaT] * n)
+        seconds = (timestamps.hour * 3600 + timestamps.minute * 60 + timestamps.second).to_numpy(
+            dtype=np.float64, na_value=0.0)
+        angle = 2 * np.pi * seconds / 86400
+
+        if 'severity' in frame.columns and not pd.api.types.is_numeric_dtype(frame['severity']):
+            severity = frame['severity'].astype(str).str.lower().map(SEVERITY_LEVELS)
+            severity = severity.fillna(0).to_numpy(np.float64)
+        else:
+            severity = column('severity')
+
+        return np.column_stack([
+            np.log1p(np.maximum(column('bytes', 'payload_size'), 0)),
+            np.log2(1 + np.maximum(column('dest_port', 'port'), 0)),
+            np.sin(angle),
+            np.cos(angle),
+            severity
         ])
-        normalized_features = self.scaler.fit_transform(features)
-        
-        # Use DBSCAN to identify attack patterns
-        clusters = DBSCAN(eps=eps, min_samples=min_samples).fit(normalized_features)
-        
-        # Group events by cluster
-        patterns = {}
-        for idx, label in enumerate(clusters.labels_):
-            if label not in patterns:
-                patterns[label] = []
-            patterns[label].append(threat_events[idx])
-            
-        return self._analyze_patterns(patterns)
-    
+
+    def identify_attack_patterns(self, threat_events, eps=0.3, min_samples=5, incremental=False):
+        """
+        Cluster threat events into attack patterns. By default the given
+        events replace any earlier ones and are clustered with a full
+        DBSCAN. With incremental=True they are folded into the existing
+        patterns instead (see fold_events) and the analysis covers every
+        event seen so far.
+        """
+        if incremental and self.events and (eps, min_samples) == (self.eps, self.min_samples):
+            self.fold_events(threat_events)
+        else:
+            self.eps, self.min_samples = eps, min_samples
+            self.events = list(threat_events.itertuples()) \
+                if isinstance(threat_events, pd.DataFrame) else list(threat_events)
+            self.features = self.extract_feature_matrix(threat_events)
+            self.compact()
+        return self._analyze_patterns(self._group_events())
+
+    def fold_events(self, threat_events):
+        """
+        Fold new events into the micro-clusters. Each event joins its
+        nearest micro-cluster (KD-tree query over the centers) when it lies
+        within eps / 2 of the center; the rest form new micro-clusters, one
+        per grid cell of side eps / 2. New micro-clusters join a pattern
+        they lie within eps of. The rest, and noise micro-clusters that
+        absorbed events, become a new pattern together with the noise
+        micro-clusters within eps of them once they hold min_samples events.
+        Once enough events have been folded, everything is reclustered by
+        compact().
+        """
+        if self.eps is None:
+            raise ValueError("identify_attack_patterns must cluster events before more are folded in")
+        features = self.extract_feature_matrix(threat_events)
+        if not len(features):
+            return
+        self.events.extend(threat_events.itertuples() if isinstance(threat_events, pd.DataFrame)
+                           else threat_events)
+        self.features = np.vstack([self.features, features])
+        if len(self.events) - self.compacted_events >= COMPACT_GROWTH * self.compacted_events:
+            self.compact()
+            return
+
+        points = self.scaler.transform(features)
+        radius = self.eps / 2
+        if len(self.micro_counts):
+            distance, nearest = self._center_tree().query(points, k=1)
+            distance, nearest = distance[:, 0], nearest[:, 0]
+        else:
+            distance, nearest = np.full(len(points), np.inf), np.zeros(len(points), dtype=np.int64)
+        absorbed = distance <= radius
+
+        assigned = np.empty(len(points), dtype=np.int64)
+        assigned[absorbed] = nearest[absorbed]
+        first_new = len(self.micro_counts)
+        assigned[~absorbed] = first_new + self._add_micro_clusters(points[~absorbed])
+        self._accumulate(assigned, points)
+        self.event_micro = np.concatenate([self.event_micro, assigned])
+        self._tree = None
+        grown = np.unique(nearest[absorbed])
+        grown = grown[self.micro_patterns[grown] < 0]
+        if first_new < len(self.micro_counts) or len(grown):
+            self._assign_micro_clusters(np.arange(first_new, len(self.micro_counts)), grown)
+
+    def compact(self):
+        """
+        Full reclustering: refit the scaler on every stored event, run
+        DBSCAN over all of them, and rebuild the micro-clusters from the
+        result, one per (pattern, grid cell)
+        """
+        if not len(self.features):
+            return
+        points = self.scaler.fit_transform(self.features)
+        labels = DBSCAN(eps=self.eps, min_samples=self.min_samples,
+                        algorithm='kd_tree').fit(points).labels_
+        cells = self._grid_cells(points)
+        keys = np.column_stack([labels, cells])
+        _, first, micro = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        micro = micro.ravel()
+        size = len(first)
+        self.micro_counts = np.zeros(size, dtype=np.int64)
+        self.micro_sums = np.zeros((size, len(FEATURES)))
+        self.micro_patterns = labels[first]
+        self._accumulate(micro, points)
+        self.event_micro = micro
+        self.next_pattern = int(labels.max()) + 1
+        self.compacted_events = len(self.events)
+        self._tree = None
+
+    def _grid_cells(self, points):
+        # Integer grid coordinates of side eps / 2, one row per point
+        return np.floor(points / (self.eps / 2)).astype(np.int64)
+
+    def _add_micro_clusters(self, points):
+        # New empty micro-clusters, one per occupied grid cell; returns the
+        # offset of each point's micro-cluster among the new ones
+        if not len(points):
+            return np.empty(0, dtype=np.int64)
+        _, cell = np.unique(self._grid_cells(points), axis=0, return_inverse=True)
+        cell = cell.ravel()
+        size = int(cell.max()) + 1
+        self.micro_counts = np.concatenate([self.micro_counts, np.zeros(size, dtype=np.int64)])
+        self.micro_sums = np.vstack([self.micro_sums, np.zeros((size, len(FEATURES)))])
+        self.micro_patterns = np.concatenate([self.micro_patterns,
+                                              np.full(size, -1, dtype=np.int64)])
+        return cell
+
+    def _accumulate(self, micro, points):
+        np.add.at(self.micro_counts, micro, 1)
+        np.add.at(self.micro_sums, micro, points)
+
+    def _centers(self):
+        return self.micro_sums / self.micro_counts[:, np.newaxis]
+
+    def _center_tree(self):
+        if self._tree is None:
+            self._tree = KDTree(self._centers())
+        return self._tree
+
+    def _assign_micro_clusters(self, new, grown):
+        """Patterns for new micro-clusters and for noise ones that absorbed events"""
+        centers = self._centers()
+        queried = np.concatenate([new, grown])
+        neighbors = self._center_tree().query_radius(centers[queried], r=self.eps)
+        sizes = np.array([len(near) for near in neighbors])
+        rows = np.repeat(queried, sizes)
+        columns = np.concatenate(neighbors)
+        # A new micro-cluster near a pattern joins it: the pattern most of
+        # its neighbors belong to, the lowest on ties
+        patterns = self.micro_patterns[columns]
+        voting = (patterns >= 0) & (rows >= len(self.micro_counts) - len(new))
+        voters, patterns = rows[voting], patterns[voting]
+        if len(voters):
+            votes, count = np.unique(np.column_stack([voters, patterns]), axis=0, return_counts=True)
+            order = np.lexsort((votes[:, 1], -count, votes[:, 0]))
+            votes = votes[order]
+            first = np.r_[True, votes[1:, 0] != votes[:-1, 0]]
+            self.micro_patterns[votes[first, 0]] = votes[first, 1]
+
+        # New micro-clusters left as noise, and grown noise ones, link to the
+        # noise micro-clusters within eps of them; a linked group becomes a
+        # pattern once it holds min_samples events. Other noise is only
+        # reached through these, so groups already judged too sparse and
+        # unchanged since stay noise.
+        linked = (self.micro_patterns[rows] < 0) & (self.micro_patterns[columns] < 0)
+        rows, columns = rows[linked], columns[linked]
+        if not len(rows):
+            return
+        nodes, edges = np.unique(np.concatenate([rows, columns]), return_inverse=True)
+        edges = edges.reshape(2, -1)
+        adjacency = sparse.csr_matrix((np.ones(edges.shape[1]), (edges[0], edges[1])),
+                                      shape=(len(nodes), len(nodes)))
+        count, component = connected_components(adjacency, directed=False)
+        weight = np.bincount(component, self.micro_counts[nodes], count)
+        dense = np.flatnonzero(weight >= self.min_samples)
+        labels = np.full(count, -1, dtype=np.int64)
+        labels[dense] = self.next_pattern + np.arange(len(dense))
+        self.next_pattern += len(dense)
+        self.micro_patterns[nodes] = labels[component]
+
+    def _group_events(self):
+        # Events per pattern label, noise under -1
+        if not len(self.events):
+            return {}
+        labels = self.micro_patterns[self.event_micro]
+        order = np.argsort(labels, kind='stable')
+        boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+        return {
+            int(labels[indices[0]]): [self.events[i] for i in indices]
+            for indices in np.split(order, boundaries)
+        }
+
     def _analyze_patterns(self, patterns):
         analysis_results = {}
         for label, events in patterns.items():
@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import subprocess
+from typing import Dict, List, NamedTuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose import alone costs hundreds of milliseconds or more. None of
+# them may be loaded by a lightweight subcommand.
+HEAVY_MODULES = ['tensorflow', 'pyspark', 'statsmodels', 'scipy', 'networkx',
+                 'sklearn', 'pulp', 'pandas', 'deepdiff']
+
+DEFAULT_IMPORT_BUDGET = 0.25  # seconds, cold start of a lightweight subcommand
+
+
+class Command(NamedTuple):
+    directory: str
+    target: str  # module name, or a shell script file name
+    help: str
+    lightweight: bool = False
+
+
+COMMANDS: Dict[str, Command] = {
+    'parse-logs': Command('log_analysis', 'parse_logs', "parse log entries", True),
+    'identify-anomalies': Command('log_analysis', 'identify_anomalies',
+                                  "count error signatures", True),
+    'time-index': Command('log_analysis', 'time_index', "build sparse timestamp indexes", True),
+    'log-summary': Command('log_analysis', 'distributed_log_analyzer',
+                           "aggregate level/source/time-bucket counts", True),
+    'extract-traffic': Command('log_analysis', 'extract_traffic', "typed flow columns from logs"),
+    'traffic-stream': Command('analysis', 'streaming_traffic_analyzer',
+                              "fold flow logs into windowed traffic aggregates"),
+    'ml-anomalies': Command('log_analysis', 'ml_anomaly_detector', "train or score the ML model"),
+    'nat-rules': Command('config_validation', 'validate_nat_rules',
+                         "list NAT rules and check them for conflicts", True),
+    'security-policies': Command('config_validation', 'validate_security_policies',
+                                 "list security policies", True),
+    'validate-config': Command('config_validation', 'validate_config',
+                               "run all config validators over one parse", True),
+    'optimize-policies': Command('config_validation', 'policy_optimizer',
+                                 "find shadowed, redundant and mergeable policies", True),
+    'rule-hits': Command('config_validation', 'policy_lookup',
+                         "replay logged flows and count rule hits"),
+    'drift-history': Command('config_validation', 'drift_journal',
+                             "query the configuration drift journal", True),
+    'compliance': Command('config_validation', 'compliance_checker',
+                          "check configs against a compliance framework"),
+    'benchmarks': Command('benchmarks', 'run_benchmarks',
+                          "time toolkit components on generated inputs", True),
+    'duplicate-objects': Command('config_validation', 'duplicate_objects',
+                                 "find duplicate and overlapping objects", True),
+    'export-logs': Command('log_analysis', 'export_logs.sh', "copy firewall logs", True),
+    'ping': Command('connectivity_tests', 'test_ping.sh', "ping a host", True),
+    'traceroute': Command('connectivity_tests', 'trace_route.sh', "trace the route to a host", True),
+    'interface-status': Command('connectivity_tests', 'check_interface_status.sh',
+                                "show interface status", True),
+    'cpu-usage': Command('preformance', 'check_cpu_usage.sh', "show CPU usage", True),
+    'memory-usage': Command('preformance', 'check_memory_usage.sh', "show memory usage", True),
+    'bandwidth-test': Command('preformance', 'bandwidth_test.sh', "run a bandwidth test", True)
+}
+
+
+def load_command(name: str):
+    """Import a Python subcommand's module; nothing heavy is touched before this"""
+    command = COMMANDS[name]
+    directory = os.path.join(SCRIPTS_DIR, command.directory)
+    if directory not in sys.path:
+        # Scripts import their siblings by bare module name
+        sys.path.insert(0, directory)
+    return importlib.import_module(command.target)
+
+
+def run_command(name: str, argv: List[str]) -> int:
+    command = COMMANDS[name]
+    if command.target.endswith('.sh'):
+        script = os.path.join(SCRIPTS_DIR, command.directory, command.target)
+        return subprocess.call(['bash', script, *argv])
+    load_command(name).cli(argv)
+    return 0
+
+
+_PROBE = """
+import sys, json, time
+started = time.perf_counter()
+sys.path.insert(0, {scripts_dir!r})
+import toolkit
+toolkit.load_command({name!r})
+print(json.dumps({{
+    'seconds': time.perf_counter() - started,
+    'heavy': sorted(m for m in {heavy!r} if m in sys.modules)
+}}))
+"""
+
+
+def check_import_budget(budget: float = DEFAULT_IMPORT_BUDGET) -> List[Dict]:
+    """
+    Cold-import every lightweight Python subcommand in a fresh interpreter and
+    report its import time and any heavy module it dragged in.
+    """
+    results = []
+    for name, command in COMMANDS.items():
+        if not command.lightweight or command.target.endswith('.sh'):
+            continue
+        started = time.perf_counter()
+        probe = _PROBE.format(scripts_dir=SCRIPTS_DIR, name=name, heavy=HEAVY_MODULES)
+        output = subprocess.run([sys.executable, '-c', probe], capture_output=True,
+                                text=True, check=True).stdout
+        report = json.loads(output)
+        report.update({
+            'command': name,
+            'process_seconds': time.perf_counter() - started,
+            'ok': report['seconds'] <= budget and not report['heavy']
+        })
+        results.append(report)
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog='toolkit',
+        description="Palo Alto firewall troubleshooting toolkit",
+        epilog="Run 'toolkit <command> --help' for a command's own options."
+    )
+    commands = parser.add_subparsers(dest='command', metavar='<command>')
+    for name, command in COMMANDS.items():
+        # Option parsing is left to each script, so its module is only
+        # imported once the subcommand is actually chosen
+        commands.add_parser(name, help=command.help, add_help=False)
+    budget = commands.add_parser('check-import-budget',
+                                 help="verify lightweight commands start quickly")
+    budget.add_argument('--budget', type=float, default=DEFAULT_IMPORT_BUDGET,
+                        help=f"seconds allowed per command (default: {DEFAULT_IMPORT_BUDGET})")
+
+    if argv and argv[0] in COMMANDS:
+        return run_command(argv[0], argv[1:])
+    args = parser.parse_args(argv)
+    if args.command == 'check-import-budget':
+        results = check_import_budget(args.budget)
+        for result in results:
+            status = 'ok' if result['ok'] else 'OVER BUDGET'
+            heavy = f" (loaded {', '.join(result['heavy'])})" if result['heavy'] else ''
+            print(f"{result['command']:20} {result['seconds'] * 1000:7.1f} ms import, "
+                  f"{result['process_seconds'] * 1000:7.1f} ms process  {status}{heavy}")
+        return 0 if all(result['ok'] for result in results) else 1
+    parser.print_help()
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'security'))
+
+from threat_pattern_analyzer import ThreatPatternAnalyzer
+
+
+def _random_events(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'bytes': rng.lognormal(8, 3, count),
+        'dest_port': rng.integers(1, 65536, count),
+        'severity': rng.integers(0, 5, count),
+        'timestamp': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 86400, count),
+                                                                 unit='s')
+    })
+
+
+def _burst(count):
+    return pd.DataFrame({
+        'bytes': [5000.0] * count,
+        'dest_port': [4444] * count,
+        'severity': ['critical'] * count,
+        'timestamp': [pd.Timestamp('2024-01-02 03:04:05')] * count
+    })
+
+
+def test_burst_onto_noise_event_becomes_pattern():
+    # The first copy is noise; folding more copies onto it must promote it
+    base = pd.concat([_random_events(1000), _burst(1)], ignore_index=True)
+    analyzer = ThreatPatternAnalyzer()
+    before = len(analyzer.identify_attack_patterns(base))
+    folded = analyzer.identify_attack_patterns(_burst(100), incremental=True)
+
+    assert len(folded) == before + 1
+    burst_labels = analyzer.micro_patterns[analyzer.event_micro[-101:]]
+    assert (burst_labels >= 0).all() and len(set(burst_labels)) == 1
+
+
+def test_burst_at_fresh_location_becomes_pattern():
+    analyzer = ThreatPatternAnalyzer()
+    before = len(analyzer.identify_attack_patterns(_random_events(1000)))
+    assert len(analyzer.identify_attack_patterns(_burst(100), incremental=True)) == before + 1